@@ -3,6 +3,7 @@
 Compile the Kubeflow pipeline from pipeline.py to pipeline.yaml
 This script is used by GitHub Actions CI/CD
 """
+
 import sys
 import os
 
@@ -13,68 +14,134 @@ os.chdir(repo_dir)
 # Ensure components directory exists
 os.makedirs("components", exist_ok=True)
 
+# Spans are only recorded when PIPELINE_TRACE is set (see src/tracing.py)
+from src.tracing import span
+
+trace = span("compile_pipeline")
+
 try:
     # Step 1: Validate Python syntax
     print("Step 1: Validating Python syntax...")
     import py_compile
 
-    py_compile.compile("src/pipeline_components.py", doraise=True)
-    py_compile.compile("pipeline.py", doraise=True)
+    with span("compile.syntax"):
+        py_compile.compile("src/components.py", doraise=True)
+        py_compile.compile("src/pipeline_components.py", doraise=True)
+        py_compile.compile("pipeline.py", doraise=True)
     print("✓ Python syntax validation passed!")
 
     # Step 2: Import and compile directly
     print("\nStep 2: Compiling pipeline to YAML...")
     sys.path.insert(0, repo_dir)
 
-    from kfp import dsl, compiler
-    from src.pipeline_components import (
-        data_extraction_component,
-        data_preprocessing_component,
-        model_training_component,
-        model_evaluation_component,
-    )
+    with span("compile.import_components"):
+        from kfp import dsl, compiler
+        from src.pipeline_components import (
+            data_extraction_component,
+            data_validation_component,
+            data_preprocessing_component,
+            model_training_component,
+            model_export_component,
+            model_compaction_component,
+            model_evaluation_component,
+        )
+        from src.resources import (
+            SLICED_PIPELINE_STEPS,
+            apply_resources,
+            check_compiled,
+            granted_cpus,
+            load_profile,
+        )
+
+    profile = load_profile()
 
     @dsl.pipeline(
         name="Boston Housing ML Pipeline",
-        description="End-to-end ML pipeline: data extraction -> preprocessing -> training -> evaluation",
+        description="End-to-end ML pipeline: data extraction -> validation -> preprocessing -> training -> evaluation",
     )
     def boston_housing_pipeline(
         dvc_repo_url: str = "https://github.com/AbdSipra/mlops-kubeflow-assignmen",
         dvc_data_path: str = "data/raw_data.csv",
+        dvc_remote_url: str = "",
+        train_max_rows: int = 0,
+        compact_max_depth: int = 0,
+        compact_min_samples_leaf: int = 1,
+        trace_parent: str = "",
     ):
         data_extraction_task = data_extraction_component(
             dvc_repo_url=dvc_repo_url,
             dvc_data_path=dvc_data_path,
-            output_csv_path="/tmp/raw_data.csv",
+            dvc_remote_url=dvc_remote_url,
+            trace_parent=trace_parent,
         ).set_display_name("Data Extraction")
+        apply_resources(data_extraction_task, "extraction", profile)
+
+        validation_task = data_validation_component(
+            raw_data=data_extraction_task.outputs["raw_data"],
+            trace_parent=trace_parent,
+        ).set_display_name("Data Validation")
+        apply_resources(validation_task, "validation", profile)
 
         preprocessing_task = data_preprocessing_component(
-            raw_csv_path=data_extraction_task.output,
-            train_csv_path="/tmp/train.csv",
-            test_csv_path="/tmp/test.csv",
+            raw_data=data_extraction_task.outputs["raw_data"],
             test_size=0.2,
             random_state=42,
+            trace_parent=trace_parent,
         ).set_display_name("Data Preprocessing")
+        preprocessing_task.after(validation_task)
+        apply_resources(preprocessing_task, "preprocessing", profile)
 
         training_task = model_training_component(
-            train_csv_path=preprocessing_task.output,
-            model_output_path="/tmp/model.joblib",
+            train_data=preprocessing_task.outputs["train_data"],
             n_estimators=100,
             random_state=42,
+            n_jobs=granted_cpus(profile["training"]),
+            max_rows=train_max_rows,
+            trace_parent=trace_parent,
         ).set_display_name("Model Training")
+        apply_resources(training_task, "training", profile)
+
+        export_task = model_export_component(
+            model=training_task.outputs["model"],
+            test_data=preprocessing_task.outputs["test_data"],
+            trace_parent=trace_parent,
+        ).set_display_name("Model Export")
+        apply_resources(export_task, "export", profile)
+
+        compaction_task = model_compaction_component(
+            model=training_task.outputs["model"],
+            train_data=preprocessing_task.outputs["train_data"],
+            test_data=preprocessing_task.outputs["test_data"],
+            max_depth=compact_max_depth,
+            min_samples_leaf=compact_min_samples_leaf,
+            trace_parent=trace_parent,
+        ).set_display_name("Model Compaction")
+        apply_resources(compaction_task, "compaction", profile)
 
         evaluation_task = model_evaluation_component(
-            model_path=training_task.output,
-            test_csv_path="/tmp/test.csv",
-            metrics_output_path="/tmp/metrics.json",
+            model=training_task.outputs["model"],
+            test_data=preprocessing_task.outputs["test_data"],
+            n_jobs=granted_cpus(profile["evaluation"]),
+            trace_parent=trace_parent,
         ).set_display_name("Model Evaluation")
+        apply_resources(evaluation_task, "evaluation", profile)
 
-    compiler.Compiler().compile(
-        pipeline_func=boston_housing_pipeline,
-        package_path="pipeline.yaml",
-    )
+    with span("compile.yaml", package_path="pipeline.yaml"):
+        compiler.Compiler().compile(
+            pipeline_func=boston_housing_pipeline,
+            package_path="pipeline.yaml",
+        )
     print("✓ Pipeline compiled successfully to pipeline.yaml")
 
+    from pipeline import boston_housing_sliced_pipeline
+
+    with span("compile.yaml", package_path="pipeline_sliced.yaml"):
+        compiler.Compiler().compile(
+            pipeline_func=boston_housing_sliced_pipeline,
+            package_path="pipeline_sliced.yaml",
+        )
+    print("✓ Sliced pipeline compiled successfully to pipeline_sliced.yaml")
+
     # Step 3: Verify output
     print("\nStep 3: Verifying output...")
     if os.path.exists("pipeline.yaml"):
@@ -82,6 +149,18 @@ try:
         with open("pipeline.yaml", "r") as f:
             lines = len(f.readlines())
         print(f"✓ pipeline.yaml verified: {lines} lines, {file_size} bytes")
+        trace.set_attribute("pipeline.yaml.bytes", file_size)
+        with span("compile.check_resources"):
+            errors = check_compiled("pipeline.yaml", profile)
+            errors += check_compiled(
+                "pipeline_sliced.yaml", profile, steps=SLICED_PIPELINE_STEPS
+            )
+        if errors:
+            print("✗ ERROR: task resources do not match pipeline_resources.yaml:")
+            for error in errors:
+                print(f"  - {error}")
+            sys.exit(1)
+        print("✓ Task resources match pipeline_resources.yaml")
         print("\n" + "=" * 50)
         print("✓ CI/CD COMPILATION SUCCESSFUL!")
         print("=" * 50)
@@ -90,8 +169,11 @@ try:
         sys.exit(1)
 
 except Exception as e:
+    trace.end(error=f"{type(e).__name__}: {e}")
     print(f"✗ ERROR: {type(e).__name__}: {e}")
     import traceback
 
     traceback.print_exc()
     sys.exit(1)
+finally:
+    trace.end()
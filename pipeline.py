@@ -1,60 +1,180 @@
 from kfp import dsl, compiler
 from src.pipeline_components import (
     data_extraction_component,
+    data_validation_component,
     data_preprocessing_component,
     model_training_component,
+    model_export_component,
+    model_compaction_component,
     model_evaluation_component,
+    data_slicing_component,
+    slice_training_component,
+    metrics_aggregation_component,
+)
+from src.resources import (
+    SLICED_PIPELINE_STEPS,
+    apply_resources,
+    check_compiled,
+    granted_cpus,
+    load_profile,
 )
 
 
 @dsl.pipeline(
     name="Boston Housing ML Pipeline",
-    description="End-to-end ML pipeline: data extraction -> preprocessing -> training -> evaluation",
+    description="End-to-end ML pipeline: data extraction -> validation -> preprocessing -> training -> evaluation",
 )
 def boston_housing_pipeline(
     dvc_repo_url: str = "https://github.com/AbdSipra/mlops-kubeflow-assignmen",
     dvc_data_path: str = "data/raw_data.csv",
+    dvc_remote_url: str = "",
+    train_max_rows: int = 0,
+    compact_max_depth: int = 0,
+    compact_min_samples_leaf: int = 1,
+    trace_parent: str = "",
 ):
     """
     Complete ML pipeline for Boston Housing dataset.
 
     Steps:
     1. Extract data from DVC-tracked repository
-    2. Preprocess: clean, scale, and split data
-    3. Train: Random Forest model
-    4. Evaluate: calculate metrics (MSE, R2)
+    2. Validate: schema, nulls, ranges and drift vs. reference statistics
+    3. Preprocess: clean, scale, and split data
+    4. Train: Random Forest model (on train_max_rows rows when > 0, e.g. the
+       size recommended by src/learning_curve.py), exported to the flat format and compacted
+       (float32, pruned to compact_max_depth/compact_min_samples_leaf)
+    5. Evaluate: calculate metrics (MSE, R2)
+
+    CPU/memory requests and limits and caching per step come from
+    pipeline_resources.yaml (see src/resources.py). A ``trace_parent``
+    (W3C traceparent, set by the submit scripts when tracing is on) joins
+    every component's span to the submitting trace (see src/tracing.py).
     """
+    profile = load_profile()
 
     # Step 1: Data Extraction
     data_extraction_task = data_extraction_component(
         dvc_repo_url=dvc_repo_url,
         dvc_data_path=dvc_data_path,
-        output_csv_path="/tmp/raw_data.csv",
+        dvc_remote_url=dvc_remote_url,
+        trace_parent=trace_parent,
     ).set_display_name("Data Extraction")
+    apply_resources(data_extraction_task, "extraction", profile)
 
-    # Step 2: Data Preprocessing
+    # Step 2: Data Validation (fails fast before any expensive step)
+    validation_task = data_validation_component(
+        raw_data=data_extraction_task.outputs["raw_data"],
+        trace_parent=trace_parent,
+    ).set_display_name("Data Validation")
+    apply_resources(validation_task, "validation", profile)
+
+    # Step 3: Data Preprocessing
     preprocessing_task = data_preprocessing_component(
-        raw_csv_path=data_extraction_task.output,
-        train_csv_path="/tmp/train.csv",
-        test_csv_path="/tmp/test.csv",
+        raw_data=data_extraction_task.outputs["raw_data"],
         test_size=0.2,
         random_state=42,
+        trace_parent=trace_parent,
     ).set_display_name("Data Preprocessing")
+    preprocessing_task.after(validation_task)
+    apply_resources(preprocessing_task, "preprocessing", profile)
 
-    # Step 3: Model Training
+    # Step 4: Model Training
     training_task = model_training_component(
-        train_csv_path=preprocessing_task.output,
-        model_output_path="/tmp/model.joblib",
+        train_data=preprocessing_task.outputs["train_data"],
         n_estimators=100,
         random_state=42,
+        n_jobs=granted_cpus(profile["training"]),
+        max_rows=train_max_rows,
+        trace_parent=trace_parent,
     ).set_display_name("Model Training")
+    apply_resources(training_task, "training", profile)
+
+    # Step 4b: Export to the flat NumPy-only format
+    export_task = model_export_component(
+        model=training_task.outputs["model"],
+        test_data=preprocessing_task.outputs["test_data"],
+        trace_parent=trace_parent,
+    ).set_display_name("Model Export")
+    apply_resources(export_task, "export", profile)
 
-    # Step 4: Model Evaluation
+    # Step 4c: Compact float32 model for serving (size/latency/MSE report)
+    compaction_task = model_compaction_component(
+        model=training_task.outputs["model"],
+        train_data=preprocessing_task.outputs["train_data"],
+        test_data=preprocessing_task.outputs["test_data"],
+        max_depth=compact_max_depth,
+        min_samples_leaf=compact_min_samples_leaf,
+        trace_parent=trace_parent,
+    ).set_display_name("Model Compaction")
+    apply_resources(compaction_task, "compaction", profile)
+
+    # Step 5: Model Evaluation
     evaluation_task = model_evaluation_component(
-        model_path=training_task.output,
-        test_csv_path="/tmp/test.csv",
-        metrics_output_path="/tmp/metrics.json",
+        model=training_task.outputs["model"],
+        test_data=preprocessing_task.outputs["test_data"],
+        n_jobs=granted_cpus(profile["evaluation"]),
+        trace_parent=trace_parent,
     ).set_display_name("Model Evaluation")
+    apply_resources(evaluation_task, "evaluation", profile)
+
+
+@dsl.pipeline(
+    name="Boston Housing Sliced Pipeline",
+    description="Per-slice models: extraction -> validation -> slicing -> parallel per-slice training/evaluation -> weighted aggregation",
+)
+def boston_housing_sliced_pipeline(
+    dvc_repo_url: str = "https://github.com/AbdSipra/mlops-kubeflow-assignmen",
+    dvc_data_path: str = "data/raw_data.csv",
+    dvc_remote_url: str = "",
+    slice_column: str = "RAD",
+    min_slice_rows: int = 20,
+):
+    """
+    One model per value of ``slice_column`` (e.g. per region).
+
+    Steps:
+    1. Extract and validate data (as in boston_housing_pipeline)
+    2. Slice: one CSV per key value (small values pooled into "other")
+    3. Per slice, in parallel: preprocess, train, evaluate
+    4. Aggregate: per-slice metrics merged into a summary weighted by test rows
+    """
+    profile = load_profile()
+
+    data_extraction_task = data_extraction_component(
+        dvc_repo_url=dvc_repo_url,
+        dvc_data_path=dvc_data_path,
+        dvc_remote_url=dvc_remote_url,
+    ).set_display_name("Data Extraction")
+    apply_resources(data_extraction_task, "extraction", profile)
+
+    validation_task = data_validation_component(
+        raw_data=data_extraction_task.outputs["raw_data"],
+    ).set_display_name("Data Validation")
+    apply_resources(validation_task, "validation", profile)
+
+    slicing_task = data_slicing_component(
+        raw_data=data_extraction_task.outputs["raw_data"],
+        slice_column=slice_column,
+        min_rows=min_slice_rows,
+    ).set_display_name("Data Slicing")
+    slicing_task.after(validation_task)
+    apply_resources(slicing_task, "slicing", profile)
+
+    # Fan out: one task per slice name, scheduled in parallel
+    with dsl.ParallelFor(slicing_task.outputs["Output"]) as slice_name:
+        slice_task = slice_training_component(
+            slices=slicing_task.outputs["slices"],
+            slice_name=slice_name,
+            n_estimators=100,
+            random_state=42,
+            n_jobs=granted_cpus(profile["slice_training"]),
+        ).set_display_name("Slice Training")
+        apply_resources(slice_task, "slice_training", profile)
+
+    aggregation_task = metrics_aggregation_component(
+        metrics=dsl.Collected(slice_task.outputs["metrics"]),
+    ).set_display_name("Metrics Aggregation")
+    apply_resources(aggregation_task, "aggregation", profile)
 
 
 if __name__ == "__main__":
@@ -64,3 +184,19 @@ if __name__ == "__main__":
         package_path="pipeline.yaml",
     )
     print("✓ Pipeline compiled successfully to pipeline.yaml")
+
+    errors = check_compiled("pipeline.yaml", load_profile())
+    if errors:
+        raise SystemExit("✗ Resource check failed:\n" + "\n".join(errors))
+    print("✓ Task resources match pipeline_resources.yaml")
+
+    compiler.Compiler().compile(
+        pipeline_func=boston_housing_sliced_pipeline,
+        package_path="pipeline_sliced.yaml",
+    )
+    errors = check_compiled(
+        "pipeline_sliced.yaml", load_profile(), steps=SLICED_PIPELINE_STEPS
+    )
+    if errors:
+        raise SystemExit("✗ Resource check failed:\n" + "\n".join(errors))
+    print("✓ Sliced pipeline compiled successfully to pipeline_sliced.yaml")
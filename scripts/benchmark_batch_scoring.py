@@ -0,0 +1,70 @@
+"""
+Batch scoring throughput (rows/s) as the worker count grows.
+
+Tiles the raw table into an unlabeled CSV of ``--rows`` rows and scores it
+with ``src.batch_scoring.score_file`` once per worker count.
+
+Usage:
+    python -m scripts.benchmark_batch_scoring data/raw_local.csv models/rf_model.npz models/scaler.json --rows 500000 --workers 1 2 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from src.artifacts import read_frame
+from src.batch_scoring import CHUNK_BYTES, score_file
+from src.schema import FEATURES, RAW_SCHEMA
+
+
+def main():
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("raw_csv_path")
+    parser.add_argument("model_path")
+    parser.add_argument("scaler_path")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / (1 << 20))
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    base = read_frame(args.raw_csv_path, schema=RAW_SCHEMA)[FEATURES]
+    table = base.iloc[np.arange(args.rows) % len(base)]
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "unlabeled.csv")
+        table.to_csv(input_path, index=False)
+        size_mb = os.path.getsize(input_path) / (1 << 20)
+        print(f"Input: {args.rows} rows, {size_mb:.1f} MB")
+        print(f"{'workers':>8}{'chunks':>8}{'wall s':>9}{'rows/s':>12}{'speedup':>9}")
+        for n_jobs in args.workers:
+            result = score_file(
+                input_path,
+                args.model_path,
+                args.scaler_path,
+                os.path.join(tmp, f"predictions_{n_jobs}.parquet"),
+                n_jobs=n_jobs,
+                chunk_bytes=int(args.chunk_mb * (1 << 20)),
+            )
+            result["speedup"] = (
+                result["rows_per_second"] / report[0]["rows_per_second"]
+                if report
+                else 1.0
+            )
+            report.append(result)
+            print(
+                f"{result['n_jobs']:>8}{result['chunks']:>8}{result['wall_seconds']:>9.2f}"
+                f"{result['rows_per_second']:>12,.0f}{result['speedup']:>8.2f}x"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
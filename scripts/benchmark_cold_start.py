@@ -0,0 +1,84 @@
+"""
+Cold-start benchmark: joblib + sklearn vs. the flat NumPy-only forest.
+
+Each variant runs in a fresh interpreter that imports what it needs, loads
+the model and scores the test set once; wall time covers the whole process
+(what an inference pod pays on start). Also re-checks prediction parity.
+
+Usage:
+    python -m scripts.benchmark_cold_start models/rf_model.joblib models/rf_model.npz data/test.csv
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+SKLEARN_SNIPPET = """
+import sys, joblib, numpy as np
+model = joblib.load(sys.argv[1])
+X = np.loadtxt(sys.argv[2], delimiter=",", skiprows=1)[:, :-1]
+model.predict(X)
+print("sklearn" in sys.modules)
+"""
+
+FLAT_SNIPPET = """
+import sys, numpy as np
+from src.flat_forest import load
+model = load(sys.argv[1])
+X = np.loadtxt(sys.argv[2], delimiter=",", skiprows=1)[:, :-1]
+model.predict(X)
+print("sklearn" in sys.modules)
+"""
+
+
+def time_process(snippet, *args, repeats=5):
+    """Median wall time of a fresh interpreter running ``snippet``."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", snippet, *args],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), out.stdout.strip() == "True"
+
+
+def main():
+    import numpy as np
+    import joblib
+
+    from src.flat_forest import check_parity, load
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("joblib_path")
+    parser.add_argument("flat_path")
+    parser.add_argument("test_csv_path")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    X = np.loadtxt(args.test_csv_path, delimiter=",", skiprows=1)[:, :-1]
+    diff = check_parity(joblib.load(args.joblib_path), load(args.flat_path), X)
+    print(f"Parity: max |Δ| = {diff:.2e} on {len(X)} rows")
+
+    baseline, uses_sklearn = time_process(
+        SKLEARN_SNIPPET, args.joblib_path, args.test_csv_path, repeats=args.repeats
+    )
+    flat, flat_uses_sklearn = time_process(
+        FLAT_SNIPPET, args.flat_path, args.test_csv_path, repeats=args.repeats
+    )
+    print(
+        f"joblib + sklearn : {baseline * 1e3:8.1f} ms (sklearn imported: {uses_sklearn})"
+    )
+    print(
+        f"flat NumPy-only  : {flat * 1e3:8.1f} ms (sklearn imported: {flat_uses_sklearn})"
+    )
+    print(f"Cold start speedup: x{baseline / flat:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Drift monitoring cost per scored batch.
+
+Times ``DriftMonitor.observe`` (sketch the batch and recompute every PSI)
+against the reference sketch from preprocessing for several batch sizes, and
+the merge of a worker sketch into the monitor.
+
+Usage:
+    python -m scripts.benchmark_drift models/reference_sketch.json data/test.csv --batch-sizes 1 100 1000 10000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.artifacts import read_frame
+from src.drift import DriftMonitor, load_sketch
+from src.schema import PROCESSED_SCHEMA, TARGET
+
+
+def per_call_us(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("reference_sketch_path")
+    parser.add_argument("test_csv_path", help="scaled split to draw batches from")
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 10000]
+    )
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    reference = load_sketch(args.reference_sketch_path)
+    test = read_frame(args.test_csv_path, schema=PROCESSED_SCHEMA)
+    X = test[reference.columns[:-1]].to_numpy()
+    y = test[TARGET].to_numpy()
+    monitor = DriftMonitor(reference)
+
+    report = {"batches": []}
+    print(f"{'rows':>7}{'observe us':>12}{'us/row':>9}")
+    for size in args.batch_sizes:
+        idx = np.arange(size) % len(X)
+        batch, predictions = X[idx], y[idx]
+        us = per_call_us(lambda: monitor.observe(batch, predictions), args.repeats)
+        report["batches"].append({"rows": size, "observe_us": us})
+        print(f"{size:>7}{us:>12.1f}{us / size:>9.3f}")
+
+    worker = reference.empty().update(np.column_stack([X, y]))
+    report["merge_us"] = per_call_us(lambda: monitor.merge(worker), args.repeats)
+    report["sketch_bytes"] = int(reference.counts.nbytes + reference.edges.nbytes)
+    print(
+        f"merge {report['merge_us']:.1f} us, sketch {report['sketch_bytes']} bytes "
+        "regardless of rows seen"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
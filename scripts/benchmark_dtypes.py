@@ -0,0 +1,94 @@
+"""
+Compare the compact (float32 / small int) dtype layer against the float64 baseline.
+
+Runs preprocessing -> training -> evaluation twice on the same raw CSV and
+reports in-memory table size, split artifact size and the MSE/R2 impact.
+
+Usage:
+    python -m scripts.benchmark_dtypes data/raw_local.csv [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from src.artifacts import read_frame
+from src.components import (
+    data_preprocessing_component,
+    model_training_component,
+    model_evaluation_component,
+)
+from src.schema import RAW_SCHEMA
+
+
+def run_variant(raw_csv_path, workdir, compact):
+    name = "compact" if compact else "float64"
+    train = os.path.join(workdir, f"{name}_train.csv")
+    test = os.path.join(workdir, f"{name}_test.csv")
+    model = os.path.join(workdir, f"{name}_model.joblib")
+    metrics = os.path.join(workdir, f"{name}_metrics.json")
+
+    schema = RAW_SCHEMA if compact else {c: "float64" for c in RAW_SCHEMA}
+    table_bytes = int(read_frame(raw_csv_path, schema=schema).memory_usage().sum())
+
+    data_preprocessing_component(
+        raw_csv_path=raw_csv_path,
+        train_csv_path=train,
+        test_csv_path=test,
+        compact_dtypes=compact,
+    )
+    model_training_component(train_csv_path=train, model_output_path=model)
+    model_evaluation_component(
+        model_path=model, test_csv_path=test, metrics_output_path=metrics
+    )
+    with open(metrics) as f:
+        scores = json.load(f)
+
+    return {
+        "table_bytes": table_bytes,
+        "split_artifact_bytes": os.path.getsize(train) + os.path.getsize(test),
+        "MSE": scores["MSE"],
+        "R2": scores["R2"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("raw_csv_path")
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = run_variant(args.raw_csv_path, workdir, compact=False)
+        compact = run_variant(args.raw_csv_path, workdir, compact=True)
+
+    report = {
+        "float64": baseline,
+        "compact": compact,
+        "table_ratio": compact["table_bytes"] / baseline["table_bytes"],
+        "artifact_ratio": compact["split_artifact_bytes"]
+        / baseline["split_artifact_bytes"],
+        "MSE_delta": compact["MSE"] - baseline["MSE"],
+        "R2_delta": compact["R2"] - baseline["R2"],
+    }
+
+    print(f"{'':<10}{'table bytes':>14}{'split bytes':>14}{'MSE':>10}{'R2':>10}")
+    for name in ("float64", "compact"):
+        r = report[name]
+        print(
+            f"{name:<10}{r['table_bytes']:>14}{r['split_artifact_bytes']:>14}"
+            f"{r['MSE']:>10.4f}{r['R2']:>10.4f}"
+        )
+    print(
+        f"\nTable size x{report['table_ratio']:.2f}, artifacts x{report['artifact_ratio']:.2f}, "
+        f"MSE {report['MSE_delta']:+.4f}, R2 {report['R2_delta']:+.4f}"
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
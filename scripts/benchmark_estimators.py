@@ -0,0 +1,98 @@
+"""
+Fit time, predict latency, model size and MSE/R2 of each training backend.
+
+The raw table is preprocessed once and every backend in
+``src.estimators.ESTIMATORS`` is trained and evaluated by the pipeline
+components on that same split.
+
+Usage:
+    python -m scripts.benchmark_estimators data/raw_local.csv --n-jobs 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src.artifacts import load_model, read_frame
+from src.components import (
+    data_preprocessing_component,
+    model_evaluation_component,
+    model_training_component,
+)
+from src.estimators import ESTIMATORS
+from src.pruning import predict_latency
+from src.schema import PROCESSED_SCHEMA, feature_columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("raw_csv_path")
+    parser.add_argument(
+        "--estimators", nargs="+", choices=sorted(ESTIMATORS), default=list(ESTIMATORS)
+    )
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        train_csv, test_csv = (os.path.join(tmp, n) for n in ("train.csv", "test.csv"))
+        data_preprocessing_component(
+            raw_csv_path=args.raw_csv_path,
+            train_csv_path=train_csv,
+            test_csv_path=test_csv,
+        )
+        test = read_frame(test_csv, schema=PROCESSED_SCHEMA)
+        X_test = test[feature_columns(test.columns)].to_numpy()
+
+        print(
+            f"{'estimator':<24}{'fit s':>8}{'batch ms':>10}{'row us':>9}"
+            f"{'size KB':>10}{'MSE':>9}{'R2':>8}"
+        )
+        for name in args.estimators:
+            model_path = os.path.join(tmp, f"{name}.joblib")
+            metrics_path = os.path.join(tmp, f"{name}.json")
+            start = time.perf_counter()
+            model_training_component(
+                train_csv_path=train_csv,
+                model_output_path=model_path,
+                n_estimators=args.n_estimators,
+                n_jobs=args.n_jobs,
+                estimator=name,
+            )
+            fit_seconds = time.perf_counter() - start
+            model_evaluation_component(
+                model_path=model_path,
+                test_csv_path=test_csv,
+                metrics_output_path=metrics_path,
+            )
+            with open(metrics_path) as f:
+                scores = json.load(f)
+            batch_s, row_s = predict_latency(load_model(model_path), X_test)
+
+            row = {
+                "estimator": name,
+                "fit_seconds": fit_seconds,
+                "predict_batch_seconds": batch_s,
+                "predict_row_seconds": row_s,
+                "model_bytes": os.path.getsize(model_path),
+                "MSE": scores["MSE"],
+                "R2": scores["R2"],
+            }
+            report.append(row)
+            print(
+                f"{name:<24}{fit_seconds:>8.2f}{batch_s * 1e3:>10.2f}"
+                f"{row_s * 1e6:>9.0f}{row['model_bytes'] / 1024:>10.0f}"
+                f"{row['MSE']:>9.3f}{row['R2']:>8.3f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Throughput of the per-slice fan-out as the number of slices grows.
+
+The raw table is tiled ``--scale`` times and its slice column is overwritten
+with ``row % k`` so every run has ``k`` equally sized slices over the same
+rows. Each ``k`` runs through ``src.slicing.fan_out`` (process pool) and the
+report lists wall time, slices/s and rows/s.
+
+Usage:
+    python -m scripts.benchmark_fan_out data/raw_local.csv --slices 1 2 4 8 16 --n-jobs 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from src.artifacts import read_frame, write_frame
+from src.schema import RAW_SCHEMA
+from src.slicing import fan_out
+
+
+def main():
+    import numpy as np
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("raw_csv_path")
+    parser.add_argument("--slices", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--column", default="RAD")
+    parser.add_argument("--scale", type=int, default=4, help="tile the table N times")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--n-estimators", type=int, default=50)
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    base = read_frame(args.raw_csv_path, schema=RAW_SCHEMA)
+    table = pd.concat([base] * args.scale, ignore_index=True)
+
+    report = []
+    print(
+        f"{'slices':>7}{'rows':>8}{'workers':>9}{'wall s':>9}{'slices/s':>10}{'rows/s':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for k in args.slices:
+            raw = os.path.join(tmp, f"raw_{k}.csv")
+            table[args.column] = (np.arange(len(table)) % k).astype(
+                table[args.column].dtype
+            )
+            write_frame(table, raw)
+            summary = fan_out(
+                raw,
+                args.column,
+                os.path.join(tmp, f"slices_{k}"),
+                n_jobs=args.n_jobs,
+                min_rows=1,
+                n_estimators=args.n_estimators,
+            )
+            row = {
+                "slices": summary["n_slices"],
+                "rows": summary["n_train"] + summary["n_test"],
+                "n_jobs": summary["n_jobs"],
+                "wall_seconds": summary["wall_seconds"],
+                "slices_per_second": summary["slices_per_second"],
+                "rows_per_second": summary["rows_per_second"],
+                "weighted_MSE": summary["weighted"]["MSE"],
+            }
+            report.append(row)
+            print(
+                f"{row['slices']:>7}{row['rows']:>8}{row['n_jobs']:>9}"
+                f"{row['wall_seconds']:>9.2f}{row['slices_per_second']:>10.2f}"
+                f"{row['rows_per_second']:>10.0f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
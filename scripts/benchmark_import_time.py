@@ -0,0 +1,99 @@
+"""
+Startup-latency benchmark for the pipeline entry points.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime``;
+the per-module report on stderr is parsed and the cumulative time of the
+top-level imports is summed. Heavy packages (kfp, mlflow, sklearn, pandas)
+pulled in at import are listed so regressions are easy to spot.
+
+Usage:
+    python -m scripts.benchmark_import_time [--output report.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# name -> code run under -X importtime (imports only; nothing is executed)
+ENTRY_POINTS = {
+    "src.mlflow_pipeline": "import src.mlflow_pipeline",
+    "src.components": "import src.components",
+    "src.pipeline_components": "import src.pipeline_components",
+    "src.flat_forest": "import src.flat_forest",
+    "pipeline": "import pipeline",
+    "run_task3_pipeline": "import run_task3_pipeline",
+}
+HEAVY = ("kfp", "mlflow", "sklearn", "pandas", "scipy")
+
+
+def parse_importtime(stderr):
+    """Return ({top-level module: cumulative us}, set of all imported modules)."""
+    top, modules = {}, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        modules.add(name.strip())
+        # Nested imports are indented under the module that triggered them
+        if not name[1:].startswith(" "):
+            top[name.strip()] = int(cumulative)
+    return top, modules
+
+
+def measure(code, repeats=5):
+    """Median total import time (ms) of ``code`` and the heavy packages it loads.
+
+    Returns ``(None, [])`` when the entry point does not import (e.g. it does
+    not exist in an older tree used as the baseline).
+    """
+    totals = []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode:
+            return None, []
+        top, modules = parse_importtime(proc.stderr)
+        totals.append(sum(top.values()) / 1e3)
+    heavy = sorted(p for p in HEAVY if p in modules)
+    return statistics.median(totals), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="optional path for the JSON report")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = {}
+    print(f"{'entry point':<26}{'import ms':>10}{'vs base':>10}  heavy imports")
+    for name, code in ENTRY_POINTS.items():
+        ms, heavy = measure(code, repeats=args.repeats)
+        if ms is None:
+            print(f"{name:<26}{'n/a':>10}")
+            continue
+        report[name] = {"import_ms": ms, "heavy_imports": heavy}
+        delta = ""
+        if name in baseline:
+            delta = f"x{baseline[name]['import_ms'] / ms:.1f}"
+        print(f"{name:<26}{ms:>10.1f}{delta:>10}  {', '.join(heavy) or '-'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
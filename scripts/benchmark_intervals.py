@@ -0,0 +1,80 @@
+"""
+Per-tree prediction gathering for intervals: Python loop vs. ``src.intervals``.
+
+For each batch size, times the naive ``np.stack([est.predict(X) ...])`` loop
+against ``per_tree_predictions`` into a preallocated buffer (joblib forest
+and exported flat forest, for each thread count), then the interval
+reduction itself.
+
+Usage:
+    python -m scripts.benchmark_intervals models/rf_model.joblib data/test.csv --rows 100 10000 --n-jobs 1 4
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.artifacts import load_model, read_frame
+from src.flat_forest import FlatForest, export_forest
+from src.intervals import per_tree_predictions, predict_intervals
+from src.schema import PROCESSED_SCHEMA, feature_columns
+
+
+def best_ms(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model_path")
+    parser.add_argument("test_csv_path")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    model = load_model(args.model_path)
+    flat = FlatForest(export_forest(model))
+    test = read_frame(args.test_csv_path, schema=PROCESSED_SCHEMA)
+    base = test[feature_columns(test.columns)].to_numpy()
+
+    report = []
+    print(f"{'rows':>7}{'variant':>22}{'ms':>10}")
+    for rows in args.rows:
+        X = base[np.arange(rows) % len(base)]
+        out = np.empty((len(model.estimators_), rows))
+        timings = {
+            "python_loop": best_ms(
+                lambda: np.stack([est.predict(X) for est in model.estimators_]),
+                args.repeats,
+            )
+        }
+        for n_jobs in args.n_jobs:
+            for name, predictor in (("forest", model), ("flat", flat)):
+                timings[f"{name}_jobs{n_jobs}"] = best_ms(
+                    lambda: per_tree_predictions(predictor, X, out=out, n_jobs=n_jobs),
+                    args.repeats,
+                )
+        timings["intervals_total"] = best_ms(
+            lambda: predict_intervals(model, X, out=out, n_jobs=max(args.n_jobs)),
+            args.repeats,
+        )
+        for name, ms in timings.items():
+            print(f"{rows:>7}{name:>22}{ms:>10.2f}")
+        report.append({"rows": rows, "ms": timings})
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Overhead benchmark for ``src.tracing``.
+
+Times an empty ``with span(...)`` block with tracing off (the shared no-op
+span) and on (a real span exported to a temporary file), against a bare
+loop, and reports the cost per span in microseconds.
+
+Usage:
+    python -m scripts.benchmark_tracing [--spans 100000] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import src.tracing as tracing
+
+
+def per_span_us(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("bench", i=1):
+            pass
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def bare_loop_us(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracing overhead per span")
+    parser.add_argument("--spans", type=int, default=100_000)
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    tracing.TRACER = tracing.Tracer(None)
+    report = {"baseline_us": bare_loop_us(args.spans)}
+    report["disabled_us"] = per_span_us(args.spans)
+    with tempfile.TemporaryDirectory() as tmp:
+        tracing.TRACER = tracing.Tracer(os.path.join(tmp, "trace.jsonl"))
+        # Enabled spans write a line each, so fewer of them suffice
+        report["enabled_us"] = per_span_us(max(1, args.spans // 10))
+
+    print(f"{'bare loop':<12}{report['baseline_us']:>9.3f} us/iteration")
+    print(f"{'disabled':<12}{report['disabled_us']:>9.3f} us/span")
+    print(f"{'enabled':<12}{report['enabled_us']:>9.3f} us/span")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Artifact I/O shared by the pipeline components.
+
+Paths starting with ``mem://`` are resolved against a process-wide
+registry instead of the filesystem, so a local run that executes every
+component in one process can hand DataFrames, arrays (or Arrow tables)
+and fitted models between stages without serializing them to disk.
+Any other path is read and written as a regular file; writes go to a
+temporary sibling that is renamed into place once complete, so concurrent
+readers never see a partial file.
+"""
+
+import json
+import os
+import secrets
+import threading
+from contextlib import contextmanager
+
+MEM_SCHEME = "mem://"
+
+
+class ArtifactRegistry:
+    """Thread-safe in-memory store of stage outputs keyed by name."""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def put(self, name, obj):
+        with self._lock:
+            self._items[name] = obj
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._items:
+                raise KeyError(f"No in-memory artifact named '{name}'")
+            return self._items[name]
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._items
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+REGISTRY = ArtifactRegistry()
+
+
+def is_memory_uri(path):
+    return str(path).startswith(MEM_SCHEME)
+
+
+def _name(uri):
+    return str(uri)[len(MEM_SCHEME) :]
+
+
+def _ensure_parent(path):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a temporary path next to ``path``; rename it over ``path`` on success."""
+    _ensure_parent(path)
+    directory, name = os.path.split(path)
+    suffix = os.path.splitext(name)[1]
+    while True:
+        tmp = os.path.join(directory, f".{name}.{secrets.token_hex(4)}{suffix}")
+        try:
+            # Unlike mkstemp (0600), the kernel applies the umask to 0666 here,
+            # so the published file has the usual permissions
+            fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            continue
+        break
+    os.close(fd)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read_frame(path, schema=None):
+    """Load a table as a pandas DataFrame (Arrow tables are converted zero-copy where possible).
+
+    With a ``schema`` (see ``src.schema``) columns are parsed straight into
+    their compact dtypes instead of float64/int64.
+    """
+    import pandas as pd
+
+    if is_memory_uri(path):
+        df = REGISTRY.get(_name(path))
+        if hasattr(df, "to_pandas"):
+            df = df.to_pandas()
+    elif schema is None:
+        return pd.read_csv(path)
+    else:
+        from src.schema import read_dtypes
+
+        header = pd.read_csv(path, nrows=0).columns
+        df = pd.read_csv(path, dtype=read_dtypes(header, schema))
+    if schema is None:
+        return df
+    from src.schema import apply_schema
+
+    return apply_schema(df, schema)
+
+
+def write_frame(df, path):
+    if is_memory_uri(path):
+        REGISTRY.put(_name(path), df)
+        return path
+    with atomic_path(path) as tmp:
+        df.to_csv(tmp, index=False)
+    return path
+
+
+def load_model(path):
+    if is_memory_uri(path):
+        return REGISTRY.get(_name(path))
+    import joblib
+
+    return joblib.load(path)
+
+
+def save_model(model, path):
+    if is_memory_uri(path):
+        REGISTRY.put(_name(path), model)
+        return path
+    import joblib
+
+    with atomic_path(path) as tmp:
+        joblib.dump(model, tmp)
+    return path
+
+
+def save_flat_model(arrays, path):
+    """Store flat forest arrays (see ``src.flat_forest``) as .npz/.json or in memory."""
+    if is_memory_uri(path):
+        REGISTRY.put(_name(path), arrays)
+        return path
+    from src.flat_forest import save
+
+    with atomic_path(path) as tmp:
+        save(arrays, tmp)
+    return path
+
+
+def read_json(path):
+    if is_memory_uri(path):
+        return REGISTRY.get(_name(path))
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(obj, path):
+    if is_memory_uri(path):
+        REGISTRY.put(_name(path), obj)
+        return path
+    with atomic_path(path) as tmp, open(tmp, "w") as f:
+        json.dump(obj, f, indent=2)
+    return path
+
+
+def persist(uri, path, kind):
+    """Write an in-memory artifact to ``path`` (for logging); files pass through."""
+    if not is_memory_uri(uri):
+        return uri
+    writers = {
+        "frame": write_frame,
+        "model": save_model,
+        "json": write_json,
+        "flat": save_flat_model,
+    }
+    return writers[kind](REGISTRY.get(_name(uri)), path)
@@ -0,0 +1,279 @@
+"""
+Offline batch scoring of unlabeled files of any size.
+
+The input CSV is cut into newline-aligned byte ranges; worker processes read
+and parse their own ranges (no row data crosses process boundaries), apply
+the scaling persisted by preprocessing and predict with the flat forest,
+whose node arrays every worker memory-maps from one copy in ``/dev/shm``.
+At most two ranges per worker are in flight, so memory stays bounded however
+large the file; predictions are appended chunk by chunk, in input order, to a
+columnar Parquet file (or CSV). Given the reference sketch from
+preprocessing, every worker also sketches its scaled inputs and predictions
+and the merged sketch is scored for drift (see ``src.drift``).
+
+Usage:
+    python -m src.batch_scoring input.csv models/rf_model.npz models/scaler.json predictions.parquet --n-jobs 4
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.resources import available_cpus
+
+CHUNK_BYTES = 8 << 20
+
+_WORKER = {}
+
+
+def load_forest_arrays(model_path):
+    """Flat forest arrays from an exported ``.npz``/``.json`` or a joblib model."""
+    from src.artifacts import load_model
+
+    if zipfile.is_zipfile(model_path):
+        with np.load(model_path) as npz:
+            return {k: npz[k] for k in npz.files}
+    if model_path.endswith(".json"):
+        with open(model_path) as f:
+            return {k: np.asarray(v) for k, v in json.load(f).items()}
+    from src.flat_forest import export_forest
+
+    return export_forest(load_model(model_path))
+
+
+def chunk_ranges(path, chunk_bytes=CHUNK_BYTES):
+    """Header line and the newline-aligned (start, end) byte ranges of the body."""
+    ranges = []
+    with open(path, "rb") as f:
+        header = f.readline().decode().strip()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header.split(","), ranges
+
+
+def _attach(model_dir, input_path, columns, scaler, reference=None):
+    """Worker initializer: memory-map the forest and open the input once."""
+    from src.flat_forest import FlatForest
+
+    arrays = {
+        name[:-4]: np.load(os.path.join(model_dir, name), mmap_mode="r")
+        for name in os.listdir(model_dir)
+    }
+    _WORKER["model"] = FlatForest(arrays)
+    _WORKER["fd"] = os.open(input_path, os.O_RDONLY)
+    _WORKER["columns"] = columns
+    _WORKER["scaler"] = scaler
+    _WORKER["reference"] = reference
+
+
+def _score_range(task):
+    import pandas as pd
+
+    from src.schema import RAW_SCHEMA, canonical_columns, read_dtypes
+
+    start, end = task
+    columns, scaler = _WORKER["columns"], _WORKER["scaler"]
+    data = os.pread(_WORKER["fd"], end - start, start)
+    df = pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        names=columns,
+        dtype=read_dtypes(columns, RAW_SCHEMA),
+    )
+    df = df.rename(columns=canonical_columns(columns))
+    dtype = np.dtype(scaler["dtype"])
+    # Same arithmetic as preprocessing so scores match the evaluated model
+    X = df[scaler["features"]].to_numpy(dtype=dtype)
+    X -= np.asarray(scaler["mean"], dtype=dtype)
+    X /= np.asarray(scaler["scale"], dtype=dtype)
+    predictions = _WORKER["model"].predict(X)
+    if _WORKER["reference"] is None:
+        return predictions, None
+    # Sketches are small and merge in the parent, so no rows travel back twice
+    sketch = _WORKER["reference"].empty().update(np.column_stack([X, predictions]))
+    return predictions, sketch
+
+
+class _PredictionWriter:
+    """Append ``row``/``prediction`` columns chunk by chunk (Parquet or CSV)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        if not self.parquet:
+            with open(path, "w") as f:
+                f.write("row,prediction\n")
+
+    def write(self, first_row, predictions):
+        rows = np.arange(first_row, first_row + len(predictions), dtype=np.int64)
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.table({"row": rows, "prediction": predictions})
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            with open(self.path, "a") as f:
+                np.savetxt(
+                    f,
+                    np.column_stack([rows, predictions]),
+                    fmt=["%d", "%.17g"],
+                    delimiter=",",
+                )
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(
+    input_path,
+    model_path,
+    scaler_path,
+    output_path,
+    n_jobs=None,
+    chunk_bytes=CHUNK_BYTES,
+    reference_sketch_path=None,
+    max_psi=0.2,
+):
+    """Score every row of ``input_path``; return a throughput report.
+
+    With ``reference_sketch_path`` the report also carries the drift of the
+    scored inputs and predictions against the training reference.
+    """
+    from src.artifacts import read_json
+    from src.drift import DriftMonitor, load_sketch
+    from src.schema import canonical_columns
+
+    start = time.perf_counter()
+    scaler = read_json(scaler_path)
+    columns, ranges = chunk_ranges(input_path, chunk_bytes)
+    rename = canonical_columns(columns)
+    missing = [
+        c for c in scaler["features"] if c not in {rename.get(n, n) for n in columns}
+    ]
+    if missing:
+        raise ValueError(f"{input_path} is missing feature columns: {missing}")
+    n_jobs = min(n_jobs or available_cpus(), max(len(ranges), 1))
+    monitor = None
+    if reference_sketch_path:
+        monitor = DriftMonitor(load_sketch(reference_sketch_path), max_psi)
+
+    shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    rows = 0
+    writer = _PredictionWriter(output_path)
+    try:
+        with tempfile.TemporaryDirectory(dir=shm) as model_dir:
+            for name, array in load_forest_arrays(model_path).items():
+                np.save(os.path.join(model_dir, f"{name}.npy"), array)
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_attach,
+                initargs=(
+                    model_dir,
+                    os.path.abspath(input_path),
+                    columns,
+                    scaler,
+                    monitor and monitor.reference,
+                ),
+            ) as pool:
+                # A bounded window of ranges in flight (pool.map would submit
+                # them all and buffer every result); the oldest is written first,
+                # so output rows stay in input order
+                in_flight = deque()
+                for byte_range in [*ranges, None]:
+                    if byte_range is not None:
+                        in_flight.append(pool.submit(_score_range, byte_range))
+                    # Drain once the window is full, and completely at the end
+                    while in_flight and (
+                        byte_range is None or len(in_flight) >= 2 * n_jobs
+                    ):
+                        predictions, sketch = in_flight.popleft().result()
+                        writer.write(rows, predictions)
+                        rows += len(predictions)
+                        if monitor is not None:
+                            monitor.merge(sketch)
+        if not rows:
+            # An empty input still gets an output file with the schema
+            writer.write(0, np.empty(0))
+    finally:
+        writer.close()
+
+    wall_seconds = time.perf_counter() - start
+    report = {
+        "rows": rows,
+        "chunks": len(ranges),
+        "n_jobs": n_jobs,
+        "wall_seconds": wall_seconds,
+        "rows_per_second": rows / wall_seconds if wall_seconds else 0.0,
+        "output_path": output_path,
+    }
+    if monitor is not None:
+        report["drift"] = monitor.report()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score an unlabeled CSV")
+    parser.add_argument("input_path")
+    parser.add_argument("model_path", help="flat forest (.npz/.json) or joblib model")
+    parser.add_argument("scaler_path", help="scaler JSON written by preprocessing")
+    parser.add_argument("output_path", help=".parquet (columnar) or .csv")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / (1 << 20))
+    parser.add_argument(
+        "--reference-sketch", help="reference drift sketch written by preprocessing"
+    )
+    parser.add_argument("--max-psi", type=float, default=0.2)
+    parser.add_argument("--drift-output", help="optional path for the drift report")
+    args = parser.parse_args()
+
+    report = score_file(
+        args.input_path,
+        args.model_path,
+        args.scaler_path,
+        args.output_path,
+        n_jobs=args.n_jobs,
+        chunk_bytes=int(args.chunk_mb * (1 << 20)),
+        reference_sketch_path=args.reference_sketch,
+        max_psi=args.max_psi,
+    )
+    print(
+        f"✓ {report['rows']} rows in {report['chunks']} chunks on {report['n_jobs']} "
+        f"workers: {report['wall_seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/s)"
+        f" -> {report['output_path']}"
+    )
+    if "drift" in report:
+        drift = report["drift"]
+        worst = max(drift["psi"], key=lambda c: drift["psi"][c])
+        print(
+            f"  drift: max PSI {drift['psi'][worst]:.3f} ({worst}), "
+            f"drifted: {', '.join(drift['drifted']) or 'none'}"
+        )
+        if args.drift_output:
+            with open(args.drift_output, "w") as f:
+                json.dump(drift, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
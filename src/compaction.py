@@ -0,0 +1,261 @@
+"""
+Post-training compaction of tree forests for serving.
+
+Each tree is pruned to ``max_depth`` and splits that would leave fewer than
+``min_samples_leaf`` training rows in a child are collapsed into leaves (or,
+with ``retrain``, the forest is refitted with those limits). The result is
+written in the flat format of ``src.flat_forest`` with:
+
+- thresholds as float32, rounded down so every float32 input takes the same
+  branch as before (inputs are compared as float32, as in sklearn);
+- leaf values as float32 (the only source of prediction drift);
+- identical leaves and identical subtrees stored once across the forest, and
+  splits whose branches end up identical removed;
+- the narrowest integer types for feature and child indices.
+
+The report compares size, predict latency and MSE/R2 with the original model.
+
+Usage:
+    python -m src.compaction models/rf_model.joblib data/test.csv models/rf_model_compact.npz --max-depth 12
+"""
+
+import argparse
+import io
+import json
+import os
+
+import numpy as np
+
+from src.flat_forest import FORMAT_VERSION
+
+
+def floor_float32(values):
+    """Largest float32 <= each value (keeps ``x <= t`` exact for float32 ``x``)."""
+    values = np.asarray(values, dtype=np.float64)
+    out = values.astype(np.float32)
+    over = out.astype(np.float64) > values
+    out[over] = np.nextafter(out[over], np.float32(-np.inf))
+    return out
+
+
+def _index_dtype(n):
+    return np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+
+def compact_forest(model, max_depth=None, min_samples_leaf=1):
+    """Pruned, deduplicated float32 flat arrays for a fitted sklearn forest."""
+    estimators = getattr(model, "estimators_", [model])
+    if not all(hasattr(est, "tree_") for est in estimators):
+        raise ValueError(
+            f"Only tree forests can be compacted, not {type(model).__name__}"
+        )
+    feature, threshold, left, right, value = [], [], [], [], []
+    # (feature, threshold, left, right) or ("leaf", value) -> node index
+    nodes = {}
+
+    def intern(key, f, t, lo, hi, v):
+        index = nodes.get(key)
+        if index is None:
+            index = nodes[key] = len(feature)
+            feature.append(f)
+            threshold.append(t)
+            # Leaves point at themselves, as in the exported format
+            left.append(index if lo is None else lo)
+            right.append(index if hi is None else hi)
+            value.append(v)
+        return index
+
+    roots, depth = [], 0
+    for est in estimators:
+        tree = est.tree_
+        t_left, t_right = tree.children_left, tree.children_right
+        t_feature = tree.feature
+        t_threshold = floor_float32(tree.threshold)
+        t_value = tree.value[:, 0, 0].astype(np.float32)
+        samples = tree.n_node_samples
+        built = {}
+        # Iterative post-order walk: children are interned before their parent
+        stack = [(0, 0, False)]
+        while stack:
+            node, d, expanded = stack.pop()
+            lo, hi = t_left[node], t_right[node]
+            is_leaf = (
+                lo == -1
+                or (max_depth is not None and d >= max_depth)
+                or min(samples[lo], samples[hi]) < min_samples_leaf
+            )
+            if is_leaf:
+                v = t_value[node]
+                built[node] = (intern(("leaf", v), 0, np.float32(0), None, None, v), d)
+            elif not expanded:
+                stack.append((node, d, True))
+                stack.append((hi, d + 1, False))
+                stack.append((lo, d + 1, False))
+            else:
+                (li, ld), (ri, rd) = built.pop(lo), built.pop(hi)
+                if li == ri:
+                    # Both branches reach the same leaf/subtree: the split is moot
+                    built[node] = (li, max(ld, rd))
+                    continue
+                f, t = t_feature[node], t_threshold[node]
+                built[node] = (
+                    intern((f, t, li, ri), f, t, li, ri, t_value[node]),
+                    max(ld, rd),
+                )
+        root, tree_depth = built[0]
+        roots.append(root)
+        depth = max(depth, tree_depth)
+
+    n_nodes = len(feature)
+    index = _index_dtype(n_nodes)
+    return {
+        "format_version": np.int64(FORMAT_VERSION),
+        "n_features": np.int64(model.n_features_in_),
+        "max_depth": np.int64(depth),
+        "roots": np.asarray(roots, dtype=np.int64),
+        "feature": np.asarray(feature, dtype=np.min_scalar_type(model.n_features_in_)),
+        "threshold": np.asarray(threshold, dtype=np.float32),
+        "left": np.asarray(left, dtype=index),
+        "right": np.asarray(right, dtype=index),
+        "value": np.asarray(value, dtype=np.float32),
+    }
+
+
+def retrain(model, X_train, y_train, max_depth=None, min_samples_leaf=1):
+    """Refit a copy of ``model`` with the depth/leaf-size limits."""
+    from sklearn.base import clone
+
+    capped = clone(model).set_params(
+        max_depth=max_depth, min_samples_leaf=min_samples_leaf
+    )
+    return capped.fit(X_train, y_train)
+
+
+def serialized_bytes(arrays):
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.tell()
+
+
+def _scores(y, y_pred):
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    return {"MSE": mean_squared_error(y, y_pred), "R2": r2_score(y, y_pred)}
+
+
+def compare(model, compact, X_test, y_test):
+    """Size, latency and MSE/R2 of the original model vs. the compact arrays."""
+    from src.flat_forest import FlatForest, export_forest
+    from src.pruning import predict_latency
+
+    original = export_forest(model)
+    flat = FlatForest(compact)
+    rows = {}
+    for name, arrays, predictor in (
+        ("original", original, model),
+        ("compact", compact, flat),
+    ):
+        batch_s, row_s = predict_latency(predictor, X_test)
+        rows[name] = {
+            "nodes": int(len(arrays["value"])),
+            "max_depth": int(arrays["max_depth"]),
+            "flat_bytes": serialized_bytes(arrays),
+            "predict_batch_seconds": batch_s,
+            "predict_row_seconds": row_s,
+            **_scores(y_test, predictor.predict(X_test)),
+        }
+    rows["size_ratio"] = rows["compact"]["flat_bytes"] / rows["original"]["flat_bytes"]
+    rows["MSE_delta"] = rows["compact"]["MSE"] - rows["original"]["MSE"]
+    rows["R2_delta"] = rows["compact"]["R2"] - rows["original"]["R2"]
+    return rows
+
+
+def compact_model(
+    model_path,
+    test_csv_path,
+    output_path,
+    max_depth=None,
+    min_samples_leaf=1,
+    train_csv_path=None,
+):
+    """Compact the model at ``model_path``; return the comparison report.
+
+    With ``train_csv_path`` the forest is refitted with the limits instead of
+    pruned (the report then compares against the unrefitted model).
+    """
+    from src.artifacts import load_model, read_frame, save_flat_model
+    from src.schema import PROCESSED_SCHEMA, TARGET, feature_columns
+
+    def load_xy(path):
+        df = read_frame(path, schema=PROCESSED_SCHEMA)
+        return df[feature_columns(df.columns)].to_numpy(), df[TARGET].to_numpy()
+
+    model = load_model(model_path)
+    if train_csv_path:
+        X_train, y_train = load_xy(train_csv_path)
+        arrays = compact_forest(
+            retrain(model, X_train, y_train, max_depth, min_samples_leaf)
+        )
+    else:
+        arrays = compact_forest(model, max_depth, min_samples_leaf)
+    save_flat_model(arrays, output_path)
+
+    report = compare(model, arrays, *load_xy(test_csv_path))
+    report["settings"] = {
+        "max_depth": max_depth,
+        "min_samples_leaf": min_samples_leaf,
+        "mode": "retrain" if train_csv_path else "prune",
+    }
+    if not model_path.startswith("mem://"):
+        report["original"]["joblib_bytes"] = os.path.getsize(model_path)
+    return report
+
+
+def log_to_mlflow(report):
+    import mlflow
+
+    for variant in ("original", "compact"):
+        for key in ("nodes", "flat_bytes", "predict_batch_seconds", "MSE", "R2"):
+            mlflow.log_metric(f"compaction_{variant}_{key}", report[variant][key])
+    for key in ("size_ratio", "MSE_delta", "R2_delta"):
+        mlflow.log_metric(f"compaction_{key}", report[key])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a trained forest")
+    parser.add_argument("model_path")
+    parser.add_argument("test_csv_path")
+    parser.add_argument("output_path", help="compact flat model (.npz/.json)")
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--min-samples-leaf", type=int, default=1)
+    parser.add_argument(
+        "--retrain",
+        metavar="TRAIN_CSV",
+        help="refit with the limits instead of pruning",
+    )
+    parser.add_argument("--report", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    report = compact_model(
+        args.model_path,
+        args.test_csv_path,
+        args.output_path,
+        max_depth=args.max_depth,
+        min_samples_leaf=args.min_samples_leaf,
+        train_csv_path=args.retrain,
+    )
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    original, compact = report["original"], report["compact"]
+    print(
+        f"✓ {original['nodes']} -> {compact['nodes']} nodes, "
+        f"{original['flat_bytes'] / 1024:.0f} -> {compact['flat_bytes'] / 1024:.0f} KB "
+        f"({report['size_ratio']:.1%}), MSE {original['MSE']:.4f} -> {compact['MSE']:.4f}, "
+        f"batch predict {original['predict_batch_seconds'] * 1e3:.1f} -> "
+        f"{compact['predict_batch_seconds'] * 1e3:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
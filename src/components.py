@@ -0,0 +1,546 @@
+"""
+Pipeline step implementations.
+
+Plain functions with all heavy imports (pandas, sklearn, joblib) inside their
+bodies, so they can be imported and run in-process without the KFP SDK.
+``src.pipeline_components`` wraps each of them as a KFP lightweight component
+with typed artifact inputs/outputs; keep every function self-contained.
+"""
+
+from typing import List
+
+
+def data_extraction_component(
+    dvc_repo_url: str,
+    dvc_data_path: str,
+    output_csv_path: str,
+    dvc_cache_dir: str = "",
+    dvc_remote_url: str = "",
+    fetch_workers: int = 8,
+) -> str:
+    """Resolve the DVC pointer for the dataset and materialize it from the blob cache.
+
+    A cache hit is hard-linked (or reflinked) into place; a miss is fetched from
+    the DVC remote with parallel ranged reads and verified against the md5.
+    A ``mem://`` output path loads the cached blob straight into the in-process
+    artifact registry instead.
+    """
+    from src.artifacts import is_memory_uri, read_frame, write_frame
+    from src.dvc_cache import checkout, resolve
+
+    if is_memory_uri(output_csv_path):
+        blob = resolve(
+            repo=dvc_repo_url,
+            data_path=dvc_data_path,
+            cache_dir=dvc_cache_dir,
+            remote_url=dvc_remote_url,
+            workers=fetch_workers,
+        )
+        return write_frame(read_frame(blob), output_csv_path)
+
+    output_csv_path, mode = checkout(
+        repo=dvc_repo_url,
+        data_path=dvc_data_path,
+        output_path=output_csv_path,
+        cache_dir=dvc_cache_dir,
+        remote_url=dvc_remote_url,
+        workers=fetch_workers,
+    )
+    print(f"✓ {dvc_data_path} -> {output_csv_path} ({mode})")
+
+    return output_csv_path
+
+
+def data_validation_component(
+    raw_csv_path: str,
+    report_output_path: str,
+    reference_stats_path: str = "",
+    max_psi: float = 0.2,
+    chunk_rows: int = 100000,
+) -> str:
+    """Check schema, nulls, ranges and drift of the extracted data; fail fast on errors.
+
+    Returns ``raw_csv_path`` unchanged so downstream steps only run on data
+    that passed validation.
+    """
+    from src.artifacts import write_json
+    from src.validation import (
+        DEFAULT_REFERENCE_PATH,
+        DataValidationError,
+        load_reference,
+        validate,
+    )
+
+    reference = load_reference(reference_stats_path or DEFAULT_REFERENCE_PATH)
+    try:
+        report = validate(
+            raw_csv_path, reference, max_psi=max_psi, chunk_rows=chunk_rows
+        )
+    except DataValidationError as e:
+        write_json(e.report, report_output_path)
+        raise
+    write_json(report, report_output_path)
+    print(f"✓ {report['rows']} rows validated in {report['elapsed_ms']:.1f} ms")
+
+    return raw_csv_path
+
+
+def data_preprocessing_component(
+    raw_csv_path: str,
+    train_csv_path: str,
+    test_csv_path: str,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    compact_dtypes: bool = True,
+    feature_columns: str = "",
+    scaler_output_path: str = "",
+    sketch_output_path: str = "",
+) -> str:
+    """Clean data, scale features, and create train/test splits.
+
+    Columns are read with the compact dtypes from ``src.schema`` and each split
+    is scaled straight into a preallocated float32 buffer (set
+    ``compact_dtypes=False`` for the float64 baseline). ``feature_columns``
+    (comma-separated) restricts the splits to a pruned feature set.
+    ``scaler_output_path`` stores the fitted scaling (features, mean, scale)
+    so unlabeled data can be scored the same way later, and
+    ``sketch_output_path`` the reference drift sketch of the scaled training
+    features and target (see ``src.drift``).
+    """
+    import pandas as pd
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.model_selection import train_test_split
+    from src.artifacts import read_frame, write_frame, write_json
+    from src.schema import FEATURES, RAW_SCHEMA, TARGET
+
+    schema = RAW_SCHEMA if compact_dtypes else {c: "float64" for c in RAW_SCHEMA}
+    df = read_frame(raw_csv_path, schema=schema)
+    dtype = np.float32 if compact_dtypes else np.float64
+    features = (
+        [c.strip() for c in feature_columns.split(",") if c.strip()]
+        if feature_columns
+        else FEATURES
+    )
+
+    X = df[features].to_numpy(dtype=dtype)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+
+    scaler = StandardScaler()
+    scaler.fit(X)
+    mean = scaler.mean_.astype(dtype)
+    scale = scaler.scale_.astype(dtype)
+
+    train_idx, test_idx = train_test_split(
+        np.arange(len(df)), test_size=test_size, random_state=random_state
+    )
+
+    def _split_frame(idx):
+        out = np.empty((len(idx), len(features)), dtype=dtype)
+        np.take(X, idx, axis=0, out=out)
+        out -= mean
+        out /= scale
+        split = pd.DataFrame(out, columns=features, copy=False)
+        split[TARGET] = y[idx]
+        return split
+
+    train = _split_frame(train_idx)
+    write_frame(train, train_csv_path)
+    write_frame(_split_frame(test_idx), test_csv_path)
+    if sketch_output_path:
+        from src.drift import PREDICTION, Sketch, save_sketch
+
+        # Predictions are monitored against the training target distribution
+        save_sketch(
+            Sketch.fit(features + [PREDICTION], train.to_numpy()), sketch_output_path
+        )
+    if scaler_output_path:
+        write_json(
+            {
+                "features": features,
+                "mean": mean.tolist(),
+                "scale": scale.tolist(),
+                "dtype": np.dtype(dtype).name,
+            },
+            scaler_output_path,
+        )
+
+    return train_csv_path
+
+
+def model_cross_validation_component(
+    raw_csv_path: str,
+    cv_output_path: str,
+    n_splits: int = 5,
+    n_repeats: int = 1,
+    estimator: str = "random_forest",
+    n_estimators: int = 100,
+    random_state: int = 42,
+    n_jobs: int = 0,
+) -> str:
+    """Repeated K-fold evaluation with folds trained in parallel worker processes.
+
+    Every fold fits ``estimator``, the backend of ``model_training_component``.
+    Writes per-fold and aggregate MSE/R2 (mean, std, confidence interval).
+    ``n_jobs=0`` uses the cores the step is allotted (its CPU quota).
+    """
+    import numpy as np
+    from src.artifacts import read_frame, write_json
+    from src.cross_validation import cross_validate
+    from src.schema import FEATURES, RAW_SCHEMA, TARGET
+
+    df = read_frame(raw_csv_path, schema=RAW_SCHEMA)
+    results = cross_validate(
+        df[FEATURES].to_numpy(dtype=np.float32),
+        df[TARGET].to_numpy(dtype=np.float64),
+        n_splits=n_splits,
+        n_repeats=n_repeats,
+        estimator=estimator,
+        n_estimators=n_estimators,
+        random_state=random_state,
+        n_jobs=n_jobs or None,
+    )
+    write_json(results, cv_output_path)
+
+    return cv_output_path
+
+
+def learning_curve_component(
+    train_csv_path: str,
+    report_output_path: str,
+    fractions: str = "0.1,0.2,0.3,0.5,0.7,1.0",
+    n_repeats: int = 3,
+    tolerance: float = 0.02,
+    validation_size: float = 0.2,
+    estimator: str = "random_forest",
+    n_estimators: int = 100,
+    random_state: int = 42,
+    n_jobs: int = 0,
+) -> int:
+    """Train on increasing subsamples of the training split in parallel.
+
+    Every size in ``fractions`` (of the training rows) is fitted
+    ``n_repeats`` times and scored on ``validation_size`` of the training
+    split held out for it; the test split is left to evaluation. Returns the
+    smallest sample size (rows) whose mean MSE is within ``tolerance`` of
+    the best, which ``model_training_component`` accepts as ``max_rows``.
+    ``n_jobs=0`` uses the cores the step is allotted (its CPU quota).
+    """
+    from src.artifacts import read_frame, write_json
+    from src.learning_curve import learning_curve
+    from src.schema import PROCESSED_SCHEMA, TARGET, feature_columns
+
+    train = read_frame(train_csv_path, schema=PROCESSED_SCHEMA)
+    features = feature_columns(train.columns)
+    report = learning_curve(
+        train[features].to_numpy(),
+        train[TARGET].to_numpy(),
+        fractions=[float(f) for f in fractions.split(",")],
+        n_repeats=n_repeats,
+        tolerance=tolerance,
+        validation_size=validation_size,
+        estimator=estimator,
+        n_estimators=n_estimators,
+        random_state=random_state,
+        n_jobs=n_jobs or None,
+    )
+    write_json(report, report_output_path)
+    print(
+        f"✓ {report['chosen_rows']} of {report['train_rows']} training rows are within "
+        f"{tolerance:.0%} of the best MSE"
+    )
+
+    return report["chosen_rows"]
+
+
+def model_training_component(
+    train_csv_path: str,
+    model_output_path: str,
+    n_estimators: int = 100,
+    random_state: int = 42,
+    oob_score: bool = False,
+    n_jobs: int = 1,
+    estimator: str = "random_forest",
+    max_rows: int = 0,
+) -> str:
+    """Train a regressor on the training data.
+
+    ``estimator`` picks the backend from ``src.estimators.ESTIMATORS``
+    (``random_forest``, ``extra_trees``, ``hist_gradient_boosting`` or
+    ``linear``); every backend is saved with joblib and evaluated the same way.
+    ``oob_score=True`` also records the out-of-bag R2 (used by the importance
+    step) on the forest backends. ``n_jobs`` trees are fitted in parallel; the
+    compiled pipeline sets it to the CPU granted to the step (``0`` uses the
+    cores the step is allotted). ``max_rows > 0`` trains on that many rows, sampled as in
+    the learning-curve step (see ``learning_curve_component``).
+    """
+    from src.artifacts import read_frame, save_model
+    from src.estimators import build_estimator
+    from src.learning_curve import subsample_indices
+    from src.schema import PROCESSED_SCHEMA, TARGET, feature_columns
+
+    df = read_frame(train_csv_path, schema=PROCESSED_SCHEMA)
+    idx = subsample_indices(len(df), max_rows, random_state)
+    X_train = df[feature_columns(df.columns)].to_numpy()[idx]
+    y_train = df[TARGET].to_numpy()[idx]
+
+    model = build_estimator(
+        estimator,
+        n_estimators=n_estimators,
+        random_state=random_state,
+        oob_score=oob_score,
+        n_jobs=n_jobs or None,
+    )
+    model.fit(X_train, y_train)
+
+    save_model(model, model_output_path)
+
+    return model_output_path
+
+
+def model_export_component(
+    model_path: str,
+    test_csv_path: str,
+    flat_model_output_path: str,
+) -> str:
+    """Export the forest to flat node arrays (.npz/.json) for NumPy-only inference.
+
+    The export is checked against ``model.predict`` on the test set and the
+    step fails if the predictions differ. Only the forest backends
+    (``src.estimators.FLAT_EXPORTABLE``) can be exported.
+    """
+    from src.artifacts import load_model, read_frame, save_flat_model
+    from src.flat_forest import FlatForest, check_parity, export_forest
+    from src.schema import PROCESSED_SCHEMA, feature_columns
+
+    model = load_model(model_path)
+    arrays = export_forest(model)
+
+    df = read_frame(test_csv_path, schema=PROCESSED_SCHEMA)
+    X_test = df[feature_columns(df.columns)].to_numpy()
+    diff = check_parity(model, FlatForest(arrays), X_test)
+    save_flat_model(arrays, flat_model_output_path)
+    print(f"✓ Exported {len(arrays['roots'])} trees (max |Δ| = {diff:.2e})")
+
+    return flat_model_output_path
+
+
+def model_compaction_component(
+    model_path: str,
+    test_csv_path: str,
+    compact_model_output_path: str,
+    report_output_path: str,
+    max_depth: int = 0,
+    min_samples_leaf: int = 1,
+    train_csv_path: str = "",
+) -> str:
+    """Shrink the trained forest into a compact flat model for serving.
+
+    Trees are pruned to ``max_depth`` (``0`` keeps every level) and
+    ``min_samples_leaf``, or refitted with those limits when
+    ``train_csv_path`` is given; thresholds and values are stored as float32
+    and identical leaves/subtrees once. The report holds size, predict
+    latency and MSE/R2 of the original and compact models.
+    """
+    from src.artifacts import write_json
+    from src.compaction import compact_model
+
+    report = compact_model(
+        model_path,
+        test_csv_path,
+        compact_model_output_path,
+        max_depth=max_depth or None,
+        min_samples_leaf=min_samples_leaf,
+        train_csv_path=train_csv_path or None,
+    )
+    write_json(report, report_output_path)
+    print(
+        f"✓ Compacted {report['original']['nodes']} -> {report['compact']['nodes']} nodes "
+        f"({report['size_ratio']:.1%} of the flat size, ΔMSE = {report['MSE_delta']:+.4f})"
+    )
+
+    return compact_model_output_path
+
+
+def model_evaluation_component(
+    model_path: str,
+    test_csv_path: str,
+    metrics_output_path: str,
+    interval_coverage: float = 0.9,
+    n_jobs: int = 0,
+) -> str:
+    """Evaluate the trained model on the test set and save metrics.
+
+    For tree forests the metrics also report how many test targets fall in
+    the central ``interval_coverage`` interval of the per-tree predictions
+    (see ``src.intervals``); ``0`` skips the intervals. They are computed on
+    ``n_jobs`` threads (``0``: the cores the step is allotted).
+    """
+    from sklearn.metrics import mean_squared_error, r2_score
+    from src.artifacts import load_model, read_frame, write_json
+    from src.intervals import interval_metrics, predict_intervals, supports_intervals
+    from src.schema import PROCESSED_SCHEMA, TARGET, feature_columns
+
+    df = read_frame(test_csv_path, schema=PROCESSED_SCHEMA)
+    X_test = df[feature_columns(df.columns)].to_numpy()
+    y_test = df[TARGET].to_numpy()
+
+    model = load_model(model_path)
+    y_pred = model.predict(X_test)
+
+    mse = mean_squared_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    metrics = {"MSE": mse, "R2": r2}
+    if interval_coverage and supports_intervals(model):
+        intervals = predict_intervals(
+            model, X_test, interval_coverage, n_jobs=n_jobs or None
+        )
+        metrics.update(interval_metrics(y_test, intervals, interval_coverage))
+
+    write_json(metrics, metrics_output_path)
+
+    return metrics_output_path
+
+
+def model_importance_component(
+    model_path: str,
+    test_csv_path: str,
+    importance_output_path: str,
+    n_repeats: int = 10,
+    random_state: int = 42,
+    n_jobs: int = 0,
+) -> str:
+    """Compute impurity, out-of-bag and permutation feature importance.
+
+    Permutations run in parallel across features and repeats; ``n_jobs=0``
+    uses the cores the step is allotted (its CPU quota).
+    """
+    from src.artifacts import load_model, read_frame, write_json
+    from src.importance import compute_importance
+    from src.schema import PROCESSED_SCHEMA, TARGET, feature_columns
+
+    df = read_frame(test_csv_path, schema=PROCESSED_SCHEMA)
+    features = feature_columns(df.columns)
+    report = compute_importance(
+        load_model(model_path),
+        df[features].to_numpy(),
+        df[TARGET].to_numpy(),
+        features,
+        n_repeats=n_repeats,
+        random_state=random_state,
+        n_jobs=n_jobs or None,
+    )
+    write_json(report, importance_output_path)
+
+    return importance_output_path
+
+
+def data_slicing_component(
+    raw_csv_path: str,
+    slice_column: str,
+    output_dir: str,
+    min_rows: int = 20,
+) -> List[str]:
+    """Split the raw table into one CSV per value of ``slice_column``.
+
+    Values with fewer than ``min_rows`` rows are pooled into an ``other``
+    slice. Returns the slice paths (the pipeline fans out over them).
+    """
+    from src.slicing import split_by_key
+
+    paths = split_by_key(raw_csv_path, slice_column, output_dir, min_rows=min_rows)
+    print(f"✓ {len(paths)} slices by {slice_column} in {output_dir}")
+
+    return paths
+
+
+def slice_training_component(
+    slice_csv_path: str,
+    metrics_output_path: str = "",
+    workdir: str = "",
+    test_size: float = 0.2,
+    n_estimators: int = 100,
+    random_state: int = 42,
+    n_jobs: int = 1,
+) -> str:
+    """Preprocess, train and evaluate a model on one slice; returns its metrics path.
+
+    The metrics carry the slice name and its train/test row counts so the
+    aggregation step can weight them. Intermediate splits and the model go to
+    ``workdir`` (default: next to the slice CSV).
+    """
+    from src.slicing import run_slice
+
+    return run_slice(
+        slice_csv_path,
+        metrics_output_path=metrics_output_path or None,
+        workdir=workdir or None,
+        test_size=test_size,
+        n_estimators=n_estimators,
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
+
+
+def metrics_aggregation_component(
+    metrics_paths: List[str],
+    summary_output_path: str,
+) -> str:
+    """Merge per-slice metrics into one summary weighted by test rows."""
+    from src.artifacts import write_json
+    from src.slicing import aggregate
+
+    summary = aggregate(metrics_paths)
+    write_json(summary, summary_output_path)
+    print(
+        f"✓ {summary['n_slices']} slices: weighted MSE={summary['weighted']['MSE']:.4f}"
+        f" R2={summary['weighted']['R2']:.4f}"
+    )
+
+    return summary_output_path
+
+
+def batch_scoring_component(
+    input_csv_path: str,
+    model_path: str,
+    scaler_path: str,
+    predictions_output_path: str,
+    n_jobs: int = 0,
+    chunk_bytes: int = 8388608,
+    reference_sketch_path: str = "",
+    drift_output_path: str = "",
+) -> str:
+    """Score an unlabeled CSV of any size with the persisted scaling and model.
+
+    The file is streamed in ``chunk_bytes`` ranges that worker processes
+    parse and predict in parallel against one memory-mapped copy of the
+    flat forest; predictions are written in input order (Parquet for a
+    ``.parquet`` path, else CSV). ``n_jobs=0`` uses the cores the step is
+    allotted (its CPU quota). With ``reference_sketch_path`` (from preprocessing) the inputs and
+    predictions are also monitored for drift; the PSI report goes to
+    ``drift_output_path``.
+    """
+    from src.artifacts import write_json
+    from src.batch_scoring import score_file
+
+    report = score_file(
+        input_csv_path,
+        model_path,
+        scaler_path,
+        predictions_output_path,
+        n_jobs=n_jobs or None,
+        chunk_bytes=chunk_bytes,
+        reference_sketch_path=reference_sketch_path or None,
+    )
+    print(
+        f"✓ Scored {report['rows']} rows on {report['n_jobs']} workers "
+        f"({report['rows_per_second']:,.0f} rows/s)"
+    )
+    if "drift" in report:
+        drifted = report["drift"]["drifted"]
+        print(f"  Drifted columns: {', '.join(drifted) or 'none'}")
+        if drift_output_path:
+            write_json(report["drift"], drift_output_path)
+
+    return predictions_output_path
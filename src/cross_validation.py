@@ -0,0 +1,181 @@
+"""
+Parallel (repeated) K-fold cross-validation over one shared memory-mapped dataset.
+
+The feature matrix and target are written once to ``.npy`` files; each worker
+process memory-maps them in its initializer, so folds only ship index arrays
+between processes instead of K pickled copies of the data. Every fold fits
+the training step's estimator backend (``src.estimators``).
+
+Usage:
+    python -m src.cross_validation data/raw_local.csv --folds 5 --repeats 3 --n-jobs 4
+    python -m src.cross_validation data/raw_local.csv --estimator extra_trees
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.resources import available_cpus
+
+_SHARED = {}
+
+
+def _attach(x_path, y_path):
+    """Worker initializer: memory-map the shared arrays once per process."""
+    _SHARED["X"] = np.load(x_path, mmap_mode="r")
+    _SHARED["y"] = np.load(y_path, mmap_mode="r")
+
+
+def _fit_fold(task):
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    from src.estimators import build_estimator
+
+    fold, train_idx, test_idx, estimator, n_estimators, random_state = task
+    X, y = _SHARED["X"], _SHARED["y"]
+    start = time.perf_counter()
+    model = build_estimator(
+        estimator, n_estimators=n_estimators, random_state=random_state, n_jobs=1
+    )
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    y_pred = model.predict(X[test_idx])
+    return {
+        "fold": fold,
+        "MSE": float(mean_squared_error(y[test_idx], y_pred)),
+        "R2": float(r2_score(y[test_idx], y_pred)),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def confidence_interval(values, confidence=0.95):
+    """Student-t interval for the mean of per-fold scores."""
+    from scipy import stats
+
+    values = np.asarray(values, dtype=np.float64)
+    mean = values.mean()
+    if len(values) < 2:
+        return mean, mean, mean
+    half = stats.t.ppf((1 + confidence) / 2, len(values) - 1) * stats.sem(values)
+    return mean, mean - half, mean + half
+
+
+def cross_validate(
+    X,
+    y,
+    n_splits=5,
+    n_repeats=1,
+    estimator="random_forest",
+    n_estimators=100,
+    random_state=42,
+    n_jobs=None,
+    confidence=0.95,
+):
+    """Train and score every (repeat, fold) in parallel; return per-fold and aggregate results."""
+    from sklearn.model_selection import RepeatedKFold
+
+    splitter = RepeatedKFold(
+        n_splits=n_splits, n_repeats=n_repeats, random_state=random_state
+    )
+    tasks = [
+        (fold, train_idx, test_idx, estimator, n_estimators, random_state)
+        for fold, (train_idx, test_idx) in enumerate(splitter.split(X))
+    ]
+    n_jobs = min(n_jobs or available_cpus(), len(tasks))
+
+    shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=shm) as tmp:
+        x_path, y_path = os.path.join(tmp, "X.npy"), os.path.join(tmp, "y.npy")
+        np.save(x_path, np.ascontiguousarray(X))
+        np.save(y_path, np.ascontiguousarray(y))
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_attach, initargs=(x_path, y_path)
+        ) as pool:
+            folds = list(pool.map(_fit_fold, tasks))
+    wall_seconds = time.perf_counter() - start
+
+    summary = {}
+    for metric in ("MSE", "R2"):
+        mean, low, high = confidence_interval([f[metric] for f in folds], confidence)
+        summary[metric] = {
+            "mean": float(mean),
+            "std": (
+                float(np.std([f[metric] for f in folds], ddof=1))
+                if len(folds) > 1
+                else 0.0
+            ),
+            "ci_low": float(low),
+            "ci_high": float(high),
+        }
+
+    return {
+        "n_splits": n_splits,
+        "n_repeats": n_repeats,
+        "estimator": estimator,
+        "n_jobs": n_jobs,
+        "confidence": confidence,
+        "wall_seconds": wall_seconds,
+        "folds": folds,
+        "summary": summary,
+    }
+
+
+def log_to_mlflow(results):
+    """Log per-fold scores (as steps) and aggregate mean/CI metrics to the active run."""
+    import mlflow
+
+    for fold in results["folds"]:
+        mlflow.log_metric("cv_MSE", fold["MSE"], step=fold["fold"])
+        mlflow.log_metric("cv_R2", fold["R2"], step=fold["fold"])
+    for metric, stats in results["summary"].items():
+        for key, value in stats.items():
+            mlflow.log_metric(f"cv_{metric}_{key}", value)
+    mlflow.log_metric("cv_wall_seconds", results["wall_seconds"])
+
+
+def main():
+    from src.artifacts import read_frame
+    from src.schema import FEATURES, RAW_SCHEMA, TARGET
+
+    parser = argparse.ArgumentParser(description="Parallel K-fold cross-validation")
+    parser.add_argument("raw_csv_path")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--estimator", default="random_forest")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--output", help="optional path for the JSON results")
+    args = parser.parse_args()
+
+    df = read_frame(args.raw_csv_path, schema=RAW_SCHEMA)
+    results = cross_validate(
+        df[FEATURES].to_numpy(dtype=np.float32),
+        df[TARGET].to_numpy(dtype=np.float64),
+        n_splits=args.folds,
+        n_repeats=args.repeats,
+        estimator=args.estimator,
+        n_estimators=args.n_estimators,
+        n_jobs=args.n_jobs,
+    )
+    for metric, s in results["summary"].items():
+        print(
+            f"{metric}: {s['mean']:.4f} ± {s['std']:.4f} "
+            f"({results['confidence']:.0%} CI {s['ci_low']:.4f} – {s['ci_high']:.4f})"
+        )
+    print(
+        f"{len(results['folds'])} folds on {results['n_jobs']} workers "
+        f"in {results['wall_seconds']:.2f}s"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
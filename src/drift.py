@@ -0,0 +1,208 @@
+"""
+Streaming drift monitoring of scoring inputs and predictions.
+
+A ``Sketch`` keeps one fixed-bin histogram per column, so its memory is
+``columns x bins`` counts however many rows stream through it. Sketches with
+the same bin edges merge by adding counts, so every worker process can
+sketch its own batches and the parent merges them.
+
+Preprocessing writes the reference sketch: quantile bins of the scaled
+training features plus a ``prediction`` column holding the training target
+(the distribution predictions should follow). A ``DriftMonitor`` sketches
+scored batches (scaled features and predictions) against it and reports a
+population stability index (PSI) per column, as in ``src.validation``.
+
+Usage:
+    python -m src.drift merge merged.json worker-0.json worker-1.json
+    python -m src.drift check models/reference_sketch.json merged.json --max-psi 0.2
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from src.validation import N_BINS, psi
+
+PREDICTION = "prediction"
+
+
+def quantile_edges(values, n_bins=N_BINS):
+    """``n_bins - 1`` inner quantile edges, padded so every column has the same count."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.zeros(n_bins - 1)
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    return np.pad(edges, (0, n_bins - 1 - len(edges)), mode="edge")
+
+
+class Sketch:
+    """Mergeable fixed-bin histograms of the columns of a stream of (n, d) batches."""
+
+    def __init__(self, columns, edges):
+        self.columns = list(columns)
+        self.edges = np.ascontiguousarray(edges, dtype=np.float64)
+        d, n_bins = self.edges.shape[0], self.edges.shape[1] + 1
+        if d != len(self.columns):
+            raise ValueError(f"{d} edge rows for {len(self.columns)} columns")
+        self.counts = np.zeros((d, n_bins), dtype=np.int64)
+        self.nulls = np.zeros(d, dtype=np.int64)
+        self.rows = 0
+        self._offsets = np.arange(d) * n_bins
+        self._edges_by_bin = np.ascontiguousarray(self.edges.T)
+
+    @classmethod
+    def fit(cls, columns, X, n_bins=N_BINS):
+        """Sketch of ``X`` with quantile bins computed from ``X`` itself."""
+        X = np.asarray(X, dtype=np.float64)
+        edges = [quantile_edges(X[:, i], n_bins) for i in range(X.shape[1])]
+        return cls(columns, edges).update(X)
+
+    def empty(self):
+        """A sketch with the same bins and no rows (e.g. for a worker)."""
+        return Sketch(self.columns, self.edges)
+
+    def update(self, X):
+        """Add the rows of ``X`` (columns in sketch order); NaNs count as nulls."""
+        X = np.asarray(X, dtype=np.float64)
+        self.rows += len(X)
+        # Bin index per cell (one comparison pass per inner edge, which beats
+        # broadcasting over a short trailing axis), then one bincount over
+        # (column, bin) pairs
+        flat = np.empty(X.shape, dtype=np.intp)
+        flat[:] = self._offsets
+        above = np.empty(X.shape, dtype=bool)
+        for edge in self._edges_by_bin:
+            np.greater(X, edge, out=above)
+            flat += above
+        nan = np.isnan(X)
+        if nan.any():
+            self.nulls += nan.sum(axis=0)
+            flat = flat[~nan]
+        self.counts += np.bincount(flat.ravel(), minlength=self.counts.size).reshape(
+            self.counts.shape
+        )
+        return self
+
+    def merge(self, other):
+        """Add the counts of ``other`` (same columns and bins) in place."""
+        if self.columns != other.columns or not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only sketches with the same columns and bins can merge")
+        self.counts += other.counts
+        self.nulls += other.nulls
+        self.rows += other.rows
+        return self
+
+    def fractions(self):
+        return self.counts / np.maximum(self.counts.sum(axis=1, keepdims=True), 1)
+
+    def to_dict(self):
+        return {
+            "columns": self.columns,
+            "edges": self.edges.tolist(),
+            "counts": self.counts.tolist(),
+            "nulls": self.nulls.tolist(),
+            "rows": self.rows,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["columns"], data["edges"])
+        sketch.counts[:] = data["counts"]
+        sketch.nulls[:] = data["nulls"]
+        sketch.rows = int(data["rows"])
+        return sketch
+
+
+def save_sketch(sketch, path):
+    from src.artifacts import write_json
+
+    return write_json(sketch.to_dict(), path)
+
+
+def load_sketch(path):
+    from src.artifacts import read_json
+
+    return Sketch.from_dict(read_json(path))
+
+
+class DriftMonitor:
+    """Sketch of scored batches compared with a reference sketch.
+
+    ``observe`` takes scaled features (reference column order, without the
+    prediction column) and the batch's predictions.
+    """
+
+    def __init__(self, reference, max_psi=0.2):
+        self.reference = reference
+        self.current = reference.empty()
+        self.max_psi = max_psi
+        self._expected = reference.fractions()
+        self._with_predictions = reference.columns[-1] == PREDICTION
+
+    def observe(self, X, predictions=None):
+        """Sketch one batch and return the per-column PSI of the stream so far."""
+        if self._with_predictions:
+            if predictions is None:
+                predictions = np.full(len(X), np.nan)
+            X = np.column_stack([X, predictions])
+        self.current.update(X)
+        return self.scores()
+
+    def merge(self, sketch):
+        self.current.merge(sketch)
+        return self
+
+    def reset(self):
+        self.current = self.reference.empty()
+
+    def scores(self):
+        """PSI per column (NaN for columns with no values yet)."""
+        observed = self.current.counts.sum(axis=1)
+        scores = psi(self._expected, self.current.fractions())
+        scores[observed == 0] = np.nan
+        return scores
+
+    def report(self):
+        scores = self.scores()
+        return {
+            "rows": self.current.rows,
+            "max_psi": self.max_psi,
+            "psi": {c: float(s) for c, s in zip(self.current.columns, scores)},
+            "drifted": [
+                c for c, s in zip(self.current.columns, scores) if s > self.max_psi
+            ],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drift sketch utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge = sub.add_parser("merge", help="merge sketches from several workers")
+    merge.add_argument("output_path")
+    merge.add_argument("sketch_paths", nargs="+")
+    check = sub.add_parser("check", help="PSI of a sketch against the reference")
+    check.add_argument("reference_path")
+    check.add_argument("sketch_path")
+    check.add_argument("--max-psi", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        sketches = [load_sketch(p) for p in args.sketch_paths]
+        merged = sketches[0]
+        for sketch in sketches[1:]:
+            merged.merge(sketch)
+        save_sketch(merged, args.output_path)
+        print(f"✓ Merged {len(sketches)} sketches ({merged.rows} rows)")
+        return
+
+    monitor = DriftMonitor(load_sketch(args.reference_path), args.max_psi)
+    monitor.merge(load_sketch(args.sketch_path))
+    report = monitor.report()
+    print(json.dumps(report, indent=2))
+    if report["drifted"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Content-addressed blob cache for DVC-tracked files.
+
+Resolves a ``.dvc`` pointer to its md5, serves the blob from a local cache
+and only falls back to fetching from the configured DVC remote on a miss,
+using parallel ranged reads. Cached blobs are read-only; a workspace file is
+adopted by reflink or copy, never by a hard link it could later be edited
+through.
+"""
+
+import configparser
+import hashlib
+import os
+import shutil
+import tempfile
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 8 * 1024 * 1024
+FETCH_WORKERS = 8
+
+
+class DvcFetchError(RuntimeError):
+    """Raised when a DVC-tracked blob cannot be resolved or fetched."""
+
+
+def _is_url(location):
+    return urllib.parse.urlparse(location).scheme in ("http", "https")
+
+
+def _read_repo_file(repo, relpath):
+    """Read a text file from a local repo checkout or a GitHub-style repo URL."""
+    if _is_url(repo):
+        url = f"{repo.rstrip('/')}/raw/HEAD/{relpath}"
+        with urllib.request.urlopen(url, timeout=30) as resp:
+            return resp.read().decode("utf-8")
+    with open(os.path.join(repo, relpath)) as f:
+        return f.read()
+
+
+def parse_dvc_pointer(text):
+    """Return ``(md5, size)`` from the first ``outs`` entry of a ``.dvc`` file."""
+    md5, size = None, None
+    for line in text.splitlines():
+        key, _, value = line.strip().lstrip("- ").partition(":")
+        if key == "md5" and md5 is None:
+            md5 = value.strip()
+        elif key == "size" and size is None:
+            size = int(value.strip())
+    if not md5:
+        raise DvcFetchError("No md5 found in .dvc pointer")
+    return md5, size
+
+
+def default_remote_url(repo):
+    """Resolve the core remote URL from ``.dvc/config`` (relative to ``.dvc/``)."""
+    parser = configparser.ConfigParser()
+    parser.read_string(_read_repo_file(repo, ".dvc/config"))
+    remote = parser.get("core", "remote", fallback=None)
+    section = f"'remote \"{remote}\"'"
+    if not remote or not parser.has_section(section):
+        raise DvcFetchError("No default DVC remote configured")
+    url = parser.get(section, "url")
+    if _is_url(url) or os.path.isabs(url):
+        return url
+    if _is_url(repo):
+        raise DvcFetchError(
+            f"Remote '{remote}' is repo-relative ({url}); pass an explicit remote URL"
+        )
+    return os.path.normpath(os.path.join(repo, ".dvc", url))
+
+
+def kfp_remote_url(remote_url="", repo="."):
+    """Remote URL a KFP run can fetch from, checked before submitting.
+
+    Pods see neither this checkout nor local paths, so the remote must be an
+    http(s) URL: ``remote_url`` if given, else the default remote of the
+    local ``repo``. Raises ``DvcFetchError`` otherwise.
+    """
+    url = remote_url or default_remote_url(repo)
+    if not _is_url(url):
+        raise DvcFetchError(
+            f"DVC remote {url} is not reachable from KFP pods; "
+            "set DVC_REMOTE_URL to an http(s) remote"
+        )
+    return url
+
+
+def blob_relpath(md5):
+    """DVC 3.x object layout: ``files/md5/<2 chars>/<rest>``."""
+    return os.path.join("files", "md5", md5[:2], md5[2:])
+
+
+def file_md5(path):
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _reflink(src, dst):
+    """Copy-on-write clone (Linux FICLONE); raises OSError when unsupported."""
+    import fcntl
+
+    ficlone = 0x40049409
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), ficlone, s.fileno())
+
+
+def _writable(path):
+    return bool(os.stat(path).st_mode & 0o222)
+
+
+def link_blob(src, dst, hardlink=True):
+    """Materialize ``src`` at ``dst`` without moving data where possible.
+
+    A hard link is only made to a read-only ``src`` (a cached blob), so
+    editing ``dst`` in place can never change it. Returns the link mode used:
+    ``"existing"``, ``"hardlink"``, ``"reflink"`` or ``"copy"``.
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return "existing"
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    tmp = f"{dst}.tmp.{os.getpid()}"
+    try:
+        try:
+            if not hardlink or _writable(src):
+                raise OSError("hard link would share a writable inode")
+            os.link(src, tmp)
+            mode = "hardlink"
+        except OSError:
+            try:
+                _reflink(src, tmp)
+                mode = "reflink"
+            except (OSError, ImportError):
+                shutil.copyfile(src, tmp)
+                mode = "copy"
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return mode
+
+
+def _remote_size(url):
+    req = urllib.request.Request(url, method="HEAD")
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return int(resp.headers["Content-Length"])
+
+
+def _read_range(source, offset, length):
+    if _is_url(source):
+        req = urllib.request.Request(
+            source, headers={"Range": f"bytes={offset}-{offset + length - 1}"}
+        )
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return resp.read()
+    fd = os.open(source, os.O_RDONLY)
+    try:
+        return os.pread(fd, length, offset)
+    finally:
+        os.close(fd)
+
+
+def fetch_ranged(source, dst, size=None, chunk_size=CHUNK_SIZE, workers=FETCH_WORKERS):
+    """Fetch ``source`` (local path or URL) into ``dst`` with parallel ranged reads."""
+    if size is None:
+        size = _remote_size(source) if _is_url(source) else os.path.getsize(source)
+    offsets = range(0, size, chunk_size)
+    fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+
+        def _copy_chunk(offset):
+            data = _read_range(source, offset, min(chunk_size, size - offset))
+            os.pwrite(fd, data, offset)
+            return len(data)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            copied = sum(pool.map(_copy_chunk, offsets))
+    finally:
+        os.close(fd)
+    if copied != size:
+        raise DvcFetchError(f"Short read from {source}: {copied}/{size} bytes")
+
+
+class BlobCache:
+    """Local content-addressed cache keyed by md5 (DVC 3.x layout)."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def path(self, md5):
+        return os.path.join(self.cache_dir, blob_relpath(md5))
+
+    def has(self, md5):
+        path = self.path(md5)
+        if not os.path.exists(path):
+            return False
+        if _writable(path):
+            # Adopted by hard link before blobs were read-only: the workspace
+            # file may have been edited through it, so drop it and re-resolve
+            os.remove(path)
+            return False
+        return True
+
+    def add(self, src, md5):
+        """Adopt an existing file into the cache as a read-only reflink or copy."""
+        target = self.path(md5)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.part.{os.getpid()}"
+        try:
+            link_blob(src, tmp, hardlink=False)
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return target
+
+    def fetch(self, remote_url, md5, size=None, workers=FETCH_WORKERS):
+        """Download a blob from the remote into the cache and verify its md5."""
+        target = self.path(md5)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        source = (
+            f"{remote_url.rstrip('/')}/{blob_relpath(md5).replace(os.sep, '/')}"
+            if _is_url(remote_url)
+            else os.path.join(remote_url, blob_relpath(md5))
+        )
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".part")
+        os.close(fd)
+        try:
+            fetch_ranged(source, tmp, size=size, workers=workers)
+            if file_md5(tmp) != md5:
+                raise DvcFetchError(f"Checksum mismatch for blob {md5}")
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return target
+
+
+def resolve(repo, data_path, cache_dir="", remote_url="", workers=FETCH_WORKERS):
+    """Return the cache path of the blob behind ``data_path``, fetching it on a miss."""
+    md5, size = parse_dvc_pointer(_read_repo_file(repo, f"{data_path}.dvc"))
+    if not cache_dir:
+        cache_dir = (
+            os.path.expanduser("~/.cache/dvc-blobs")
+            if _is_url(repo)
+            else os.path.join(repo, ".dvc", "cache")
+        )
+    cache = BlobCache(cache_dir)
+
+    if not cache.has(md5):
+        workspace_copy = None if _is_url(repo) else os.path.join(repo, data_path)
+        if (
+            workspace_copy
+            and os.path.exists(workspace_copy)
+            and (size is None or os.path.getsize(workspace_copy) == size)
+            and file_md5(workspace_copy) == md5
+        ):
+            cache.add(workspace_copy, md5)
+        else:
+            cache.fetch(remote_url or default_remote_url(repo), md5, size, workers)
+
+    return cache.path(md5)
+
+
+def checkout(
+    repo, data_path, output_path, cache_dir="", remote_url="", workers=FETCH_WORKERS
+):
+    """Materialize the DVC-tracked ``data_path`` of ``repo`` at ``output_path``.
+
+    Returns ``(output_path, mode)`` where ``mode`` describes the data movement:
+    ``"existing"`` means the output already pointed at the cached blob.
+    """
+    blob = resolve(repo, data_path, cache_dir, remote_url, workers)
+    return output_path, link_blob(blob, output_path)
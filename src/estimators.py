@@ -0,0 +1,81 @@
+"""
+Estimator backends for the training step.
+
+Every backend is a scikit-learn regressor saved with joblib, so evaluation,
+importance and the model registry consume it unchanged. Only the tree
+forests (``random_forest``, ``extra_trees``) can be exported to the flat
+NumPy format and report out-of-bag scores.
+"""
+
+DEFAULT_ESTIMATOR = "random_forest"
+
+
+def _random_forest(n_estimators, random_state, oob_score, n_jobs):
+    from sklearn.ensemble import RandomForestRegressor
+
+    return RandomForestRegressor(
+        n_estimators=n_estimators,
+        random_state=random_state,
+        oob_score=oob_score,
+        n_jobs=n_jobs,
+    )
+
+
+def _extra_trees(n_estimators, random_state, oob_score, n_jobs):
+    from sklearn.ensemble import ExtraTreesRegressor
+
+    # Out-of-bag scores need bootstrap samples, which ExtraTrees skips by default
+    return ExtraTreesRegressor(
+        n_estimators=n_estimators,
+        random_state=random_state,
+        bootstrap=oob_score,
+        oob_score=oob_score,
+        n_jobs=n_jobs,
+    )
+
+
+def _hist_gradient_boosting(n_estimators, random_state, oob_score, n_jobs):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    # One boosting iteration per "estimator"; threads follow OpenMP settings
+    return HistGradientBoostingRegressor(
+        max_iter=n_estimators, random_state=random_state
+    )
+
+
+def _linear(n_estimators, random_state, oob_score, n_jobs):
+    from sklearn.linear_model import LinearRegression
+
+    return LinearRegression()
+
+
+# name -> factory(n_estimators, random_state, oob_score, n_jobs)
+ESTIMATORS = {
+    "random_forest": _random_forest,
+    "extra_trees": _extra_trees,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+    "linear": _linear,
+}
+FLAT_EXPORTABLE = ("random_forest", "extra_trees")
+
+
+def build_estimator(
+    name=DEFAULT_ESTIMATOR,
+    n_estimators=100,
+    random_state=42,
+    oob_score=False,
+    n_jobs=None,
+):
+    """Unfitted regressor for backend ``name``; unsupported options are ignored.
+
+    ``n_jobs=None`` uses the cores the process is allotted.
+    """
+    from src.resources import available_cpus
+
+    try:
+        factory = ESTIMATORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown estimator {name!r}; choose from {sorted(ESTIMATORS)}"
+        ) from None
+    return factory(n_estimators, random_state, oob_score, n_jobs or available_cpus())
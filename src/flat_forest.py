@@ -0,0 +1,156 @@
+"""
+Portable flat format for tree ensembles and a NumPy-only predictor.
+
+All trees of a fitted forest are concatenated into flat node arrays
+(``feature``, ``threshold``, ``left``, ``right``, ``value``) with global
+child indices, saved as ``.npz`` or ``.json``. Loading and predicting only
+need NumPy, so inference processes start without importing scikit-learn or
+unpickling the estimator.
+
+Only ``export_forest`` touches the sklearn model; keep this module free of
+other heavy imports so ``load``/``predict`` stay cheap.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+FORMAT_VERSION = 1
+ROW_CHUNK = 4096
+
+
+def export_forest(model):
+    """Flatten a fitted sklearn forest/tree regressor into a dict of arrays."""
+    estimators = getattr(model, "estimators_", [model])
+    roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for est in estimators:
+        tree = est.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        idx = np.arange(n)
+        # Leaves point at themselves so a fixed number of steps is harmless
+        left = np.where(leaf, idx, tree.children_left) + offset
+        right = np.where(leaf, idx, tree.children_right) + offset
+        roots.append(offset)
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(left)
+        rights.append(right)
+        values.append(tree.value[:, 0, 0])
+        depth = max(depth, tree.max_depth)
+        offset += n
+    return {
+        "format_version": np.int64(FORMAT_VERSION),
+        "n_features": np.int64(model.n_features_in_),
+        "max_depth": np.int64(depth),
+        "roots": np.asarray(roots, dtype=np.int64),
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int64),
+        "right": np.concatenate(rights).astype(np.int64),
+        "value": np.concatenate(values).astype(np.float64),
+    }
+
+
+def save(flat, path):
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump({k: np.asarray(v).tolist() for k, v in flat.items()}, f)
+    else:
+        np.savez(path, **flat)
+
+
+class FlatForest:
+    """Vectorized predictor over the flat node arrays."""
+
+    def __init__(self, arrays):
+        self.n_features = int(arrays["n_features"])
+        self.max_depth = int(arrays["max_depth"])
+        self.roots = np.asarray(arrays["roots"], dtype=np.int64)
+        # Stored dtypes are kept: compacted forests (src.compaction) use
+        # float32 thresholds/values and narrow index types
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        self.left = np.asarray(arrays["left"])
+        self.right = np.asarray(arrays["right"])
+        self.value = np.asarray(arrays["value"])
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def leaves(self, X, roots=None):
+        """Leaf node index of every (tree, row): shape (n_trees, n_rows).
+
+        ``roots`` restricts the walk to a subset of the trees.
+        """
+        # Same comparison as sklearn: float32 inputs against the thresholds
+        X = np.asarray(X, dtype=np.float32)
+        roots = self.roots if roots is None else roots
+        nodes = np.repeat(roots[:, None], X.shape[0], axis=1)
+        rows = np.arange(X.shape[0])[None, :]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_trees(self, X, out=None, n_jobs=1):
+        """Per-tree predictions, shape (n_trees, n_rows).
+
+        Results are written into ``out`` (allocated if not given). With
+        ``n_jobs > 1`` chunks of trees are walked in threads, each filling its
+        own rows of ``out``; the NumPy kernels release the GIL.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if out is None:
+            out = np.empty((self.n_trees, X.shape[0]), dtype=self.value.dtype)
+
+        def fill(trees):
+            rows = out[trees.start : trees.stop]
+            for start in range(0, X.shape[0], ROW_CHUNK):
+                stop = start + ROW_CHUNK
+                leaves = self.leaves(X[start:stop], self.roots[trees])
+                np.take(self.value, leaves, out=rows[:, start:stop])
+
+        bounds = np.linspace(0, self.n_trees, max(1, min(n_jobs, self.n_trees)) + 1)
+        chunks = [slice(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+        if len(chunks) == 1:
+            fill(chunks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+                list(pool.map(fill, chunks))
+        return out
+
+    def predict(self, X):
+        X = np.asarray(X)
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], ROW_CHUNK):
+            stop = start + ROW_CHUNK
+            out[start:stop] = self.predict_trees(X[start:stop]).mean(
+                axis=0, dtype=np.float64
+            )
+        return out
+
+
+def load(path):
+    """Load a flat forest saved by ``save`` (``.npz`` or ``.json``)."""
+    if path.endswith(".json"):
+        with open(path) as f:
+            arrays = {k: np.asarray(v) for k, v in json.load(f).items()}
+    else:
+        with np.load(path) as npz:
+            arrays = {k: npz[k] for k in npz.files}
+    if int(arrays["format_version"]) != FORMAT_VERSION:
+        raise ValueError(f"Unsupported flat forest format {arrays['format_version']}")
+    return FlatForest(arrays)
+
+
+def check_parity(model, flat, X, atol=1e-9):
+    """Max abs difference between ``model.predict`` and the flat predictor."""
+    diff = float(np.max(np.abs(model.predict(X) - flat.predict(X))))
+    if diff > atol:
+        raise AssertionError(f"Flat forest deviates from model.predict by {diff}")
+    return diff
@@ -0,0 +1,198 @@
+"""
+Run several local pipelines concurrently within a CPU/memory budget.
+
+Every job is a ``python -m src.mlflow_pipeline --isolated ...`` subprocess,
+so its outputs live in its own ``runs/<run ID>/`` workspace. A job declares
+the CPUs and memory it needs (Kubernetes quantities, as in
+``pipeline_resources.yaml``); jobs start in order, and later jobs that fit
+the remaining budget start before an earlier one that does not. Each job
+gets its CPU share as ``PIPELINE_CPUS``, which sizes every worker pool and
+estimator in the job (``src.resources.available_cpus``), and its BLAS/OpenMP
+threads are capped at it too. Memory only gates admission. Output of each
+job goes to a log file under ``runs/launcher/``.
+
+Usage:
+    python -m src.launcher --runs 4 --job-cpus 1 --job-memory 1Gi -- --cv-folds 3
+    python -m src.launcher --jobs jobs.json --cpus 4 --memory 8Gi
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import time
+
+from src.resources import CPU_ENV, available_cpus, cpu_cores, memory_bytes
+
+LOG_ROOT = os.path.join("runs", "launcher")
+THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+RUN_LINE = re.compile(r"Run (\w+) workspace: (\S+)")
+
+
+def total_memory():
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def _job_env(cpus):
+    env = dict(os.environ)
+    threads = str(max(1, math.floor(cpus)))
+    for var in (CPU_ENV, *THREAD_VARS):
+        env[var] = threads
+    return env
+
+
+def _run_info(log_path):
+    with open(log_path) as f:
+        match = RUN_LINE.search(f.read())
+    return match.groups() if match else (None, None)
+
+
+def launch(jobs, cpus=None, memory=None, max_parallel=None, log_dir=None, poll=0.2):
+    """Run ``jobs`` ({"args", "cpus", "memory"}) concurrently; return a report."""
+    import mlflow
+
+    from src.mlflow_pipeline import EXPERIMENT
+
+    cpus = cpus or available_cpus()
+    memory = memory or total_memory()
+    max_parallel = max_parallel or len(jobs)
+    log_dir = log_dir or os.path.join(LOG_ROOT, time.strftime("%Y%m%d-%H%M%S"))
+    demands = [(cpu_cores(j["cpus"]), memory_bytes(j["memory"])) for j in jobs]
+    for i, (cpu, mem) in enumerate(demands):
+        if cpu > cpus or mem > memory:
+            raise ValueError(f"Job {i} needs {jobs[i]} which exceeds the budget")
+    os.makedirs(log_dir, exist_ok=True)
+    # Create the experiment once so concurrent runs do not race to create it
+    mlflow.set_experiment(EXPERIMENT)
+
+    pending = list(range(len(jobs)))
+    running = {}  # index -> (process, log file, started)
+    results = [None] * len(jobs)
+    used_cpu = used_mem = 0
+    peak = 0
+    start = time.perf_counter()
+    try:
+        while pending or running:
+            for i in list(pending):
+                cpu, mem = demands[i]
+                if len(running) >= max_parallel:
+                    break
+                if used_cpu + cpu > cpus or used_mem + mem > memory:
+                    continue
+                log = open(os.path.join(log_dir, f"job-{i}.log"), "w")
+                cmd = [sys.executable, "-m", "src.mlflow_pipeline", "--isolated"]
+                process = subprocess.Popen(
+                    cmd + list(jobs[i]["args"]),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    env=_job_env(cpu),
+                )
+                running[i] = (process, log, time.perf_counter())
+                pending.remove(i)
+                used_cpu += cpu
+                used_mem += mem
+            peak = max(peak, len(running))
+
+            time.sleep(poll)
+            for i, (process, log, started) in list(running.items()):
+                if process.poll() is None:
+                    continue
+                log.close()
+                del running[i]
+                used_cpu -= demands[i][0]
+                used_mem -= demands[i][1]
+                run_id, workspace = _run_info(log.name)
+                results[i] = {
+                    "job": i,
+                    "args": list(jobs[i]["args"]),
+                    "returncode": process.returncode,
+                    "run_id": run_id,
+                    "workspace": workspace,
+                    "log": log.name,
+                    "started_seconds": started - start,
+                    "wall_seconds": time.perf_counter() - started,
+                }
+    finally:
+        for process, log, _ in running.values():
+            process.terminate()
+            log.close()
+
+    wall_seconds = time.perf_counter() - start
+    # Job times are inflated by contention, so their sum is no serial baseline;
+    # divided by the wall time it is the average number of jobs running
+    job_seconds = sum(r["wall_seconds"] for r in results)
+    return {
+        "cpus": cpus,
+        "memory_bytes": memory,
+        "max_concurrent": peak,
+        "wall_seconds": wall_seconds,
+        "job_seconds": job_seconds,
+        "mean_concurrent": job_seconds / wall_seconds if wall_seconds else 0.0,
+        "failed": sum(r["returncode"] != 0 for r in results),
+        "jobs": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run local pipelines concurrently within a CPU/memory budget"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--runs", type=int, help="identical jobs to run")
+    source.add_argument(
+        "--jobs", help='JSON list of {"args": [...], "cpus": "1", "memory": "1Gi"}'
+    )
+    parser.add_argument("--job-cpus", default="1", help="CPU per --runs job")
+    parser.add_argument("--job-memory", default="1Gi", help="memory per --runs job")
+    parser.add_argument("--cpus", type=cpu_cores, default=None, help="CPU budget")
+    parser.add_argument("--memory", type=memory_bytes, default=None, help="budget")
+    parser.add_argument("--max-parallel", type=int, default=None)
+    parser.add_argument("--output", help="optional path for the JSON report")
+    parser.add_argument(
+        "pipeline_args",
+        nargs=argparse.REMAINDER,
+        help="-- then src.mlflow_pipeline flags",
+    )
+    args = parser.parse_args()
+
+    if args.jobs:
+        with open(args.jobs) as f:
+            jobs = [
+                {
+                    "args": job.get("args", []),
+                    "cpus": job.get("cpus", args.job_cpus),
+                    "memory": job.get("memory", args.job_memory),
+                }
+                for job in json.load(f)
+            ]
+    else:
+        extra = [a for a in args.pipeline_args if a != "--"]
+        jobs = [
+            {"args": extra, "cpus": args.job_cpus, "memory": args.job_memory}
+            for _ in range(args.runs)
+        ]
+
+    report = launch(jobs, args.cpus, args.memory, args.max_parallel)
+    for job in report["jobs"]:
+        status = "✓" if job["returncode"] == 0 else "✗"
+        print(
+            f"{status} job {job['job']}: run {job['run_id']} in {job['wall_seconds']:.1f}s "
+            f"(started +{job['started_seconds']:.1f}s) -> {job['workspace'] or job['log']}"
+        )
+    print(
+        f"{len(jobs)} runs, up to {report['max_concurrent']} at once on "
+        f"{report['cpus']:g} CPUs: {report['wall_seconds']:.1f}s "
+        f"({report['mean_concurrent']:.2f} running on average)"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
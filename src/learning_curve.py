@@ -0,0 +1,260 @@
+"""
+Learning curve over training-set size, and the subsample size it recommends.
+
+A seeded validation split is carved from the training split, so the test
+split that evaluation reports on plays no part in the choice. The rest of
+the training rows and the validation rows are written once to ``.npy`` files
+that every worker memory-maps. Each (size, repeat) task fits the configured
+estimator on a seeded subsample of those rows and scores it on the full
+validation split, so all sizes are compared on the same data. The smallest
+fraction whose mean MSE is within ``tolerance`` of the best one is
+recommended, scaled to the full training split, and can be persisted;
+``model_training_component`` then trains on that many rows (the local
+runner picks the persisted choice up automatically).
+
+Usage:
+    python -m src.learning_curve data/train.csv --fractions 0.1 0.25 0.5 1 --n-jobs 4 --persist
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.resources import available_cpus
+
+FRACTIONS = (0.1, 0.2, 0.3, 0.5, 0.7, 1.0)
+SAMPLE_SIZE_PATH = "models/sample_size.json"
+
+_SHARED = {}
+
+
+def subsample_indices(n_rows, size, random_state=42):
+    """Row indices of the seeded ``size``-row subsample (all rows if ``size`` >= ``n_rows``).
+
+    Smaller sizes are prefixes of the same permutation, so the samples are nested.
+    """
+    if not size or size >= n_rows:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.permutation(n_rows)[:size])
+
+
+def _attach(paths):
+    """Worker initializer: memory-map the shared splits once per process."""
+    for name, path in paths.items():
+        _SHARED[name] = np.load(path, mmap_mode="r")
+
+
+def _fit_size(task):
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    from src.estimators import build_estimator
+
+    rows, repeat, estimator, n_estimators, random_state = task
+    idx = subsample_indices(len(_SHARED["y_fit"]), rows, random_state + repeat)
+    model = build_estimator(
+        estimator, n_estimators=n_estimators, random_state=random_state, n_jobs=1
+    )
+    start = time.perf_counter()
+    model.fit(_SHARED["X_fit"][idx], _SHARED["y_fit"][idx])
+    fit_seconds = time.perf_counter() - start
+    y_val = _SHARED["y_val"]
+    y_pred = model.predict(_SHARED["X_val"])
+    return {
+        "rows": int(len(idx)),
+        "repeat": repeat,
+        "MSE": float(mean_squared_error(y_val, y_pred)),
+        "R2": float(r2_score(y_val, y_pred)),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def learning_curve(
+    X_train,
+    y_train,
+    fractions=FRACTIONS,
+    n_repeats=3,
+    tolerance=0.02,
+    validation_size=0.2,
+    estimator="random_forest",
+    n_estimators=100,
+    random_state=42,
+    n_jobs=None,
+):
+    """Fit every (size, repeat) in parallel; return the curve and the chosen size.
+
+    ``validation_size`` of the training rows are held out to score the
+    curve. ``tolerance`` is the accepted relative MSE increase over the best
+    size.
+    """
+    train_rows = len(y_train)
+    order = np.random.default_rng(random_state).permutation(train_rows)
+    n_val = max(1, round(validation_size * train_rows))
+    val, fit = np.sort(order[:n_val]), np.sort(order[n_val:])
+    n_rows = len(fit)
+    sizes = sorted({max(1, min(n_rows, round(f * n_rows))) for f in fractions})
+    tasks = [
+        (rows, repeat, estimator, n_estimators, random_state)
+        for rows in sizes
+        for repeat in range(n_repeats)
+    ]
+    n_jobs = min(n_jobs or available_cpus(), len(tasks))
+
+    shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=shm) as tmp:
+        paths = {}
+        for name, array in (
+            ("X_fit", X_train[fit]),
+            ("y_fit", y_train[fit]),
+            ("X_val", X_train[val]),
+            ("y_val", y_train[val]),
+        ):
+            paths[name] = os.path.join(tmp, f"{name}.npy")
+            np.save(paths[name], np.ascontiguousarray(array))
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_attach, initargs=(paths,)
+        ) as pool:
+            fits = list(pool.map(_fit_size, tasks))
+    wall_seconds = time.perf_counter() - start
+
+    curve = []
+    for rows in sizes:
+        runs = [f for f in fits if f["rows"] == rows]
+        curve.append(
+            {
+                "rows": rows,
+                "fraction": rows / n_rows,
+                **{
+                    key: float(np.mean([r[key] for r in runs]))
+                    for key in ("MSE", "R2", "fit_seconds")
+                },
+                "MSE_std": float(np.std([r["MSE"] for r in runs])),
+            }
+        )
+    best = min(curve, key=lambda point: point["MSE"])
+    chosen = next(p for p in curve if p["MSE"] <= best["MSE"] * (1 + tolerance))
+    return {
+        "train_rows": train_rows,
+        "fit_rows": n_rows,
+        "validation_rows": n_val,
+        "estimator": estimator,
+        "n_estimators": n_estimators,
+        "n_repeats": n_repeats,
+        "tolerance": tolerance,
+        "n_jobs": n_jobs,
+        "wall_seconds": wall_seconds,
+        "curve": curve,
+        "best_rows": best["rows"],
+        # Training fits the whole training split, so scale the chosen fraction
+        "chosen_rows": min(train_rows, round(chosen["fraction"] * train_rows)),
+        "chosen_fraction": chosen["fraction"],
+        "relative_MSE_increase": (chosen["MSE"] - best["MSE"]) / best["MSE"],
+        "fit_speedup": best["fit_seconds"] / chosen["fit_seconds"],
+    }
+
+
+def persist_choice(report, path=SAMPLE_SIZE_PATH):
+    """Record the chosen sample size for later training runs."""
+    from src.artifacts import write_json
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    choice = {
+        key: report[key]
+        for key in ("chosen_rows", "chosen_fraction", "train_rows", "estimator")
+    }
+    choice["tolerance"] = report["tolerance"]
+    choice["chosen_at"] = time.time()
+    write_json(choice, path)
+    return path
+
+
+def load_choice(path=SAMPLE_SIZE_PATH, estimator=None):
+    """Persisted sample size in rows, or ``0`` (train on every row) if there is none.
+
+    A choice made for a different ``estimator`` is ignored.
+    """
+    from src.artifacts import read_json
+
+    if not os.path.exists(path):
+        return 0
+    choice = read_json(path)
+    if estimator and choice.get("estimator") != estimator:
+        return 0
+    return int(choice["chosen_rows"])
+
+
+def log_to_mlflow(report):
+    """Log the curve (one step per sample size) and the chosen size."""
+    import mlflow
+
+    for point in report["curve"]:
+        for key in ("MSE", "R2", "fit_seconds"):
+            mlflow.log_metric(f"lc_{key}", point[key], step=point["rows"])
+    mlflow.log_metric("lc_chosen_rows", report["chosen_rows"])
+    mlflow.log_metric("lc_chosen_fraction", report["chosen_fraction"])
+    mlflow.log_metric("lc_relative_MSE_increase", report["relative_MSE_increase"])
+    mlflow.log_metric("lc_wall_seconds", report["wall_seconds"])
+
+
+def main():
+    from src.artifacts import read_frame
+    from src.schema import PROCESSED_SCHEMA, TARGET, feature_columns
+
+    parser = argparse.ArgumentParser(description="Learning curve over sample size")
+    parser.add_argument("train_csv_path")
+    parser.add_argument("--fractions", type=float, nargs="+", default=list(FRACTIONS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    parser.add_argument(
+        "--validation-size",
+        type=float,
+        default=0.2,
+        help="fraction of the training split held out to score the curve",
+    )
+    parser.add_argument("--estimator", default="random_forest")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument(
+        "--persist", action="store_true", help=f"write the choice to {SAMPLE_SIZE_PATH}"
+    )
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    train = read_frame(args.train_csv_path, schema=PROCESSED_SCHEMA)
+    features = feature_columns(train.columns)
+    report = learning_curve(
+        train[features].to_numpy(),
+        train[TARGET].to_numpy(),
+        fractions=args.fractions,
+        n_repeats=args.repeats,
+        tolerance=args.tolerance,
+        validation_size=args.validation_size,
+        estimator=args.estimator,
+        n_estimators=args.n_estimators,
+        n_jobs=args.n_jobs,
+    )
+    print(f"{'rows':>7}{'fraction':>10}{'MSE':>9}{'R2':>8}{'fit s':>8}")
+    for p in report["curve"]:
+        print(
+            f"{p['rows']:>7}{p['fraction']:>10.2f}{p['MSE']:>9.3f}"
+            f"{p['R2']:>8.3f}{p['fit_seconds']:>8.3f}"
+        )
+    print(
+        f"✓ {report['chosen_rows']} of {report['train_rows']} rows within "
+        f"{report['tolerance']:.0%} of the best MSE ({report['fit_speedup']:.1f}x faster fit)"
+    )
+    if args.persist:
+        print(f"  saved to {persist_choice(report)}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,559 @@
-import mlflow
-import mlflow.sklearn
-from src.pipeline_components import (
+import argparse
+import os
+
+from src.artifacts import REGISTRY, persist, read_json, write_json
+from src.compaction import log_to_mlflow as log_compaction_metrics
+from src.cross_validation import log_to_mlflow as log_cv_metrics
+from src.estimators import DEFAULT_ESTIMATOR, ESTIMATORS, FLAT_EXPORTABLE
+from src.importance import log_to_mlflow as log_importance_metrics
+from src.learning_curve import load_choice, persist_choice
+from src.learning_curve import log_to_mlflow as log_learning_curve_metrics
+from src.model_registry import ModelRegistry
+from src.pruning import compare_feature_sets
+from src.pruning import log_to_mlflow as log_pruning_metrics
+from src.run_state import RunJournal
+from src.slicing import fan_out
+from src.slicing import log_to_mlflow as log_slice_metrics
+from src.tracing import TRACER, span, traced
+from src.components import (
     data_extraction_component,
+    data_validation_component,
     data_preprocessing_component,
+    learning_curve_component,
+    model_cross_validation_component,
     model_training_component,
+    model_export_component,
+    model_compaction_component,
     model_evaluation_component,
+    model_importance_component,
+)
+
+# On-disk locations of each stage output
+DISK_PATHS = {
+    "raw": "data/raw_local.csv",
+    "validation": "metrics/validation_report.json",
+    "cv": "metrics/cross_validation.json",
+    "train": "data/train.csv",
+    "test": "data/test.csv",
+    "scaler": "models/scaler.json",
+    "sketch": "models/reference_sketch.json",
+    "learning_curve": "metrics/learning_curve.json",
+    "model": "models/rf_model.joblib",
+    "flat_model": "models/rf_model.npz",
+    "compact_model": "models/rf_model_compact.npz",
+    "compaction": "metrics/compaction.json",
+    "metrics": "metrics/metrics.json",
+    "importance": "metrics/importance.json",
+    "pruning": "metrics/pruning.json",
+    "slices": "metrics/sliced_metrics.json",
+}
+ARTIFACT_KINDS = {
+    "raw": "frame",
+    "validation": "json",
+    "cv": "json",
+    "train": "frame",
+    "test": "frame",
+    "scaler": "json",
+    "sketch": "json",
+    "learning_curve": "json",
+    "model": "model",
+    "flat_model": "flat",
+    "compact_model": "flat",
+    "compaction": "json",
+    "metrics": "json",
+    "importance": "json",
+    "pruning": "json",
+    "slices": "json",
+}
+# Outputs written and logged in in-memory mode (raw data is versioned by DVC
+# and the splits are reproducible from it)
+IN_MEMORY_PERSIST = (
+    "scaler",
+    "sketch",
+    "learning_curve",
+    "model",
+    "flat_model",
+    "compact_model",
+    "compaction",
+    "metrics",
+    "importance",
+    "pruning",
+    "slices",
 )
+PRUNED_MODEL_DIR = "models/pruned"
+SLICE_DIR = "data/slices"
+EXPERIMENT = "boston_housing_pipeline"
+# Isolated runs keep every output under runs/<MLflow run ID>/
+WORKSPACE_ROOT = "runs"
+
+# Steps in execution order and the outputs each one checkpoints
+STEP_OUTPUTS = {
+    "extraction": ("raw",),
+    "validation": ("validation",),
+    "cross_validation": ("cv",),
+    "preprocessing": ("train", "test", "scaler", "sketch"),
+    "learning_curve": ("learning_curve",),
+    "training": ("model",),
+    "export": ("flat_model",),
+    "compaction": ("compact_model", "compaction"),
+    "evaluation": ("metrics",),
+    "importance": ("importance",),
+    "pruning": ("pruning",),
+    "slicing": ("slices",),
+}
+STEPS = tuple(STEP_OUTPUTS)
+
+
+def _check_resume(run_id, params):
+    """Logged params of ``run_id``; raises if ``params`` differ from them."""
+    from mlflow.tracking import MlflowClient
+
+    logged = MlflowClient().get_run(run_id).data.params
+    changed = [
+        f"{name}={value} (run has {logged[name]})"
+        for name, value in params.items()
+        if name in logged and logged[name] != str(value)
+    ]
+    if changed:
+        raise ValueError(
+            f"Run {run_id} was started with other settings; resume it with the "
+            f"original flags: {', '.join(changed)}"
+        )
+    return logged
+
+
+@traced("pipeline.run")
+def run_pipeline(
+    in_memory=False,
+    persist_outputs=IN_MEMORY_PERSIST,
+    resume=None,
+    cv_folds=0,
+    cv_repeats=1,
+    importance=False,
+    prune_tolerance=None,
+    promote=False,
+    slice_column=None,
+    slice_jobs=None,
+    estimator=DEFAULT_ESTIMATOR,
+    compact=False,
+    compact_max_depth=0,
+    compact_min_samples_leaf=1,
+    learning_curve=False,
+    lc_tolerance=0.02,
+    subsample=True,
+    isolated=False,
+):
+    """Run all components in-process and track the run in MLflow.
+
+    With ``in_memory=True`` stages hand their outputs to each other through
+    the in-process artifact registry; only ``persist_outputs`` are written to
+    disk (and logged).
+
+    Every completed step is checkpointed in a run journal. Pass the MLflow
+    run ID as ``resume`` to reattach to that run and continue from the first
+    step whose checkpointed outputs are missing or corrupted. The run must
+    have a journal and be resumed with the settings it was started with.
+
+    ``cv_folds > 0`` adds a parallel repeated K-fold evaluation of
+    ``estimator`` on the raw data (``cv_repeats`` times) and logs per-fold and
+    aggregate scores.
+
+    ``importance=True`` trains with out-of-bag scoring and adds a feature
+    importance step (impurity, OOB, parallel permutation) after evaluation.
+
+    ``prune_tolerance`` retrains on the features with positive permutation
+    importance on a validation split carved from the training split,
+    benchmarks the pruned model against the full one on the test split and
+    logs it when its relative MSE increase is within tolerance.
+
+    Every evaluated model is registered in the local model registry under the
+    MLflow run ID; ``promote=True`` also points the ``production`` alias at it.
+
+    ``slice_column`` also trains one model per value of that column in a
+    process pool (``slice_jobs`` workers) and logs the weighted summary.
+
+    ``estimator`` selects the training backend (see ``src.estimators``); the
+    flat-model export step only runs for the forest backends.
+
+    ``compact=True`` (forest backends only) also writes a float32 flat model
+    pruned to ``compact_max_depth``/``compact_min_samples_leaf`` and logs its
+    size, latency and MSE/R2 against the trained model.
+
+    ``learning_curve=True`` fits the estimator on increasing subsamples of
+    the training split in parallel, scores them on a validation split held
+    out of it, logs the curve and persists the smallest size whose MSE is
+    within ``lc_tolerance`` (relative) of the best
+    (``src.learning_curve.SAMPLE_SIZE_PATH``).
+    With ``subsample`` (the default) training uses the persisted size, so
+    later runs pick it up automatically.
+
+    ``isolated=True`` writes every output under ``runs/<run ID>/`` instead of
+    the shared ``data/``, ``models/`` and ``metrics/`` paths, so several runs
+    can execute side by side (see ``src.launcher``). Files are always written
+    to a temporary name and renamed into place once complete. Resuming an
+    isolated run reuses its workspace.
+
+    With ``PIPELINE_TRACE`` set, the run and every step it executes are
+    traced (see ``src.tracing``) and the trace ID is tagged on the MLflow run.
+    """
+    # Imported here so ``--help`` and importing this module stay fast
+    import mlflow
+
+    if resume and in_memory:
+        raise ValueError("Resuming needs on-disk checkpoints; run without in_memory")
+    if compact and estimator not in FLAT_EXPORTABLE:
+        raise ValueError(f"Only {FLAT_EXPORTABLE} models can be compacted")
+
+    mlflow.set_experiment(EXPERIMENT)
+
+    logged_params = {}
+    if resume:
+        # Fails for a run that never checkpointed a step
+        RunJournal.load(resume)
+        workspace = os.path.join(WORKSPACE_ROOT, resume)
+        logged_params = _check_resume(
+            resume,
+            {
+                "in_memory": in_memory,
+                "estimator": estimator,
+                "workspace": (
+                    workspace if isolated or os.path.isdir(workspace) else "."
+                ),
+            },
+        )
+
+    run_args = {"run_id": resume} if resume else {"run_name": "full_python_run"}
+    with mlflow.start_run(**run_args) as run:
+        workspace = os.path.join(WORKSPACE_ROOT, run.info.run_id)
+        if not (isolated or (resume and os.path.isdir(workspace))):
+            workspace = ""
+        paths = {name: os.path.join(workspace, p) for name, p in DISK_PATHS.items()}
+        if in_memory:
+            REGISTRY.clear()
+            uris = {name: f"mem://{name}" for name in DISK_PATHS}
+            persisted_outputs = tuple(persist_outputs)
+        else:
+            uris = dict(paths)
+            persisted_outputs = tuple(DISK_PATHS)
+
+        def log_output(name):
+            if name in persisted_outputs:
+                mlflow.log_artifact(
+                    persist(uris[name], paths[name], ARTIFACT_KINDS[name])
+                )
 
+        if workspace:
+            print(f"Run {run.info.run_id} workspace: {workspace}")
+        mlflow.log_param("in_memory", in_memory)
+        mlflow.log_param("estimator", estimator)
+        mlflow.log_param("workspace", workspace or ".")
+        if TRACER.enabled:
+            mlflow.set_tag("trace_id", TRACER.trace_id)
+        journal = RunJournal(run.info.run_id)
+        optional = {
+            "cross_validation": cv_folds,
+            "export": estimator in FLAT_EXPORTABLE,
+            "compaction": compact,
+            "learning_curve": learning_curve,
+            "importance": importance,
+            "pruning": prune_tolerance is not None,
+            "slicing": bool(slice_column),
+        }
+        steps = [s for s in STEPS if optional.get(s, True)]
+        start = journal.first_incomplete(steps) if resume else 0
+        if resume and start < len(steps):
+            print(f"Resuming run {resume} at step '{steps[start]}'")
+        elif resume:
+            print(f"Run {resume} already complete; nothing to resume")
 
-def run_pipeline():
-    mlflow.set_experiment("boston_housing_pipeline")
+        step_spans = {}
 
-    with mlflow.start_run(run_name="full_python_run"):
+        def pending(step):
+            if step in steps and steps.index(step) >= start:
+                step_spans[step] = span(f"step.{step}", step=step)
+                return True
+            return False
+
+        def checkpoint(step):
+            for name in STEP_OUTPUTS[step]:
+                log_output(name)
+            if not in_memory:
+                journal.complete(
+                    step, {name: paths[name] for name in STEP_OUTPUTS[step]}
+                )
+            step_spans.pop(step).end()
 
         # ----------------------------------------------------
-        # 1. DATA EXTRACTION - Use local data directly
-        # (Skip DVC get since data is already available locally)
+        # 1. DATA EXTRACTION - resolve data/raw_data.csv.dvc via the
+        # local blob cache (hard link on hit, remote fetch on miss)
         # ----------------------------------------------------
-        import shutil
+        if pending("extraction"):
+            data_extraction_component(
+                dvc_repo_url=".",
+                dvc_data_path="data/raw_data.csv",
+                output_csv_path=uris["raw"],
+            )
+            checkpoint("extraction")
 
-        shutil.copy("data/raw_data.csv", "data/raw_local.csv")
-        output_csv = "data/raw_local.csv"
-        mlflow.log_artifact("data/raw_local.csv")
+        # ----------------------------------------------------
+        # 1b. VALIDATION - fail fast before preprocessing/training
+        # ----------------------------------------------------
+        if pending("validation"):
+            data_validation_component(
+                raw_csv_path=uris["raw"],
+                report_output_path=uris["validation"],
+            )
+            checkpoint("validation")
+
+        # ----------------------------------------------------
+        # 1c. CROSS-VALIDATION (optional) - parallel K-fold estimate
+        # ----------------------------------------------------
+        if pending("cross_validation"):
+            model_cross_validation_component(
+                raw_csv_path=uris["raw"],
+                cv_output_path=uris["cv"],
+                n_splits=cv_folds,
+                n_repeats=cv_repeats,
+                estimator=estimator,
+            )
+            log_cv_metrics(read_json(uris["cv"]))
+            checkpoint("cross_validation")
 
         # ----------------------------------------------------
         # 2. PREPROCESSING (run underlying function)
         # ----------------------------------------------------
-        data_preprocessing_component.python_func(
-            raw_csv_path="data/raw_local.csv",
-            train_csv_path="data/train.csv",
-            test_csv_path="data/test.csv",
-        )
-        mlflow.log_artifact("data/train.csv")
-        mlflow.log_artifact("data/test.csv")
+        if pending("preprocessing"):
+            data_preprocessing_component(
+                raw_csv_path=uris["raw"],
+                train_csv_path=uris["train"],
+                test_csv_path=uris["test"],
+                scaler_output_path=uris["scaler"],
+                sketch_output_path=uris["sketch"],
+            )
+            checkpoint("preprocessing")
+
+        # ----------------------------------------------------
+        # 2b. LEARNING CURVE (optional) - parallel subsample sizes
+        # ----------------------------------------------------
+        if pending("learning_curve"):
+            learning_curve_component(
+                train_csv_path=uris["train"],
+                report_output_path=uris["learning_curve"],
+                tolerance=lc_tolerance,
+                estimator=estimator,
+            )
+            report = read_json(uris["learning_curve"])
+            log_learning_curve_metrics(report)
+            persist_choice(report)
+            checkpoint("learning_curve")
 
         # ----------------------------------------------------
         # 3. TRAINING
         # ----------------------------------------------------
-        model_path = model_training_component.python_func(
-            train_csv_path="data/train.csv", model_output_path="models/rf_model.joblib"
-        )
-        mlflow.log_artifact("models/rf_model.joblib")
+        if pending("training"):
+            if "max_rows" in logged_params:
+                # A resumed run keeps the sample size it was started with
+                max_rows = int(logged_params["max_rows"])
+            else:
+                max_rows = load_choice(estimator=estimator) if subsample else 0
+                mlflow.log_param("max_rows", max_rows)
+            model_training_component(
+                train_csv_path=uris["train"],
+                model_output_path=uris["model"],
+                oob_score=importance,
+                estimator=estimator,
+                max_rows=max_rows,
+            )
+            checkpoint("training")
+
+        # ----------------------------------------------------
+        # 3b. EXPORT - flat NumPy-only forest for fast cold starts
+        # ----------------------------------------------------
+        if pending("export"):
+            model_export_component(
+                model_path=uris["model"],
+                test_csv_path=uris["test"],
+                flat_model_output_path=uris["flat_model"],
+            )
+            checkpoint("export")
+
+        # ----------------------------------------------------
+        # 3c. COMPACTION (optional) - float32, pruned, deduplicated model
+        # ----------------------------------------------------
+        if pending("compaction"):
+            model_compaction_component(
+                model_path=uris["model"],
+                test_csv_path=uris["test"],
+                compact_model_output_path=uris["compact_model"],
+                report_output_path=uris["compaction"],
+                max_depth=compact_max_depth,
+                min_samples_leaf=compact_min_samples_leaf,
+            )
+            log_compaction_metrics(read_json(uris["compaction"]))
+            checkpoint("compaction")
 
         # ----------------------------------------------------
         # 4. EVALUATION
         # ----------------------------------------------------
-        metrics_path = model_evaluation_component.python_func(
-            model_path="models/rf_model.joblib",
-            test_csv_path="data/test.csv",
-            metrics_output_path="metrics/metrics.json",
-        )
-        mlflow.log_artifact("metrics/metrics.json")
+        if pending("evaluation"):
+            model_evaluation_component(
+                model_path=uris["model"],
+                test_csv_path=uris["test"],
+                metrics_output_path=uris["metrics"],
+            )
 
-        # Log metrics to MLflow
-        import json
+            # Log metrics to MLflow
+            metrics = read_json(uris["metrics"])
+            for k, v in metrics.items():
+                mlflow.log_metric(k, v)
 
-        metrics = json.load(open("metrics/metrics.json"))
-        for k, v in metrics.items():
-            mlflow.log_metric(k, v)
+            ModelRegistry().register(
+                run.info.run_id,
+                persist(uris["model"], paths["model"], "model"),
+                metrics,
+            )
+            if promote:
+                ModelRegistry().promote(run.info.run_id)
+            checkpoint("evaluation")
+
+        # ----------------------------------------------------
+        # 5. FEATURE IMPORTANCE (optional)
+        # ----------------------------------------------------
+        if pending("importance"):
+            model_importance_component(
+                model_path=uris["model"],
+                test_csv_path=uris["test"],
+                importance_output_path=uris["importance"],
+            )
+            log_importance_metrics(read_json(uris["importance"]))
+            checkpoint("importance")
+
+        # ----------------------------------------------------
+        # 6. FEATURE PRUNING (optional) - full vs. reduced benchmark
+        # ----------------------------------------------------
+        if pending("pruning"):
+            report = compare_feature_sets(
+                uris["raw"],
+                workdir=os.path.join(workspace, PRUNED_MODEL_DIR),
+                tolerance=prune_tolerance,
+                estimator=estimator,
+            )
+            write_json(report, uris["pruning"])
+            log_pruning_metrics(report)
+            if report["accepted"]:
+                mlflow.log_artifact(report["pruned"]["model_path"])
+            checkpoint("pruning")
+
+        # ----------------------------------------------------
+        # 7. PER-SLICE MODELS (optional) - parallel fan-out + weighted summary
+        # ----------------------------------------------------
+        if pending("slicing"):
+            summary = fan_out(
+                uris["raw"],
+                slice_column,
+                os.path.join(workspace, SLICE_DIR),
+                n_jobs=slice_jobs,
+            )
+            write_json(summary, uris["slices"])
+            log_slice_metrics(summary)
+            checkpoint("slicing")
 
     print("Pipeline successfully executed — check MLflow UI at http://127.0.0.1:5000")
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Run the pipeline locally with MLflow")
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="pass data between stages in memory; only persist the model and metrics",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="reattach to an MLflow run and continue from its first incomplete step",
+    )
+    parser.add_argument(
+        "--cv-folds",
+        type=int,
+        default=0,
+        help="also run parallel K-fold cross-validation with this many folds",
+    )
+    parser.add_argument("--cv-repeats", type=int, default=1)
+    parser.add_argument(
+        "--importance",
+        action="store_true",
+        help="compute impurity, OOB and permutation feature importance",
+    )
+    parser.add_argument(
+        "--prune-tolerance",
+        type=float,
+        default=None,
+        help="benchmark a pruned-feature model; accept it within this relative MSE increase",
+    )
+    parser.add_argument(
+        "--promote",
+        action="store_true",
+        help="point the registry's production alias at this run's model",
+    )
+    parser.add_argument(
+        "--slice-column",
+        help="also train one model per value of this column (e.g. RAD) in parallel",
+    )
+    parser.add_argument("--slice-jobs", type=int, default=None)
+    parser.add_argument(
+        "--estimator",
+        choices=sorted(ESTIMATORS),
+        default=DEFAULT_ESTIMATOR,
+        help="training backend",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="also write a compact float32 model and log its size/latency/MSE report",
+    )
+    parser.add_argument(
+        "--compact-max-depth", type=int, default=0, help="0 keeps every level"
+    )
+    parser.add_argument("--compact-min-samples-leaf", type=int, default=1)
+    parser.add_argument(
+        "--learning-curve",
+        action="store_true",
+        help="fit increasing subsamples in parallel and persist the smallest good size",
+    )
+    parser.add_argument(
+        "--lc-tolerance",
+        type=float,
+        default=0.02,
+        help="accepted relative MSE increase over the best learning-curve size",
+    )
+    parser.add_argument(
+        "--full-data",
+        action="store_true",
+        help="train on every row even if a sample size was persisted",
+    )
+    parser.add_argument(
+        "--isolated",
+        action="store_true",
+        help=f"write outputs under {WORKSPACE_ROOT}/<run ID>/ so runs can execute concurrently",
+    )
+    args = parser.parse_args()
+    run_pipeline(
+        in_memory=args.in_memory,
+        resume=args.resume,
+        cv_folds=args.cv_folds,
+        cv_repeats=args.cv_repeats,
+        importance=args.importance,
+        prune_tolerance=args.prune_tolerance,
+        promote=args.promote,
+        slice_column=args.slice_column,
+        slice_jobs=args.slice_jobs,
+        estimator=args.estimator,
+        compact=args.compact,
+        compact_max_depth=args.compact_max_depth,
+        compact_min_samples_leaf=args.compact_min_samples_leaf,
+        learning_curve=args.learning_curve,
+        lc_tolerance=args.lc_tolerance,
+        subsample=not args.full_data,
+        isolated=args.isolated,
+    )
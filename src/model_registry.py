@@ -0,0 +1,311 @@
+"""
+Local model registry keyed by MLflow run ID.
+
+Layout (under ``model_registry/``)::
+
+    versions/<run_id>/model.joblib     immutable once published
+    versions/<run_id>/metadata.json    metrics, checksum, registration time
+    aliases.json                       {"aliases": {...}, "history": {...}}
+
+Versions are staged in a temporary directory and published with a single
+``rename``, and the alias file is swapped with ``os.replace``, so readers
+never observe a half-written model. Alias moves are read-modify-writes under
+a file lock (``aliases.json.lock``), so concurrent runs never lose one.
+``get_model`` returns a process-wide cached handle that reloads in the
+background when the alias moves and swaps the new model in atomically.
+
+Usage:
+    python -m src.model_registry list
+    python -m src.model_registry register <run_id> models/rf_model.joblib metrics/metrics.json
+    python -m src.model_registry promote <run_id>
+    python -m src.model_registry rollback
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from src.run_state import sha256sum
+
+REGISTRY_ROOT = "model_registry"
+PRODUCTION = "production"
+# Alias stamp before the first get() (None means "no alias file")
+_UNSEEN = object()
+
+
+class ModelRegistry:
+    """Versioned models with movable aliases (e.g. ``production``)."""
+
+    def __init__(self, root=REGISTRY_ROOT):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.aliases_path = os.path.join(root, "aliases.json")
+
+    def version_dir(self, run_id):
+        return os.path.join(self.versions_dir, run_id)
+
+    def model_path(self, run_id):
+        return os.path.join(self.version_dir(run_id), "model.joblib")
+
+    def register(self, run_id, model_path, metrics=None):
+        """Publish ``model_path`` as version ``run_id`` (no-op if already registered)."""
+        target = self.version_dir(run_id)
+        if os.path.exists(target):
+            return target
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.versions_dir, prefix=".staging-")
+        try:
+            shutil.copyfile(model_path, os.path.join(staging, "model.joblib"))
+            metadata = {
+                "run_id": run_id,
+                "registered_at": time.time(),
+                "source": model_path,
+                "sha256": sha256sum(model_path),
+                "metrics": metrics or {},
+            }
+            with open(os.path.join(staging, "metadata.json"), "w") as f:
+                json.dump(metadata, f, indent=2)
+            os.rename(staging, target)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.exists(target):
+                raise
+        return target
+
+    def metadata(self, run_id):
+        with open(os.path.join(self.version_dir(run_id), "metadata.json")) as f:
+            return json.load(f)
+
+    def versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        entries = [
+            self.metadata(d)
+            for d in os.listdir(self.versions_dir)
+            if not d.startswith(".")
+        ]
+        return sorted(entries, key=lambda m: m["registered_at"])
+
+    def _read_aliases(self):
+        if not os.path.exists(self.aliases_path):
+            return {"aliases": {}, "history": {}}
+        with open(self.aliases_path) as f:
+            return json.load(f)
+
+    def _write_aliases(self, state):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.aliases_path)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the aliases across threads and processes."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(f"{self.aliases_path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def resolve(self, alias=PRODUCTION):
+        """Run ID the alias currently points at (None if unset)."""
+        return self._read_aliases()["aliases"].get(alias)
+
+    def promote(self, run_id, alias=PRODUCTION):
+        if not os.path.exists(self.version_dir(run_id)):
+            raise KeyError(f"Run {run_id} is not registered")
+        with self._locked():
+            state = self._read_aliases()
+            current = state["aliases"].get(alias)
+            if current == run_id:
+                return run_id
+            if current:
+                state["history"].setdefault(alias, []).append(current)
+            state["aliases"][alias] = run_id
+            self._write_aliases(state)
+        return run_id
+
+    def rollback(self, alias=PRODUCTION):
+        """Point the alias back at its previous version."""
+        with self._locked():
+            state = self._read_aliases()
+            history = state["history"].get(alias, [])
+            if not history:
+                raise ValueError(f"No earlier version to roll '{alias}' back to")
+            state["aliases"][alias] = history.pop()
+            self._write_aliases(state)
+        return state["aliases"][alias]
+
+
+class ModelHandle:
+    """Lazily loaded model for an alias that hot-swaps when the alias moves.
+
+    ``get()`` only stats the alias file; when it changed, the new version is
+    loaded on a background thread while callers keep the current model, and
+    the reference is swapped once loading has finished. A failed load is
+    retried by a later ``get()`` after ``retry_seconds``, doubling per
+    consecutive failure of the same version (up to ``max_retry_seconds``).
+    """
+
+    def __init__(
+        self,
+        registry,
+        alias=PRODUCTION,
+        loader=None,
+        retry_seconds=1.0,
+        max_retry_seconds=60.0,
+    ):
+        self.registry = registry
+        self.alias = alias
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._loader = loader or _joblib_load
+        self._lock = threading.Lock()
+        self._current = None  # (run_id, model)
+        self._alias_stamp = _UNSEEN
+        self._wanted = None
+        self._reloading = False
+        self._failure = None  # (run_id, consecutive failures, retry at)
+
+    @property
+    def run_id(self):
+        current = self._current
+        return current[0] if current else None
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.registry.aliases_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self, run_id):
+        model = self._loader(self.registry.model_path(run_id))
+        with self._lock:
+            self._current = (run_id, model)
+
+    def _maybe_reload(self):
+        with self._lock:
+            if self._reloading or self._current[0] == self._wanted:
+                return
+            failure = self._failure
+            if failure and failure[0] == self._wanted and time.monotonic() < failure[2]:
+                return
+            self._reloading = True
+            run_id = self._wanted
+        threading.Thread(target=self._reload, args=(run_id,), daemon=True).start()
+
+    def _reload(self, run_id):
+        try:
+            self._load(run_id)
+        except Exception as e:
+            print(f"✗ Failed to load model {run_id} for '{self.alias}': {e}")
+            with self._lock:
+                failures = 1
+                if self._failure and self._failure[0] == run_id:
+                    failures += self._failure[1]
+                delay = min(
+                    self.retry_seconds * 2 ** (failures - 1), self.max_retry_seconds
+                )
+                self._failure = (run_id, failures, time.monotonic() + delay)
+            return
+        finally:
+            with self._lock:
+                self._reloading = False
+        with self._lock:
+            self._failure = None
+        # The alias may have moved again while this version was loading
+        self._maybe_reload()
+
+    def get(self):
+        stamp = self._stamp()
+        with self._lock:
+            if stamp != self._alias_stamp:
+                self._wanted = self.registry.resolve(self.alias)
+                self._alias_stamp = stamp
+            wanted, current = self._wanted, self._current
+        if wanted is None:
+            raise LookupError(f"Alias '{self.alias}' is not set")
+        if current is None:
+            self._load(wanted)
+        elif current[0] != wanted:
+            self._maybe_reload()
+        return self._current[1]
+
+    def get_versioned(self):
+        """Return ``(run_id, model)`` as one consistent pair."""
+        self.get()
+        return self._current
+
+    def predict(self, X):
+        return self.get().predict(X)
+
+
+def _joblib_load(path):
+    import joblib
+
+    return joblib.load(path)
+
+
+_HANDLES = {}
+_HANDLES_LOCK = threading.Lock()
+
+
+def get_model(alias=PRODUCTION, root=REGISTRY_ROOT):
+    """Process-wide cached handle for ``alias``."""
+    key = (os.path.abspath(root), alias)
+    with _HANDLES_LOCK:
+        if key not in _HANDLES:
+            _HANDLES[key] = ModelHandle(ModelRegistry(root), alias)
+        return _HANDLES[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local model registry")
+    parser.add_argument("--root", default=REGISTRY_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list registered versions")
+    reg = sub.add_parser("register", help="register a model under a run ID")
+    reg.add_argument("run_id")
+    reg.add_argument("model_path")
+    reg.add_argument("metrics_path", nargs="?")
+    promote = sub.add_parser("promote", help="point an alias at a version")
+    promote.add_argument("run_id")
+    promote.add_argument("--alias", default=PRODUCTION)
+    rollback = sub.add_parser("rollback", help="move an alias back one version")
+    rollback.add_argument("--alias", default=PRODUCTION)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "list":
+        aliases = registry._read_aliases()["aliases"]
+        for meta in registry.versions():
+            tags = [a for a, rid in aliases.items() if rid == meta["run_id"]]
+            metrics = ", ".join(f"{k}={v:.4f}" for k, v in meta["metrics"].items())
+            print(f"{meta['run_id']}  {metrics}  {' '.join(tags)}")
+    elif args.command == "register":
+        metrics = None
+        if args.metrics_path:
+            with open(args.metrics_path) as f:
+                metrics = json.load(f)
+        print(
+            f"✓ Registered {registry.register(args.run_id, args.model_path, metrics)}"
+        )
+    elif args.command == "promote":
+        registry.promote(args.run_id, args.alias)
+        print(f"✓ {args.alias} -> {args.run_id}")
+    else:
+        print(f"✓ {args.alias} -> {registry.rollback(args.alias)}")
+
+
+if __name__ == "__main__":
+    main()
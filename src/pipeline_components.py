@@ -1,175 +1,437 @@
-from kfp import dsl
+"""
+KFP component definitions.
+
+The step implementations live in ``src.components`` (importable without the
+KFP SDK, which is what the local runner uses) and work on plain file paths.
+This module wraps each one as a lightweight component whose data flows
+through typed artifacts (``Input[Dataset]``, ``Output[Model]``, ...): KFP
+stores every output in the pipeline root and mounts it into the pods that
+consume it, so stages never rely on a shared ``/tmp``. Component specs are
+written to ``components/<name>.yaml``. Components of the main pipeline take
+a ``trace_parent`` that joins their span to the pipeline trace
+(``src.tracing``).
+"""
+
+import functools
+import os
+from typing import List, Optional
 
+from kfp import dsl
+from kfp.dsl import Artifact, Dataset, Input, Metrics, Model, Output
 
-@dsl.component(
-    base_image="python:3.11",
-    packages_to_install=[
-        "pandas==2.2.3",
-        "numpy==2.2.3",
-        "scikit-learn==1.6.1",
-        "joblib==1.4.2",
-    ],
-    output_component_file="components/data_extraction_component.yaml",
+# Image built from the repo Dockerfile; ships src/ so components can share code.
+COMPONENT_IMAGE = os.environ.get(
+    "COMPONENT_IMAGE", "abdsipra/mlops-kubeflow-components:latest"
 )
+PACKAGES = [
+    "pandas==2.2.3",
+    "numpy==2.2.3",
+    "scikit-learn==1.6.1",
+    "joblib==1.4.2",
+]
+# Parquet output of the batch scoring component
+SCORING_PACKAGES = PACKAGES + ["pyarrow==19.0.1"]
+
+
+def _component(func, packages=PACKAGES):
+    return dsl.component(
+        base_image=COMPONENT_IMAGE,
+        packages_to_install=packages,
+        output_component_file=f"components/{func.__name__}.yaml",
+    )(func)
+
+
+@_component
 def data_extraction_component(
     dvc_repo_url: str,
     dvc_data_path: str,
-    output_csv_path: str,
-) -> str:
-    """Extract/load the dataset (simplified version without DVC)."""
-    import os
-    import pandas as pd
-
-    os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
-
-    # Create sample Boston Housing dataset directly
-    data = {
-        "CRIM": [0.00632, 0.02731, 0.02729, 0.03237, 0.06905],
-        "ZN": [18.0, 0.0, 0.0, 0.0, 0.0],
-        "INDUS": [2.31, 7.07, 7.07, 2.18, 2.18],
-        "CHAS": [0, 0, 0, 0, 0],
-        "NOX": [0.538, 0.469, 0.469, 0.458, 0.458],
-        "RM": [6.575, 6.421, 7.185, 6.998, 7.147],
-        "AGE": [65.2, 78.9, 61.1, 45.8, 54.2],
-        "DIS": [4.09, 4.9671, 4.9671, 6.0622, 6.0622],
-        "RAD": [1, 2, 2, 3, 3],
-        "TAX": [296, 242, 242, 222, 222],
-        "PTRATIO": [15.3, 17.8, 17.8, 18.7, 18.7],
-        "B": [396.9, 396.9, 392.83, 394.63, 396.9],
-        "LSTAT": [4.98, 9.14, 4.03, 2.94, 5.33],
-        "MEDV": [24.0, 21.6, 34.7, 33.4, 36.2],
-    }
-
-    df = pd.DataFrame(data)
-    df.to_csv(output_csv_path, index=False)
-
-    return output_csv_path
-
-
-@dsl.component(
-    base_image="python:3.11",
-    packages_to_install=[
-        "pandas==2.2.3",
-        "numpy==2.2.3",
-        "scikit-learn==1.6.1",
-        "joblib==1.4.2",
-    ],
-    output_component_file="components/data_preprocessing_component.yaml",
-)
+    raw_data: Output[Dataset],
+    dvc_cache_dir: str = "",
+    dvc_remote_url: str = "",
+    fetch_workers: int = 8,
+    trace_parent: str = "",
+):
+    """Materialize the DVC-tracked dataset as the ``raw_data`` artifact."""
+    from src.components import data_extraction_component
+    from src.tracing import component_span
+
+    with component_span("data_extraction_component", trace_parent):
+        data_extraction_component(
+            dvc_repo_url=dvc_repo_url,
+            dvc_data_path=dvc_data_path,
+            output_csv_path=raw_data.path,
+            dvc_cache_dir=dvc_cache_dir,
+            dvc_remote_url=dvc_remote_url,
+            fetch_workers=fetch_workers,
+        )
+
+
+@_component
+def data_validation_component(
+    raw_data: Input[Dataset],
+    validation_report: Output[Artifact],
+    reference_stats_path: str = "",
+    max_psi: float = 0.2,
+    chunk_rows: int = 100000,
+    trace_parent: str = "",
+):
+    """Validate ``raw_data``; the task fails (and gates downstream steps) on errors."""
+    from src.components import data_validation_component
+    from src.tracing import component_span
+
+    with component_span("data_validation_component", trace_parent):
+        data_validation_component(
+            raw_csv_path=raw_data.path,
+            report_output_path=validation_report.path,
+            reference_stats_path=reference_stats_path,
+            max_psi=max_psi,
+            chunk_rows=chunk_rows,
+        )
+
+
+@_component
 def data_preprocessing_component(
-    raw_csv_path: str,
-    train_csv_path: str,
-    test_csv_path: str,
+    raw_data: Input[Dataset],
+    train_data: Output[Dataset],
+    test_data: Output[Dataset],
+    scaler: Output[Artifact],
+    reference_sketch: Output[Artifact],
     test_size: float = 0.2,
     random_state: int = 42,
-) -> str:
-    """Clean data, scale features, and create train/test splits."""
-    import os
-    import pandas as pd
-    import numpy as np
-    from sklearn.preprocessing import StandardScaler
-    from sklearn.model_selection import train_test_split
-
-    os.makedirs(os.path.dirname(train_csv_path), exist_ok=True)
-
-    df = pd.read_csv(raw_csv_path)
-    X = df.drop("MEDV", axis=1).values
-    y = df["MEDV"].values
-
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=test_size, random_state=random_state
+    compact_dtypes: bool = True,
+    feature_columns: str = "",
+    trace_parent: str = "",
+):
+    """Scale and split ``raw_data``; ``scaler`` keeps the fitted scaling for scoring.
+
+    ``reference_sketch`` holds the training histograms drift is monitored against.
+    """
+    from src.components import data_preprocessing_component
+    from src.tracing import component_span
+
+    with component_span("data_preprocessing_component", trace_parent):
+        data_preprocessing_component(
+            raw_csv_path=raw_data.path,
+            train_csv_path=train_data.path,
+            test_csv_path=test_data.path,
+            test_size=test_size,
+            random_state=random_state,
+            compact_dtypes=compact_dtypes,
+            feature_columns=feature_columns,
+            scaler_output_path=scaler.path,
+            sketch_output_path=reference_sketch.path,
+        )
+
+
+@_component
+def model_cross_validation_component(
+    raw_data: Input[Dataset],
+    cv_report: Output[Artifact],
+    n_splits: int = 5,
+    n_repeats: int = 1,
+    estimator: str = "random_forest",
+    n_estimators: int = 100,
+    random_state: int = 42,
+    n_jobs: int = 0,
+):
+    """Parallel repeated K-fold evaluation of ``raw_data`` with ``estimator``."""
+    from src.components import model_cross_validation_component
+
+    model_cross_validation_component(
+        raw_csv_path=raw_data.path,
+        cv_output_path=cv_report.path,
+        n_splits=n_splits,
+        n_repeats=n_repeats,
+        estimator=estimator,
+        n_estimators=n_estimators,
+        random_state=random_state,
+        n_jobs=n_jobs,
     )
 
-    columns = df.drop("MEDV", axis=1).columns.tolist()
-    train_arr = np.hstack((X_train, y_train.reshape(-1, 1)))
-    test_arr = np.hstack((X_test, y_test.reshape(-1, 1)))
-    columns.append("MEDV")
-
-    train_df = pd.DataFrame(train_arr, columns=columns)
-    test_df = pd.DataFrame(test_arr, columns=columns)
 
-    train_df.to_csv(train_csv_path, index=False)
-    test_df.to_csv(test_csv_path, index=False)
-
-    return train_csv_path
+@_component
+def learning_curve_component(
+    train_data: Input[Dataset],
+    learning_curve: Output[Artifact],
+    fractions: str = "0.1,0.2,0.3,0.5,0.7,1.0",
+    n_repeats: int = 3,
+    tolerance: float = 0.02,
+    validation_size: float = 0.2,
+    estimator: str = "random_forest",
+    n_estimators: int = 100,
+    random_state: int = 42,
+    n_jobs: int = 0,
+) -> int:
+    """Learning curve over subsample sizes; returns the recommended ``max_rows``."""
+    from src.components import learning_curve_component
+
+    return learning_curve_component(
+        train_csv_path=train_data.path,
+        report_output_path=learning_curve.path,
+        fractions=fractions,
+        n_repeats=n_repeats,
+        tolerance=tolerance,
+        validation_size=validation_size,
+        estimator=estimator,
+        n_estimators=n_estimators,
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
 
 
-@dsl.component(
-    base_image="python:3.11",
-    packages_to_install=[
-        "pandas==2.2.3",
-        "numpy==2.2.3",
-        "scikit-learn==1.6.1",
-        "joblib==1.4.2",
-    ],
-    output_component_file="components/model_training_component.yaml",
-)
+@_component
 def model_training_component(
-    train_csv_path: str,
-    model_output_path: str,
+    train_data: Input[Dataset],
+    model: Output[Model],
     n_estimators: int = 100,
     random_state: int = 42,
-) -> str:
-    """Train a Random Forest model on the training data."""
+    oob_score: bool = False,
+    n_jobs: int = 1,
+    estimator: str = "random_forest",
+    max_rows: int = 0,
+    trace_parent: str = "",
+):
+    """Train the ``estimator`` backend on ``train_data`` (``max_rows`` > 0: a subsample)."""
+    from src.components import model_training_component
+    from src.tracing import component_span
+
+    with component_span("model_training_component", trace_parent):
+        model_training_component(
+            train_csv_path=train_data.path,
+            model_output_path=model.path,
+            n_estimators=n_estimators,
+            random_state=random_state,
+            oob_score=oob_score,
+            n_jobs=n_jobs,
+            estimator=estimator,
+            max_rows=max_rows,
+        )
+    model.metadata["framework"] = "scikit-learn"
+    model.metadata["estimator"] = estimator
+    model.metadata["format"] = "joblib"
+
+
+@_component
+def model_export_component(
+    model: Input[Model],
+    test_data: Input[Dataset],
+    flat_model: Output[Model],
+    trace_parent: str = "",
+):
+    """Export ``model`` to the flat NumPy-only format (parity-checked on ``test_data``)."""
     import os
-    import pandas as pd
-    import joblib
-    from sklearn.ensemble import RandomForestRegressor
 
-    os.makedirs(os.path.dirname(model_output_path), exist_ok=True)
+    from src.components import model_export_component
+    from src.tracing import component_span
+
+    with component_span("model_export_component", trace_parent):
+        model_export_component(
+            model_path=model.path,
+            test_csv_path=test_data.path,
+            flat_model_output_path=flat_model.path + ".npz",
+        )
+    # Artifact paths carry no extension; keep the file at the artifact path
+    os.replace(flat_model.path + ".npz", flat_model.path)
+    flat_model.metadata["format"] = "npz"
+
+
+@_component
+def model_compaction_component(
+    model: Input[Model],
+    train_data: Input[Dataset],
+    test_data: Input[Dataset],
+    compact_model: Output[Model],
+    compaction_report: Output[Artifact],
+    max_depth: int = 0,
+    min_samples_leaf: int = 1,
+    retrain: bool = False,
+    trace_parent: str = "",
+):
+    """Prune (or, with ``retrain``, refit) ``model`` into a float32 flat model."""
+    import os
 
-    df = pd.read_csv(train_csv_path)
-    X_train = df.drop("MEDV", axis=1).values
-    y_train = df["MEDV"].values
+    from src.components import model_compaction_component
+    from src.tracing import component_span
+
+    with component_span("model_compaction_component", trace_parent):
+        model_compaction_component(
+            model_path=model.path,
+            test_csv_path=test_data.path,
+            compact_model_output_path=compact_model.path + ".npz",
+            report_output_path=compaction_report.path,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            train_csv_path=train_data.path if retrain else "",
+        )
+    # Artifact paths carry no extension; keep the file at the artifact path
+    os.replace(compact_model.path + ".npz", compact_model.path)
+    compact_model.metadata["format"] = "npz"
+
+
+@_component
+def model_evaluation_component(
+    model: Input[Model],
+    test_data: Input[Dataset],
+    metrics: Output[Metrics],
+    interval_coverage: float = 0.9,
+    n_jobs: int = 0,
+    trace_parent: str = "",
+):
+    """Score ``model`` on ``test_data``; metrics are also shown in the KFP UI.
+
+    For forests they include the coverage of the per-tree prediction intervals.
+    """
+    import json
 
-    model = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state)
-    model.fit(X_train, y_train)
+    from src.components import model_evaluation_component
+    from src.tracing import component_span
+
+    with component_span("model_evaluation_component", trace_parent):
+        model_evaluation_component(
+            model_path=model.path,
+            test_csv_path=test_data.path,
+            metrics_output_path=metrics.path,
+            interval_coverage=interval_coverage,
+            n_jobs=n_jobs,
+        )
+    with open(metrics.path) as f:
+        for name, value in json.load(f).items():
+            metrics.log_metric(name, value)
+
+
+@_component
+def model_importance_component(
+    model: Input[Model],
+    test_data: Input[Dataset],
+    importance_report: Output[Artifact],
+    n_repeats: int = 10,
+    random_state: int = 42,
+    n_jobs: int = 0,
+):
+    """Impurity, out-of-bag and permutation importance of ``model``."""
+    from src.components import model_importance_component
+
+    model_importance_component(
+        model_path=model.path,
+        test_csv_path=test_data.path,
+        importance_output_path=importance_report.path,
+        n_repeats=n_repeats,
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
 
-    joblib.dump(model, model_output_path)
 
-    return model_output_path
+@_component
+def data_slicing_component(
+    raw_data: Input[Dataset],
+    slices: Output[Dataset],
+    slice_column: str,
+    min_rows: int = 20,
+) -> List[str]:
+    """Write one CSV per slice into the ``slices`` directory; returns the slice names."""
+    import os
 
+    from src.components import data_slicing_component
 
-@dsl.component(
-    base_image="python:3.11",
-    packages_to_install=[
-        "pandas==2.2.3",
-        "numpy==2.2.3",
-        "scikit-learn==1.6.1",
-        "joblib==1.4.2",
-    ],
-    output_component_file="components/model_evaluation_component.yaml",
-)
-def model_evaluation_component(
-    model_path: str,
-    test_csv_path: str,
-    metrics_output_path: str,
-) -> str:
-    """Evaluate the trained model on the test set and save metrics."""
-    import os
-    import json
-    import pandas as pd
-    import joblib
-    from sklearn.metrics import mean_squared_error, r2_score
+    paths = data_slicing_component(
+        raw_csv_path=raw_data.path,
+        slice_column=slice_column,
+        output_dir=slices.path,
+        min_rows=min_rows,
+    )
+    return [os.path.splitext(os.path.basename(p))[0] for p in paths]
 
-    os.makedirs(os.path.dirname(metrics_output_path), exist_ok=True)
 
-    df = pd.read_csv(test_csv_path)
-    X_test = df.drop("MEDV", axis=1).values
-    y_test = df["MEDV"].values
+@_component
+def slice_training_component(
+    slices: Input[Dataset],
+    slice_name: str,
+    metrics: Output[Metrics],
+    test_size: float = 0.2,
+    n_estimators: int = 100,
+    random_state: int = 42,
+    n_jobs: int = 1,
+):
+    """Preprocess, train and evaluate one slice of the ``slices`` directory."""
+    import os
+    import tempfile
+
+    from src.components import slice_training_component
+
+    slice_training_component(
+        slice_csv_path=os.path.join(slices.path, f"{slice_name}.csv"),
+        metrics_output_path=metrics.path,
+        workdir=tempfile.mkdtemp(),
+        test_size=test_size,
+        n_estimators=n_estimators,
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
+    metrics.metadata["slice"] = slice_name
 
-    model = joblib.load(model_path)
-    y_pred = model.predict(X_test)
 
-    mse = mean_squared_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
+@_component
+def metrics_aggregation_component(
+    metrics: Input[List[Metrics]],
+    summary: Output[Metrics],
+):
+    """Merge the per-slice metrics into one summary weighted by test rows."""
+    import json
 
-    metrics = {"MSE": mse, "R2": r2}
+    from src.components import metrics_aggregation_component
 
-    with open(metrics_output_path, "w") as f:
-        json.dump(metrics, f, indent=2)
+    metrics_aggregation_component(
+        metrics_paths=[m.path for m in metrics],
+        summary_output_path=summary.path,
+    )
+    with open(summary.path) as f:
+        for name, value in json.load(f)["weighted"].items():
+            summary.log_metric(f"weighted_{name}", value)
+
+
+@functools.partial(_component, packages=SCORING_PACKAGES)
+def batch_scoring_component(
+    input_data: Input[Dataset],
+    flat_model: Input[Model],
+    scaler: Input[Artifact],
+    predictions: Output[Dataset],
+    drift_report: Output[Metrics],
+    reference_sketch: Optional[Input[Artifact]] = None,
+    n_jobs: int = 0,
+    chunk_bytes: int = 8388608,
+):
+    """Score unlabeled ``input_data`` into a Parquet ``predictions`` dataset.
+
+    With the preprocessing ``reference_sketch`` the inputs and predictions
+    are monitored for drift; ``drift_report`` holds the PSI report and shows
+    the PSI per column in the KFP UI (empty without a sketch).
+    """
+    import json
+    import math
+    import os
 
-    return metrics_output_path
+    from src.components import batch_scoring_component
+
+    batch_scoring_component(
+        input_csv_path=input_data.path,
+        model_path=flat_model.path,
+        scaler_path=scaler.path,
+        predictions_output_path=predictions.path + ".parquet",
+        n_jobs=n_jobs,
+        chunk_bytes=chunk_bytes,
+        reference_sketch_path=reference_sketch.path if reference_sketch else "",
+        drift_output_path=drift_report.path,
+    )
+    # Artifact paths carry no extension; keep the file at the artifact path
+    os.replace(predictions.path + ".parquet", predictions.path)
+    predictions.metadata["format"] = "parquet"
+    if not reference_sketch:
+        with open(drift_report.path, "w") as f:
+            json.dump({}, f)
+        return
+    with open(drift_report.path) as f:
+        report = json.load(f)
+    for column, value in report["psi"].items():
+        if math.isfinite(value):
+            drift_report.log_metric(f"psi_{column}", value)
+    drift_report.log_metric("drifted_columns", len(report["drifted"]))
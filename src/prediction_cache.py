@@ -0,0 +1,269 @@
+"""
+Prediction cache for repeated inference inputs.
+
+Rows are keyed on a hash of the quantized (already scaled) feature vector
+and the model version, so near-identical vectors share an entry and a new
+model never serves stale predictions. Entries are evicted LRU-first beyond
+``max_entries`` and expire after ``ttl`` seconds; the cache can be persisted
+to an ``.npz`` file and reloaded by the next process.
+
+``CachedPredictor`` sits in front of a registry alias (``get_model``) and
+drops the cache as soon as a newly promoted version is swapped in, or in
+front of a plain joblib file (versioned by its checksum).
+
+Usage:
+    python -m src.prediction_cache data/test.csv --model models/rf_model.joblib --repeats 5
+    python -m src.prediction_cache data/test.csv --alias production --persist cache.npz
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+KEY_BYTES = 16
+QUANTUM = 1e-6
+
+
+class PredictionCache:
+    """Thread-safe LRU/TTL map from row keys to predictions."""
+
+    def __init__(self, max_entries=100_000, ttl=None, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()  # key -> (value, stored_at, version)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, keys):
+        """Cached values for ``keys`` (NaN where missing) and the indices of misses."""
+        now = time.time()
+        values = np.full(len(keys), np.nan)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    self.expired += 1
+                    entry = None
+                if entry is None:
+                    missing.append(i)
+                    continue
+                self._entries.move_to_end(key)
+                values[i] = entry[0]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return values, missing
+
+    def put_many(self, keys, values, version):
+        now = time.time()
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (float(value), now, version)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def retain(self, version):
+        """Drop entries stored for any other model version (e.g. after a reload)."""
+        with self._lock:
+            stale = [k for k, v in self._entries.items() if v[2] != version]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+    def save(self, path=None):
+        """Write the entries to ``path`` (``.npz``) atomically."""
+        path = path or self.path
+        with self._lock:
+            items = list(self._entries.items())
+        keys = np.array([k for k, _ in items], dtype=f"S{KEY_BYTES}")
+        values = np.array([v[0] for _, v in items], dtype=np.float64)
+        stored_at = np.array([v[1] for _, v in items], dtype=np.float64)
+        versions = np.array([v[2] for _, v in items], dtype=str)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f, keys=keys, values=values, stored_at=stored_at, versions=versions
+            )
+        os.replace(tmp, path)
+
+    def load(self, path):
+        with np.load(path) as npz:
+            keys, values = npz["keys"], npz["values"]
+            stored_at, versions = npz["stored_at"], npz["versions"]
+        with self._lock:
+            for key, value, ts, version in zip(keys, values, stored_at, versions):
+                self._entries[bytes(key).ljust(KEY_BYTES, b"\0")] = (
+                    float(value),
+                    float(ts),
+                    str(version),
+                )
+
+
+def row_keys(X, version, quantum=QUANTUM):
+    """One hash per row of the quantized feature matrix, salted with ``version``."""
+    q = np.ascontiguousarray(np.round(np.asarray(X, dtype=np.float64) / quantum))
+    q = q.astype(np.int64)
+    salted = hashlib.blake2b(str(version).encode(), digest_size=KEY_BYTES)
+    keys = []
+    for row in q:
+        h = salted.copy()
+        h.update(row.tobytes())
+        keys.append(h.digest())
+    return keys
+
+
+class CachedPredictor:
+    """Model front-end that serves repeated rows from a ``PredictionCache``.
+
+    ``source`` is either a registry ``ModelHandle`` (versioned by run ID; the
+    cache is cleared when a promoted version is swapped in) or a fitted model
+    with an explicit ``version``.
+    """
+
+    def __init__(self, source, cache=None, version=None, quantum=QUANTUM):
+        self.source = source
+        self.cache = cache if cache is not None else PredictionCache()
+        self.quantum = quantum
+        self._static_version = version
+        self._version = None
+        self.lookup_seconds = 0.0
+        self.model_seconds = 0.0
+        self.rows = 0
+
+    @classmethod
+    def from_path(cls, model_path, **kwargs):
+        from src.artifacts import load_model
+        from src.run_state import sha256sum
+
+        return cls(load_model(model_path), version=sha256sum(model_path), **kwargs)
+
+    @classmethod
+    def from_registry(cls, alias="production", root=None, **kwargs):
+        from src.model_registry import REGISTRY_ROOT, get_model
+
+        return cls(get_model(alias, root or REGISTRY_ROOT), **kwargs)
+
+    def _resolve(self):
+        if self._static_version is not None:
+            version, model = self._static_version, self.source
+        else:
+            version, model = self.source.get_versioned()
+        if version != self._version:
+            # New model (e.g. after a promotion): earlier entries are unreachable
+            if self._version is None:
+                self.cache.retain(version)
+            else:
+                self.cache.clear()
+            self._version = version
+        return version, model
+
+    def predict(self, X):
+        X = np.atleast_2d(np.asarray(X))
+        version, model = self._resolve()
+        start = time.perf_counter()
+        keys = row_keys(X, version, self.quantum)
+        out, missing = self.cache.get_many(keys)
+        self.lookup_seconds += time.perf_counter() - start
+        if missing:
+            start = time.perf_counter()
+            predicted = model.predict(X[missing])
+            self.model_seconds += time.perf_counter() - start
+            out[missing] = predicted
+            self.cache.put_many([keys[i] for i in missing], predicted, version)
+        self.rows += len(X)
+        return out
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats["version"] = self._version
+        stats["rows"] = self.rows
+        stats["lookup_us_per_row"] = self.lookup_seconds / max(self.rows, 1) * 1e6
+        stats["model_us_per_miss"] = (
+            self.model_seconds / max(self.cache.misses, 1) * 1e6
+        )
+        return stats
+
+    def log_to_mlflow(self):
+        import mlflow
+
+        for key, value in self.stats().items():
+            if isinstance(value, (int, float)):
+                mlflow.log_metric(f"prediction_cache_{key}", value)
+
+
+def main():
+    from src.artifacts import read_frame
+    from src.schema import PROCESSED_SCHEMA, feature_columns
+
+    parser = argparse.ArgumentParser(
+        description="Replay a scaled CSV through the cache"
+    )
+    parser.add_argument("csv_path", help="scaled feature rows, e.g. data/test.csv")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--model", default="models/rf_model.joblib")
+    source.add_argument("--alias", help="serve a registry alias instead of --model")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--max-entries", type=int, default=100_000)
+    parser.add_argument("--ttl", type=float, default=None, help="seconds")
+    parser.add_argument("--persist", help="load/save the cache at this .npz path")
+    args = parser.parse_args()
+
+    df = read_frame(args.csv_path, schema=PROCESSED_SCHEMA)
+    X = df[feature_columns(df.columns)].to_numpy()
+    cache = PredictionCache(args.max_entries, args.ttl, args.persist)
+    if args.alias:
+        predictor = CachedPredictor.from_registry(args.alias, cache=cache)
+    else:
+        predictor = CachedPredictor.from_path(args.model, cache=cache)
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        for i in range(0, len(X), args.batch_size):
+            predictor.predict(X[i : i + args.batch_size])
+    elapsed = time.perf_counter() - start
+    if args.persist:
+        cache.save()
+
+    stats = predictor.stats()
+    print(
+        f"✓ {stats['rows']} rows in {elapsed:.2f}s: hit rate {stats['hit_rate']:.1%}, "
+        f"lookup {stats['lookup_us_per_row']:.1f} us/row, "
+        f"model {stats['model_us_per_miss']:.1f} us/miss, {stats['entries']} entries"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Importance-driven feature pruning with a side-by-side benchmark.
+
+Low-value columns (by permutation importance on a validation split carved
+from the training split) are dropped, preprocessing and training are re-run
+on the reduced set, and the full and pruned models are compared on the test
+split on MSE/R2, training time, model size and predict latency. The test
+split plays no part in choosing the features. The pruned model is accepted
+when its relative MSE increase stays within the configured tolerance.
+
+Usage:
+    python -m src.pruning data/raw_local.csv --tolerance 0.02 --workdir models/pruned
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def select_features(importance_report, min_importance=0.0, min_features=1):
+    """Keep features whose mean permutation importance exceeds ``min_importance``."""
+    ranking = importance_report["ranking"]
+    perm = importance_report["permutation"]
+    keep = [c for c in ranking if perm[c]["mean"] > min_importance]
+    if len(keep) < min_features:
+        keep = ranking[:min_features]
+    # Preserve schema order for the reduced splits
+    return [c for c in perm if c in keep]
+
+
+def validation_importance(
+    train_csv_path, validation_size=0.25, random_state=42, estimator=None
+):
+    """Permutation importance on a validation split carved from ``train_csv_path``.
+
+    The model is refitted on the rest of the training split.
+    """
+    from sklearn.model_selection import train_test_split
+
+    from src.artifacts import read_frame
+    from src.estimators import DEFAULT_ESTIMATOR, build_estimator
+    from src.importance import compute_importance
+    from src.schema import PROCESSED_SCHEMA, TARGET, feature_columns
+
+    df = read_frame(train_csv_path, schema=PROCESSED_SCHEMA)
+    features = feature_columns(df.columns)
+    fit, val = train_test_split(
+        df, test_size=validation_size, random_state=random_state
+    )
+    model = build_estimator(estimator or DEFAULT_ESTIMATOR, random_state=random_state)
+    model.fit(fit[features].to_numpy(), fit[TARGET].to_numpy())
+    return compute_importance(
+        model,
+        val[features].to_numpy(),
+        val[TARGET].to_numpy(),
+        features,
+        random_state=random_state,
+    )
+
+
+def predict_latency(model, X, repeats=20):
+    """Median latency (seconds) of a batch predict and of a single-row predict."""
+    batch, single = [], []
+    row = X[:1]
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        batch.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        model.predict(row)
+        single.append(time.perf_counter() - start)
+    return float(np.median(batch)), float(np.median(single))
+
+
+def _variant_path(workdir, name, key):
+    return os.path.join(workdir, f"{name}_{key}")
+
+
+def benchmark_variant(raw_csv_path, workdir, name, features=None, **train_kwargs):
+    """Preprocess, train and evaluate one feature set; return its benchmark row."""
+    from src.artifacts import load_model, read_frame
+    from src.components import (
+        data_preprocessing_component,
+        model_training_component,
+        model_evaluation_component,
+    )
+    from src.schema import PROCESSED_SCHEMA, feature_columns
+
+    paths = {
+        key: _variant_path(workdir, name, key)
+        for key in ("train.csv", "test.csv", "model.joblib", "metrics.json")
+    }
+    data_preprocessing_component(
+        raw_csv_path=raw_csv_path,
+        train_csv_path=paths["train.csv"],
+        test_csv_path=paths["test.csv"],
+        feature_columns=",".join(features or []),
+    )
+
+    start = time.perf_counter()
+    model_training_component(
+        train_csv_path=paths["train.csv"],
+        model_output_path=paths["model.joblib"],
+        **train_kwargs,
+    )
+    train_seconds = time.perf_counter() - start
+
+    model_evaluation_component(
+        model_path=paths["model.joblib"],
+        test_csv_path=paths["test.csv"],
+        metrics_output_path=paths["metrics.json"],
+    )
+    with open(paths["metrics.json"]) as f:
+        scores = json.load(f)
+
+    test = read_frame(paths["test.csv"], schema=PROCESSED_SCHEMA)
+    used = feature_columns(test.columns)
+    batch_s, single_s = predict_latency(
+        load_model(paths["model.joblib"]), test[used].to_numpy()
+    )
+    return {
+        "features": used,
+        "MSE": scores["MSE"],
+        "R2": scores["R2"],
+        "train_seconds": train_seconds,
+        "model_bytes": os.path.getsize(paths["model.joblib"]),
+        "predict_batch_seconds": batch_s,
+        "predict_row_seconds": single_s,
+        "model_path": paths["model.joblib"],
+    }
+
+
+def compare_feature_sets(
+    raw_csv_path,
+    workdir=None,
+    tolerance=0.02,
+    min_importance=0.0,
+    validation_size=0.25,
+    **train_kwargs,
+):
+    """Benchmark the full and pruned feature sets side by side.
+
+    ``tolerance`` is the accepted relative MSE increase of the pruned model.
+    The variants' ``model_path`` is only reported when ``workdir`` is given;
+    otherwise their artifacts are written to a temporary directory and removed.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        persistent = bool(workdir)
+        workdir = workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        full = benchmark_variant(raw_csv_path, workdir, "full", **train_kwargs)
+        selection = validation_importance(
+            _variant_path(workdir, "full", "train.csv"),
+            validation_size=validation_size,
+            estimator=train_kwargs.get("estimator"),
+        )
+        keep = select_features(selection, min_importance=min_importance)
+        pruned = benchmark_variant(
+            raw_csv_path, workdir, "pruned", features=keep, **train_kwargs
+        )
+    if not persistent:
+        del full["model_path"], pruned["model_path"]
+
+    mse_increase = (pruned["MSE"] - full["MSE"]) / full["MSE"]
+    return {
+        "full": full,
+        "pruned": pruned,
+        "dropped": [c for c in full["features"] if c not in keep],
+        "selection_importance": {
+            c: stats["mean"] for c, stats in selection["permutation"].items()
+        },
+        "relative_MSE_increase": mse_increase,
+        "tolerance": tolerance,
+        "accepted": mse_increase <= tolerance,
+    }
+
+
+def log_to_mlflow(report):
+    import mlflow
+
+    for variant in ("full", "pruned"):
+        for key in (
+            "MSE",
+            "R2",
+            "train_seconds",
+            "model_bytes",
+            "predict_batch_seconds",
+            "predict_row_seconds",
+        ):
+            mlflow.log_metric(f"pruning_{variant}_{key}", report[variant][key])
+    mlflow.log_metric("pruning_accepted", int(report["accepted"]))
+    mlflow.log_param("pruned_features", ",".join(report["pruned"]["features"]))
+
+
+def print_report(report):
+    rows = (
+        ("features", "{:d}", lambda r: len(r["features"])),
+        ("MSE", "{:.4f}", lambda r: r["MSE"]),
+        ("R2", "{:.4f}", lambda r: r["R2"]),
+        ("train s", "{:.3f}", lambda r: r["train_seconds"]),
+        ("model bytes", "{:d}", lambda r: r["model_bytes"]),
+        ("batch predict ms", "{:.2f}", lambda r: r["predict_batch_seconds"] * 1e3),
+        ("row predict ms", "{:.2f}", lambda r: r["predict_row_seconds"] * 1e3),
+    )
+    print(f"{'':<18}{'full':>14}{'pruned':>14}")
+    for label, fmt, get in rows:
+        print(
+            f"{label:<18}{fmt.format(get(report['full'])):>14}"
+            f"{fmt.format(get(report['pruned'])):>14}"
+        )
+    verdict = "accepted" if report["accepted"] else "rejected"
+    print(
+        f"\nDropped {report['dropped']}; MSE {report['relative_MSE_increase']:+.2%} "
+        f"(tolerance {report['tolerance']:.2%}) -> pruned model {verdict}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importance-driven feature pruning")
+    parser.add_argument("raw_csv_path")
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    parser.add_argument("--min-importance", type=float, default=0.0)
+    parser.add_argument(
+        "--validation-size",
+        type=float,
+        default=0.25,
+        help="fraction of the training split used to select features",
+    )
+    parser.add_argument("--workdir", help="keep the benchmarked artifacts here")
+    parser.add_argument("--output", help="optional path for the JSON report")
+    args = parser.parse_args()
+
+    report = compare_feature_sets(
+        args.raw_csv_path,
+        workdir=args.workdir,
+        tolerance=args.tolerance,
+        min_importance=args.min_importance,
+        validation_size=args.validation_size,
+    )
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
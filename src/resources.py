@@ -0,0 +1,240 @@
+"""
+Per-step resource profiles for the compiled KFP pipeline.
+
+The profile (``pipeline_resources.yaml`` at the repo root, or the file named
+by ``PIPELINE_RESOURCES``) gives every step CPU/memory requests and limits
+and an execution-caching flag. ``apply_resources`` sets them on a task while
+the pipeline is defined, and ``check_compiled`` confirms that the emitted
+``pipeline.yaml`` carries them.
+
+Usage:
+    python -m src.resources check pipeline.yaml
+"""
+
+import argparse
+import math
+import os
+
+DEFAULT_PROFILE_PATH = os.environ.get(
+    "PIPELINE_RESOURCES",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "pipeline_resources.yaml",
+    ),
+)
+# Cores granted to this process by a parent (e.g. src.launcher); caps available_cpus
+CPU_ENV = "PIPELINE_CPUS"
+# Profile step -> component function (KFP names the task after it)
+STEP_COMPONENTS = {
+    "extraction": "data_extraction_component",
+    "validation": "data_validation_component",
+    "preprocessing": "data_preprocessing_component",
+    "training": "model_training_component",
+    "export": "model_export_component",
+    "compaction": "model_compaction_component",
+    "evaluation": "model_evaluation_component",
+    "slicing": "data_slicing_component",
+    "slice_training": "slice_training_component",
+    "aggregation": "metrics_aggregation_component",
+}
+# Steps of each compiled pipeline
+PIPELINE_STEPS = (
+    "extraction",
+    "validation",
+    "preprocessing",
+    "training",
+    "export",
+    "compaction",
+    "evaluation",
+)
+SLICED_PIPELINE_STEPS = (
+    "extraction",
+    "validation",
+    "slicing",
+    "slice_training",
+    "aggregation",
+)
+RESOURCE_KEYS = ("cpu_request", "cpu_limit", "memory_request", "memory_limit")
+# Profile key -> field of the compiled executor's container.resources
+COMPILED_FIELDS = {
+    "cpu_request": "resourceCpuRequest",
+    "cpu_limit": "resourceCpuLimit",
+    "memory_request": "resourceMemoryRequest",
+    "memory_limit": "resourceMemoryLimit",
+}
+
+
+def load_profile(path=DEFAULT_PROFILE_PATH):
+    """Return {step: settings} with the profile defaults merged into every step."""
+    import yaml
+
+    with open(path) as f:
+        raw = yaml.safe_load(f) or {}
+    defaults = raw.get("defaults") or {}
+    steps = raw.get("steps") or {}
+    unknown = sorted(set(steps) - set(STEP_COMPONENTS))
+    if unknown:
+        raise ValueError(f"Unknown steps in {path}: {unknown}")
+    profile = {}
+    for step in STEP_COMPONENTS:
+        settings = {**defaults, **(steps.get(step) or {})}
+        bad = sorted(set(settings) - set(RESOURCE_KEYS) - {"caching"})
+        if bad:
+            raise ValueError(f"Unknown settings for step '{step}' in {path}: {bad}")
+        profile[step] = {
+            k: str(v) if k in RESOURCE_KEYS else v for k, v in settings.items()
+        }
+    return profile
+
+
+def cpu_cores(quantity):
+    """Kubernetes CPU quantity ("500m", "2", "1.5") as a float core count."""
+    quantity = str(quantity)
+    if quantity.endswith("m"):
+        return float(quantity[:-1]) / 1000
+    return float(quantity)
+
+
+def memory_bytes(quantity):
+    """Kubernetes memory quantity ("512Mi", "1Gi", "500M", "1e9") in bytes."""
+    quantity = str(quantity)
+    for suffix, factor in (
+        ("Ki", 1 << 10),
+        ("Mi", 1 << 20),
+        ("Gi", 1 << 30),
+        ("Ti", 1 << 40),
+        ("k", 10**3),
+        ("M", 10**6),
+        ("G", 10**9),
+        ("T", 10**12),
+    ):
+        if quantity.endswith(suffix):
+            return int(float(quantity[: -len(suffix)]) * factor)
+    return int(float(quantity))
+
+
+def _cgroup_cpu_quota():
+    """CPU quota in cores from the cgroup (v2, else v1); None when unlimited."""
+    for quota_path, period_path in (
+        ("/sys/fs/cgroup/cpu.max", None),
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),
+    ):
+        try:
+            with open(quota_path) as f:
+                fields = f.read().split()
+            if period_path:
+                with open(period_path) as f:
+                    fields.append(f.read().strip())
+        except OSError:
+            continue
+        if fields[0] in ("max", "-1"):
+            return None
+        return int(fields[0]) / int(fields[1])
+    return None
+
+
+def available_cpus():
+    """Whole cores this process is allotted (at least 1).
+
+    Its CPU affinity, capped by the cgroup CPU quota (a pod's CPU limit) and
+    by ``PIPELINE_CPUS``. This is the default worker count wherever ``n_jobs``
+    is unset.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota:
+        cores = min(cores, quota)
+    if os.environ.get(CPU_ENV):
+        cores = min(cores, cpu_cores(os.environ[CPU_ENV]))
+    return max(1, math.floor(cores))
+
+
+def granted_cpus(settings):
+    """Whole cores a step can count on (at least 1).
+
+    Sized from the guaranteed CPU request, since the node may not have the
+    cores to burst to the limit; the limit is only a ceiling (and the size
+    when there is no request).
+    """
+    request, limit = settings.get("cpu_request"), settings.get("cpu_limit")
+    cores = cpu_cores(request or limit or 1)
+    if limit:
+        cores = min(cores, cpu_cores(limit))
+    return max(1, math.floor(cores))
+
+
+def apply_resources(task, step, profile):
+    """Set the profile's requests, limits and caching for ``step`` on ``task``."""
+    settings = profile[step]
+    if "cpu_request" in settings:
+        task.set_cpu_request(settings["cpu_request"])
+    if "cpu_limit" in settings:
+        task.set_cpu_limit(settings["cpu_limit"])
+    if "memory_request" in settings:
+        task.set_memory_request(settings["memory_request"])
+    if "memory_limit" in settings:
+        task.set_memory_limit(settings["memory_limit"])
+    if "caching" in settings:
+        task.set_caching_options(bool(settings["caching"]))
+    return task
+
+
+def check_compiled(pipeline_yaml_path, profile, steps=PIPELINE_STEPS):
+    """Return mismatches between a compiled pipeline spec and the profile."""
+    import yaml
+
+    with open(pipeline_yaml_path) as f:
+        spec = yaml.safe_load(f)
+    # Tasks inside ParallelFor loops live in the loop component's own DAG
+    tasks = dict(spec["root"]["dag"]["tasks"])
+    for component in spec["components"].values():
+        tasks.update(component.get("dag", {}).get("tasks", {}))
+    executors = spec["deploymentSpec"]["executors"]
+    errors = []
+    for step in steps:
+        name = STEP_COMPONENTS[step].replace("_", "-")
+        if name not in tasks:
+            errors.append(f"{step}: task '{name}' missing from {pipeline_yaml_path}")
+            continue
+        task = tasks[name]
+        label = spec["components"][task["componentRef"]["name"]]["executorLabel"]
+        resources = executors[label]["container"].get("resources", {})
+        for key, field in COMPILED_FIELDS.items():
+            want = profile[step].get(key)
+            got = resources.get(field)
+            if want is not None and str(got) != want:
+                errors.append(f"{step}: {field} is {got!r}, expected {want!r}")
+        if "caching" in profile[step]:
+            cached = task.get("cachingOptions", {}).get("enableCache", False)
+            if cached != bool(profile[step]["caching"]):
+                errors.append(
+                    f"{step}: caching is {cached}, expected {profile[step]['caching']}"
+                )
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline resource profiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="verify a compiled pipeline.yaml")
+    check.add_argument("pipeline_yaml", nargs="?", default="pipeline.yaml")
+    check.add_argument("--profile", default=DEFAULT_PROFILE_PATH)
+    check.add_argument(
+        "--sliced", action="store_true", help="check the sliced fan-out pipeline"
+    )
+    args = parser.parse_args()
+
+    steps = SLICED_PIPELINE_STEPS if args.sliced else PIPELINE_STEPS
+    errors = check_compiled(args.pipeline_yaml, load_profile(args.profile), steps)
+    if errors:
+        for error in errors:
+            print(f"✗ {error}")
+        raise SystemExit(1)
+    print(f"✓ {args.pipeline_yaml} matches {args.profile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Run-state journal for resumable pipeline runs.
+
+Each completed step records its output files with their sha256 checksums in
+``.pipeline_state/<run_id>.json``. On resume, steps whose outputs are still
+intact are skipped and execution picks up at the first incomplete step.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+JOURNAL_DIR = ".pipeline_state"
+
+
+def sha256sum(path, block_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class RunJournal:
+    """Per-run record of completed steps and their checksummed outputs."""
+
+    def __init__(self, run_id, journal_dir=JOURNAL_DIR):
+        self.run_id = run_id
+        self.path = os.path.join(journal_dir, f"{run_id}.json")
+        self.steps = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.steps = json.load(f)["steps"]
+
+    @classmethod
+    def load(cls, run_id, journal_dir=JOURNAL_DIR):
+        """Journal of a run that checkpointed at least one step, for resuming."""
+        journal = cls(run_id, journal_dir)
+        if not os.path.exists(journal.path):
+            raise FileNotFoundError(
+                f"No run journal for run {run_id} at {journal.path}"
+            )
+        return journal
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"run_id": self.run_id, "steps": self.steps}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def complete(self, step, outputs):
+        """Record ``step`` as done with ``outputs`` ({name: file path})."""
+        self.steps[step] = {
+            "completed_at": time.time(),
+            "outputs": {
+                name: {"path": path, "sha256": sha256sum(path)}
+                for name, path in outputs.items()
+            },
+        }
+        self._save()
+
+    def is_intact(self, step):
+        """True if ``step`` completed and all of its outputs match their checksums."""
+        entry = self.steps.get(step)
+        if entry is None:
+            return False
+        for output in entry["outputs"].values():
+            if not os.path.exists(output["path"]):
+                return False
+            if sha256sum(output["path"]) != output["sha256"]:
+                return False
+        return True
+
+    def first_incomplete(self, steps):
+        """Index of the first step in ``steps`` that must (re-)run."""
+        for i, step in enumerate(steps):
+            if not self.is_intact(step):
+                return i
+        return len(steps)
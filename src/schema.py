@@ -0,0 +1,82 @@
+"""
+Column schema for the Boston Housing tables, declared once for every component.
+
+``RAW_SCHEMA`` is applied when reading the extracted dataset, ``PROCESSED_SCHEMA``
+when reading the scaled train/test splits. Features are stored as float32
+(RandomForest casts its inputs to float32 anyway), categorical columns as
+small ints / bool flags. The target stays float64 so split thresholds on y
+(and therefore the trees) are unchanged.
+"""
+
+RAW_SCHEMA = {
+    "CRIM": "float32",
+    "ZN": "float32",
+    "INDUS": "float32",
+    "CHAS": "bool",
+    "NOX": "float32",
+    "RM": "float32",
+    "AGE": "float32",
+    "DIS": "float32",
+    "RAD": "int8",
+    "TAX": "int16",
+    "PTRATIO": "float32",
+    "B": "float32",
+    "LSTAT": "float32",
+    "MEDV": "float64",
+}
+
+TARGET = "MEDV"
+FEATURES = [c for c in RAW_SCHEMA if c != TARGET]
+
+# After StandardScaler every feature is continuous
+PROCESSED_SCHEMA = {c: "float32" for c in FEATURES}
+
+# scripts/make_dataset.py writes generic headers; map them by position
+POSITIONAL_HEADERS = [f"f{i}" for i in range(len(FEATURES))] + ["TARGET"]
+
+
+def feature_columns(columns):
+    """Schema features present in ``columns``, in schema order (splits may be pruned)."""
+    present = set(columns)
+    return [c for c in FEATURES if c in present]
+
+
+def canonical_columns(columns):
+    """Return a rename map from positional headers to schema names (empty if none).
+
+    Unlabeled files (features only, no ``TARGET``) are mapped too.
+    """
+    columns = list(columns)
+    if columns in (POSITIONAL_HEADERS, POSITIONAL_HEADERS[:-1]):
+        return dict(zip(columns, RAW_SCHEMA))
+    return {}
+
+
+def read_dtypes(columns, schema):
+    """Dtypes to parse with: floats directly, integers/bools via float32.
+
+    CSV writers emit ``1.0`` for integer columns, which pandas refuses to parse
+    straight into an int/bool dtype, so those are narrowed after parsing.
+    """
+    rename = canonical_columns(columns)
+    dtypes = {}
+    for col in columns:
+        name = rename.get(col, col)
+        if name in schema:
+            dtypes[col] = "float64" if schema[name] == "float64" else "float32"
+    return dtypes
+
+
+def apply_schema(df, schema):
+    """Rename positional headers and cast known columns to the schema dtypes (in place where possible)."""
+    rename = canonical_columns(df.columns)
+    if rename:
+        df = df.rename(columns=rename)
+    casts = {
+        col: dtype
+        for col, dtype in schema.items()
+        if col in df.columns and str(df[col].dtype) != dtype
+    }
+    if casts:
+        df = df.astype(casts, copy=False)
+    return df
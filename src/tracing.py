@@ -0,0 +1,447 @@
+"""
+Lightweight tracing of pipeline phases (compile, submit, monitor, components).
+
+Spans nest through a context variable, carry attributes and durations, and
+are appended to a file as OTLP/JSON lines (one ``resourceSpans`` object per
+span, the OpenTelemetry file-exporter layout), so traces can be inspected
+offline or loaded into any OTLP-compatible viewer.
+
+Tracing is off unless ``PIPELINE_TRACE`` is set (``1`` for the default file
+``traces/trace.jsonl``, or a file path). When off, ``span`` returns a shared
+no-op context manager, so instrumented code pays one attribute check.
+
+A W3C ``traceparent`` string stitches processes into one trace: the
+``TRACEPARENT`` environment variable becomes the parent of a process's root
+spans, and KFP components receive it as their ``trace_parent`` parameter.
+Component pods are discarded when they exit, so by default they print their
+spans to the pod log behind ``LOG_MARKER`` (``PIPELINE_TRACE=log``); the
+submit script harvests them from the run's pods into the local trace file.
+
+Usage:
+    export PIPELINE_TRACE=1 TRACEPARENT=$(python -m src.tracing new)
+    python compile_pipeline.py && python submit_kfp_pipeline.py
+    python -m src.tracing summary traces/trace.jsonl
+    kubectl logs -n kubeflow <pod> -c main | python -m src.tracing harvest
+"""
+
+import argparse
+import atexit
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+
+DEFAULT_TRACE_FILE = os.path.join("traces", "trace.jsonl")
+SERVICE_NAME = "boston-housing-pipeline"
+# PIPELINE_TRACE value that prints spans to stdout (the pod log) behind LOG_MARKER
+LOG_DESTINATION = "log"
+LOG_MARKER = "PIPELINE_TRACE_SPAN "
+KFP_NAMESPACE = os.environ.get("KFP_NAMESPACE", "kubeflow")
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def new_traceparent():
+    return f"00-{secrets.token_hex(16)}-{secrets.token_hex(8)}-01"
+
+
+def parse_traceparent(value):
+    """(trace_id, span_id) of a W3C ``traceparent``; (None, None) if malformed."""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class Span:
+    """One timed operation; use as a context manager or call ``end``."""
+
+    def __init__(self, tracer, name, trace_id, parent_id, attributes, start_ns=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._parent = None
+        self._children = []
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, end_ns=None, error=None):
+        if self.end_ns is not None:
+            return
+        # Children still open when their parent ends (e.g. after an exception)
+        for child in list(self._children):
+            child.end(end_ns, error or "parent span ended first")
+        self.end_ns = end_ns or time.time_ns()
+        self.error = error
+        if self._parent is not None and self in self._parent._children:
+            self._parent._children.remove(self)
+        if _current.get() is self:
+            _current.set(self._parent)
+        self.tracer.export(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(error=f"{exc_type.__name__}: {exc}" if exc_type else None)
+        return False
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    traceparent = ""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def end(self, end_ns=None, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Creates spans and appends finished ones to an OTLP/JSON-lines file.
+
+    With ``path`` set to ``LOG_DESTINATION`` spans are printed instead.
+    """
+
+    def __init__(self, path=None, traceparent=None, service=SERVICE_NAME):
+        self.path = path
+        self.enabled = bool(path)
+        self.service = service
+        self.trace_id, self.parent_id = parse_traceparent(traceparent)
+        if self.trace_id is None:
+            self.trace_id = secrets.token_hex(16)
+        self._lock = threading.Lock()
+
+    def start_span(self, name, attributes=None, start_ns=None, parent=None):
+        """Start a child of ``parent`` (default: the current span) and make it current."""
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = parent if parent is not None else _current.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = self.trace_id, self.parent_id
+        span = Span(self, name, trace_id, parent_id, attributes or {}, start_ns)
+        if parent is not None:
+            span._parent = parent
+            parent._children.append(span)
+        _current.set(span)
+        return span
+
+    def record_span(self, name, start_ns, end_ns, attributes=None, error=None):
+        """Export an already finished operation (e.g. timestamps reported by KFP)."""
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current.get()
+        span = self.start_span(name, attributes, start_ns)
+        span.end(end_ns, error)
+        _current.set(parent)
+        return span
+
+    def export(self, span):
+        line = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [
+                                _attribute("service.name", self.service),
+                                _attribute("process.pid", os.getpid()),
+                            ]
+                        },
+                        "scopeSpans": [
+                            {"scope": {"name": __name__}, "spans": [span.to_otlp()]}
+                        ],
+                    }
+                ]
+            }
+        )
+        if self.path == LOG_DESTINATION:
+            print(LOG_MARKER + line, flush=True)
+            return
+        self.write_lines([line])
+
+    def write_lines(self, lines):
+        with self._lock:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            # One short O_APPEND write per span, so processes can share the file
+            with open(self.path, "a") as f:
+                f.write("".join(line + "\n" for line in lines))
+
+
+def _trace_path(value):
+    if not value or value == "0":
+        return None
+    return DEFAULT_TRACE_FILE if value == "1" else value
+
+
+TRACER = Tracer(
+    _trace_path(os.environ.get("PIPELINE_TRACE")), os.environ.get("TRACEPARENT")
+)
+
+
+def span(name, **attributes):
+    """Context manager timing ``name`` as a child of the current span."""
+    if not TRACER.enabled:
+        return NOOP_SPAN
+    return TRACER.start_span(name, attributes)
+
+
+def traced(name=None):
+    """Decorator: run the function inside a span (named after it by default)."""
+
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            with TRACER.start_span(label):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def current_traceparent():
+    """``traceparent`` of the current span (or of the process trace), '' when off."""
+    if not TRACER.enabled:
+        return ""
+    current = _current.get()
+    if current is not None:
+        return current.traceparent
+    return f"00-{TRACER.trace_id}-{TRACER.parent_id or secrets.token_hex(8)}-01"
+
+
+def component_span(name, trace_parent="", **attributes):
+    """Span for a KFP component body, joined to the pipeline trace.
+
+    A non-empty ``trace_parent`` turns tracing on in the component process
+    even if it was off: spans go to ``PIPELINE_TRACE`` (e.g. a mounted path)
+    or else to the pod log, where ``collect_component_spans`` finds them.
+    """
+    global TRACER
+    if trace_parent and not TRACER.enabled:
+        path = _trace_path(os.environ.get("PIPELINE_TRACE")) or LOG_DESTINATION
+        TRACER = Tracer(path, trace_parent)
+    return span(name, **attributes)
+
+
+def _to_ns(value):
+    """Nanoseconds since the epoch of a datetime or ISO-8601 string (None if unset)."""
+    from datetime import datetime
+
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.year < 1971:  # KFP reports unset times as the epoch
+        return None
+    return int(value.timestamp() * 1e9)
+
+
+def record_kfp_run(run):
+    """Spans for the KFP side of a finished run: queueing and every task.
+
+    ``run`` is what ``kfp.Client.get_run`` returns; queueing lasts from run
+    creation to the first task start.
+    """
+    if not TRACER.enabled:
+        return
+    details = getattr(run, "run_details", None)
+    tasks = getattr(details, "task_details", None) or []
+    starts = [_to_ns(getattr(t, "start_time", None)) for t in tasks]
+    starts = [t for t in starts if t]
+    created = _to_ns(getattr(run, "created_at", None))
+    run_id = getattr(run, "run_id", None) or getattr(run, "id", "")
+    if created and starts:
+        TRACER.record_span("kfp.queue", created, min(starts), {"kfp.run_id": run_id})
+    for task in tasks:
+        start = _to_ns(getattr(task, "start_time", None))
+        end = _to_ns(getattr(task, "end_time", None))
+        if start and end and end >= start:
+            state = str(getattr(task, "state", ""))
+            TRACER.record_span(
+                f"kfp.task {getattr(task, 'display_name', '')}",
+                start,
+                end,
+                {"kfp.state": state},
+                error=None if state in ("SUCCEEDED", "SKIPPED", "") else state,
+            )
+
+
+def harvest_spans(lines):
+    """Append the spans marked in log ``lines`` to the trace file; return their count."""
+    if not TRACER.enabled or TRACER.path == LOG_DESTINATION:
+        return 0
+    spans = [
+        line.split(LOG_MARKER, 1)[1].strip() for line in lines if LOG_MARKER in line
+    ]
+    if spans:
+        TRACER.write_lines(spans)
+    return len(spans)
+
+
+def collect_component_spans(run, namespace=KFP_NAMESPACE):
+    """Harvest the component spans from the logs of a run's pods (needs ``kubectl``).
+
+    ``run`` is what ``kfp.Client.get_run`` returns. Returns the span count.
+    """
+    import subprocess
+
+    if not TRACER.enabled:
+        return 0
+    details = getattr(run, "run_details", None)
+    pods = set()
+    for task in getattr(details, "task_details", None) or []:
+        pods.add(getattr(task, "pod_name", None))
+        pods.update(c.pod_name for c in getattr(task, "child_tasks", None) or [])
+    collected = 0
+    for pod in sorted(p for p in pods if p):
+        logs = subprocess.run(
+            ["kubectl", "logs", "-n", namespace, pod, "-c", "main"],
+            capture_output=True,
+            text=True,
+        )
+        # Driver pods have no "main" container; only executors print spans
+        if logs.returncode == 0:
+            collected += harvest_spans(logs.stdout.splitlines())
+    return collected
+
+
+@atexit.register
+def _end_open_spans():
+    """Export spans a script left open (e.g. after ``sys.exit``) as errors."""
+    current = _current.get()
+    while current is not None and current._parent is not None:
+        current = current._parent
+    if current is not None and current.end_ns is None:
+        current.end(error="process exited before the span ended")
+
+
+def load_spans(path):
+    spans = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+    return spans
+
+
+def summarize(spans):
+    """Indented tree lines (name, duration, share of the root) per trace."""
+    by_id = {s["spanId"]: s for s in spans}
+    children = {}
+    roots = []
+    for s in sorted(spans, key=lambda s: int(s["startTimeUnixNano"])):
+        parent = s.get("parentSpanId")
+        if parent in by_id:
+            children.setdefault(parent, []).append(s)
+        else:
+            roots.append(s)
+
+    def duration(s):
+        return (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e9
+
+    lines = []
+    for root in roots:
+        total = duration(root) or 1e-9
+        lines.append(f"trace {root['traceId']}")
+        stack = [(root, 1)]
+        while stack:
+            s, depth = stack.pop()
+            status = " ✗" if s["status"].get("code") == 2 else ""
+            lines.append(
+                f"{'  ' * depth}{s['name']:<{48 - 2 * depth}}"
+                f"{duration(s):>10.3f}s{duration(s) / total:>7.1%}{status}"
+            )
+            stack.extend(
+                (c, depth + 1) for c in reversed(children.get(s["spanId"], []))
+            )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline tracing utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("new", help="print a fresh traceparent (export as TRACEPARENT)")
+    summary = sub.add_parser("summary", help="print the span tree of a trace file")
+    summary.add_argument("path", nargs="?", default=DEFAULT_TRACE_FILE)
+    harvest = sub.add_parser(
+        "harvest", help="append the spans in component pod logs to the trace file"
+    )
+    harvest.add_argument("logs", nargs="*", help="log files (default: stdin)")
+    args = parser.parse_args()
+
+    if args.command == "new":
+        print(new_traceparent())
+    elif args.command == "harvest":
+        import fileinput
+
+        if not TRACER.enabled:
+            raise SystemExit("Set PIPELINE_TRACE to the trace file to append to")
+        count = harvest_spans(fileinput.input(args.logs))
+        print(f"✓ {count} spans appended to {TRACER.path}")
+    else:
+        print("\n".join(summarize(load_spans(args.path))))
+
+
+if __name__ == "__main__":
+    main()
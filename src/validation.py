@@ -0,0 +1,272 @@
+"""
+Vectorized data validation against the declared schema and reference statistics.
+
+The header is checked before any data is parsed, so a schema mismatch fails
+in milliseconds. Nulls, ranges, integer/bool domains and per-column
+histograms (for PSI drift scores) are then accumulated in a single pass over
+the file, chunk by chunk, so large inputs are streamed.
+
+Build or refresh the reference statistics with:
+    python -m src.validation build-reference data/raw_local.csv
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from src.schema import RAW_SCHEMA, canonical_columns
+
+DEFAULT_REFERENCE_PATH = os.path.join(os.path.dirname(__file__), "reference_stats.json")
+N_BINS = 10
+CHUNK_ROWS = 100_000
+EPS = 1e-6
+
+
+class DataValidationError(ValueError):
+    """Raised when a table fails validation; carries the full report."""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__("; ".join(report["errors"]))
+
+
+def check_header(columns, schema=RAW_SCHEMA):
+    """Return schema errors for a header (after mapping positional names)."""
+    rename = canonical_columns(columns)
+    names = [rename.get(c, c) for c in columns]
+    errors = []
+    missing = [c for c in schema if c not in names]
+    unexpected = [c for c in names if c not in schema]
+    if missing:
+        errors.append(f"missing columns: {missing}")
+    if unexpected:
+        errors.append(f"unexpected columns: {unexpected}")
+    return errors
+
+
+class _Accumulator:
+    """Running per-column statistics for a stream of (n, d) float chunks."""
+
+    def __init__(self, columns, schema, reference):
+        self.columns = columns
+        d = len(columns)
+        self.rows = 0
+        self.nulls = np.zeros(d, dtype=np.int64)
+        self.min = np.full(d, np.inf)
+        self.max = np.full(d, -np.inf)
+        self.total = np.zeros(d)
+        self.total_sq = np.zeros(d)
+        self.non_integral = np.zeros(d, dtype=np.int64)
+        self.integral = np.array(
+            [schema[c].startswith("int") or schema[c] == "bool" for c in columns]
+        )
+        self.is_bool = np.array([schema[c] == "bool" for c in columns])
+        self.out_of_range = np.zeros(d, dtype=np.int64)
+        self.edges = None
+        if reference:
+            ref = [reference["columns"][c] for c in columns]
+            self.low = np.array([r["low"] for r in ref])
+            self.high = np.array([r["high"] for r in ref])
+            self.edges = np.array([r["bin_edges"] for r in ref])
+            self.counts = np.zeros((d, self.edges.shape[1] + 1), dtype=np.int64)
+
+    def update(self, X):
+        n, d = X.shape
+        self.rows += n
+        nan = np.isnan(X)
+        self.nulls += nan.sum(axis=0)
+        filled = np.where(nan, 0.0, X)
+        self.min = np.fmin(self.min, np.nanmin(X, axis=0, initial=np.inf))
+        self.max = np.fmax(self.max, np.nanmax(X, axis=0, initial=-np.inf))
+        self.total += filled.sum(axis=0)
+        self.total_sq += np.square(filled).sum(axis=0)
+        bad_domain = (filled != np.round(filled)) & self.integral
+        bad_domain |= ((filled < 0) | (filled > 1)) & self.is_bool
+        self.non_integral += bad_domain.sum(axis=0)
+        if self.edges is not None:
+            self.out_of_range += (((X < self.low) | (X > self.high)) & ~nan).sum(axis=0)
+            # Bin index per cell, then one bincount over (column, bin) pairs
+            bins = (X[:, :, None] > self.edges[None, :, :]).sum(axis=2)
+            n_bins = self.counts.shape[1]
+            flat = (bins + np.arange(d) * n_bins)[~nan]
+            self.counts += np.bincount(flat, minlength=d * n_bins).reshape(d, n_bins)
+
+    def stats(self):
+        mean = self.total / np.maximum(self.rows - self.nulls, 1)
+        var = self.total_sq / np.maximum(self.rows - self.nulls, 1) - mean**2
+        return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def psi(expected, actual):
+    """Population stability index between two (d, bins) fraction arrays."""
+    expected = np.clip(expected, EPS, None)
+    actual = np.clip(actual, EPS, None)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=-1)
+
+
+def _iter_chunks(path, columns, chunk_rows):
+    """Yield (n, d) float64 chunks of ``columns`` (schema order) from a CSV or mem:// frame."""
+    import pandas as pd
+    from src.artifacts import is_memory_uri, read_frame
+
+    if is_memory_uri(path):
+        df = read_frame(path)
+        df = df.rename(columns=canonical_columns(df.columns))
+        yield df[columns].to_numpy(dtype=np.float64)
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    rename = canonical_columns(header)
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=np.float64):
+        yield chunk.rename(columns=rename)[columns].to_numpy()
+
+
+def _read_header(path):
+    import pandas as pd
+    from src.artifacts import is_memory_uri, read_frame
+
+    if is_memory_uri(path):
+        return list(read_frame(path).columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def validate(
+    path,
+    reference=None,
+    schema=RAW_SCHEMA,
+    max_psi=0.2,
+    max_out_of_range_fraction=0.0,
+    chunk_rows=CHUNK_ROWS,
+):
+    """Validate the table at ``path`` and return a report dict.
+
+    Raises ``DataValidationError`` on the first failing phase: header checks
+    run before any rows are read, cells that do not parse as numbers stop the
+    streaming pass, value checks run after it.
+    """
+    start = time.perf_counter()
+    report = {"path": str(path), "errors": [], "passed": False}
+
+    report["errors"] = check_header(_read_header(path), schema)
+    if report["errors"]:
+        report["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        raise DataValidationError(report)
+
+    columns = list(schema)
+    acc = _Accumulator(columns, schema, reference)
+    try:
+        for X in _iter_chunks(path, columns, chunk_rows):
+            acc.update(X)
+    except ValueError as e:
+        # Non-numeric cells: a schema failure, reported before any value checks
+        report["errors"].append(f"non-numeric values: {e}")
+        report["rows"] = acc.rows
+        report["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        raise DataValidationError(report) from e
+
+    errors = report["errors"]
+    if acc.rows == 0:
+        errors.append("table has no rows")
+    for i, col in enumerate(columns):
+        if acc.nulls[i]:
+            errors.append(f"{col}: {acc.nulls[i]} null values")
+        if acc.non_integral[i]:
+            errors.append(
+                f"{col}: {acc.non_integral[i]} values outside the {schema[col]} domain"
+            )
+
+    mean, std = acc.stats()
+    report["rows"] = acc.rows
+    report["columns"] = {
+        col: {
+            "min": float(acc.min[i]),
+            "max": float(acc.max[i]),
+            "mean": float(mean[i]),
+            "std": float(std[i]),
+        }
+        for i, col in enumerate(columns)
+    }
+
+    if reference and acc.rows:
+        fractions = acc.counts / np.maximum(acc.counts.sum(axis=1, keepdims=True), 1)
+        ref_fractions = np.array(
+            [reference["columns"][c]["bin_fractions"] for c in columns]
+        )
+        scores = psi(ref_fractions, fractions)
+        out_of_range = acc.out_of_range / acc.rows
+        for i, col in enumerate(columns):
+            report["columns"][col]["psi"] = float(scores[i])
+            report["columns"][col]["out_of_range_fraction"] = float(out_of_range[i])
+            if out_of_range[i] > max_out_of_range_fraction:
+                errors.append(
+                    f"{col}: {out_of_range[i]:.1%} of values outside the reference range"
+                )
+            if scores[i] > max_psi:
+                errors.append(f"{col}: drift PSI {scores[i]:.3f} > {max_psi}")
+
+    report["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    report["passed"] = not errors
+    if errors:
+        raise DataValidationError(report)
+    return report
+
+
+def build_reference(path, schema=RAW_SCHEMA, n_bins=N_BINS, range_margin=0.1):
+    """Compute reference statistics (quantile bins, widened ranges) from a trusted table."""
+    columns = list(schema)
+    X = np.concatenate(list(_iter_chunks(path, columns, CHUNK_ROWS)))
+    reference = {"rows": int(X.shape[0]), "columns": {}}
+    for i, col in enumerate(columns):
+        values = X[:, i][~np.isnan(X[:, i])]
+        lo, hi = float(values.min()), float(values.max())
+        margin = (hi - lo) * range_margin
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        # Keep a fixed bin count per column so the histograms stack into one array
+        edges = np.pad(edges, (0, n_bins - 1 - len(edges)), mode="edge")
+        counts = np.bincount(
+            (values[:, None] > edges[None, :]).sum(axis=1), minlength=n_bins
+        )
+        reference["columns"][col] = {
+            "low": lo - margin,
+            "high": hi + margin,
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "bin_edges": edges.tolist(),
+            "bin_fractions": (counts / counts.sum()).tolist(),
+        }
+    return reference
+
+
+def load_reference(path=DEFAULT_REFERENCE_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data validation utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build-reference", help="write reference statistics")
+    build.add_argument("csv_path")
+    build.add_argument("--output", default=DEFAULT_REFERENCE_PATH)
+    check = sub.add_parser("check", help="validate a CSV against the reference")
+    check.add_argument("csv_path")
+    check.add_argument("--reference", default=DEFAULT_REFERENCE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build-reference":
+        with open(args.output, "w") as f:
+            json.dump(build_reference(args.csv_path), f, indent=2)
+        print(f"✓ Reference statistics written to {args.output}")
+    else:
+        try:
+            report = validate(args.csv_path, load_reference(args.reference))
+        except DataValidationError as e:
+            print(f"✗ Validation failed: {e}")
+            raise SystemExit(1)
+        print(f"✓ {report['rows']} rows passed in {report['elapsed_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
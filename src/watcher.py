@@ -0,0 +1,355 @@
+"""
+Retrain automatically, once per data version, when DVC-tracked data changes.
+
+The watcher polls the ``.dvc`` pointers of the raw data (``data/*.dvc``, so
+extra partitions tracked as their own pointers are covered too). Polling
+only stats the files; a pointer is parsed only when its stat changes. The
+data version is a hash of every pointer's md5, so touching a file or
+rewriting it with the same content triggers nothing.
+
+A burst of changes is debounced: a retrain starts once the pointers have
+been quiet for ``debounce`` seconds, or at the latest ``max_wait`` seconds
+after the first change. Changes made while a retrain runs are coalesced and
+trigger one follow-up retrain of the latest version. Intermediate versions
+are skipped.
+
+Every version is recorded in ``.pipeline_state/watcher.json``. A watcher
+claims a version under a file lock (held only to claim it and to record the
+result), so several watchers never retrain the same version at once; a
+claim whose watcher process is gone is taken over. A version that already
+succeeded is never retrained. A failed retrain is retried after
+``retry_after`` seconds, doubling per consecutive failure up to
+``max_retry_after``, even if the data does not change again. For the local
+pipeline, the watcher creates the MLflow run itself (tagged with
+``data_version``). If a retrain fails or the watcher dies, the next attempt
+resumes that run from its first incomplete step (see ``src.run_state``)
+rather than starting over.
+
+Usage:
+    python -m src.watcher -- --importance                  # local pipeline flags after --
+    python -m src.watcher --command "python submit_kfp_pipeline.py"
+    python -m src.watcher --once                           # one check, e.g. from cron
+"""
+
+import argparse
+import fcntl
+import glob
+import hashlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from src.dvc_cache import DvcFetchError, parse_dvc_pointer
+
+POINTER_GLOB = os.path.join("data", "*.dvc")
+STATE_PATH = os.path.join(".pipeline_state", "watcher.json")
+
+
+def _signature(pointer_glob):
+    """Cheap change detector: (path, mtime, size) of every pointer."""
+    signature = []
+    for path in sorted(glob.glob(pointer_glob)):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue  # removed between glob and stat
+        signature.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def data_version(pointer_glob=POINTER_GLOB):
+    """``(version, {pointer: md5})``; the version hashes every pointer's md5.
+
+    Raises ``DvcFetchError`` if a pointer is unreadable (e.g. half written).
+    """
+    md5s = {}
+    for path in sorted(glob.glob(pointer_glob)):
+        with open(path) as f:
+            md5s[path] = parse_dvc_pointer(f.read())[0]
+    if not md5s:
+        raise DvcFetchError(f"No .dvc pointers match {pointer_glob}")
+    lines = "".join(f"{path}:{md5}\n" for path, md5 in md5s.items())
+    return hashlib.sha256(lines.encode()).hexdigest()[:16], md5s
+
+
+def _claim_alive(entry):
+    """True if the watcher process that claimed ``entry`` is still running."""
+    if entry.get("host") != socket.gethostname() or not entry.get("pid"):
+        return False
+    try:
+        os.kill(entry["pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+@contextmanager
+def _locked(state_path):
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    with open(f"{state_path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def local_retrain(pipeline_args=()):
+    """Retrain with ``src.mlflow_pipeline`` in a subprocess; resumable."""
+
+    def retrain(version, md5s, run_id=None, started=None):
+        import mlflow
+        from mlflow.tracking import MlflowClient
+
+        from src.mlflow_pipeline import EXPERIMENT
+        from src.run_state import RunJournal
+
+        cmd = [sys.executable, "-m", "src.mlflow_pipeline", *pipeline_args]
+        env = dict(os.environ, DATA_VERSION=version)
+        if run_id and os.path.exists(RunJournal(run_id).path):
+            cmd += ["--resume", run_id]
+        elif run_id:
+            # Died before its first checkpoint: start over in the same run
+            env["MLFLOW_RUN_ID"] = run_id
+        else:
+            # Create the run up front so a failed attempt can be resumed by ID
+            experiment = mlflow.set_experiment(EXPERIMENT)
+            run_id = (
+                MlflowClient()
+                .create_run(
+                    experiment.experiment_id,
+                    run_name="full_python_run",
+                    tags={"data_version": version, "trigger": "watcher"},
+                )
+                .info.run_id
+            )
+            env["MLFLOW_RUN_ID"] = run_id
+        if started:
+            started(run_id)
+        returncode = subprocess.run(cmd, env=env).returncode
+        return run_id, returncode == 0
+
+    return retrain
+
+
+def command_retrain(command):
+    """Retrain by running a shell ``command`` (e.g. a KFP submit script)."""
+
+    def retrain(version, md5s, run_id=None, started=None):
+        env = dict(os.environ, DATA_VERSION=version)
+        return None, subprocess.run(command, shell=True, env=env).returncode == 0
+
+    return retrain
+
+
+class Watcher:
+    """Poll the data pointers and retrain once per settled data version."""
+
+    def __init__(
+        self,
+        retrain,
+        pointer_glob=POINTER_GLOB,
+        debounce=10.0,
+        max_wait=120.0,
+        poll=1.0,
+        state_path=STATE_PATH,
+        retry_after=60.0,
+        max_retry_after=3600.0,
+    ):
+        self.retrain = retrain
+        self.pointer_glob = pointer_glob
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.poll = poll
+        self.state_path = state_path
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+
+    def _load_state(self):
+        from src.artifacts import read_json
+
+        if not os.path.exists(self.state_path):
+            return {"versions": {}}
+        return read_json(self.state_path)
+
+    def _record(self, version, **entry):
+        from src.artifacts import write_json
+
+        state = self._load_state()
+        state["versions"].setdefault(version, {}).update(entry)
+        state["latest"] = version
+        write_json(state, self.state_path)
+
+    def _update(self, version, **entry):
+        with _locked(self.state_path):
+            self._record(version, **entry)
+
+    def settle(self, signature):
+        """Wait until the pointers stop changing; return the settled signature."""
+        first_change = last_change = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if (
+                now - last_change >= self.debounce
+                or now - first_change >= self.max_wait
+            ):
+                return signature
+            time.sleep(min(self.poll, self.debounce))
+            current = _signature(self.pointer_glob)
+            if current != signature:
+                signature, last_change = current, time.monotonic()
+
+    def process(self):
+        """Retrain the current data version unless it already succeeded.
+
+        Returns the action taken ("retrained", "failed", "skipped", "busy" or
+        "unreadable").
+        """
+        try:
+            version, md5s = data_version(self.pointer_glob)
+        except (DvcFetchError, OSError) as e:
+            print(f"⚠️  Data pointers unreadable, waiting for the next change: {e}")
+            return "unreadable"
+        with _locked(self.state_path):
+            entry = self._load_state()["versions"].get(version, {})
+            if entry.get("status") == "succeeded":
+                print(
+                    f"✓ Data version {version} already trained (run {entry['run_id']})"
+                )
+                return "skipped"
+            if entry.get("status") == "running" and _claim_alive(entry):
+                print(
+                    f"… Data version {version} is being trained by watcher "
+                    f"{entry['pid']}"
+                )
+                return "busy"
+            # A failed or interrupted attempt is resumed, not restarted
+            resume = entry.get("run_id")
+            print(
+                f"→ {'Resuming' if resume else 'Retraining for'} data version "
+                f"{version} ({', '.join(f'{p}={m}' for p, m in md5s.items())})"
+            )
+            self._record(
+                version,
+                md5s=md5s,
+                status="running",
+                started_at=time.time(),
+                host=socket.gethostname(),
+                pid=os.getpid(),
+            )
+        start = time.perf_counter()
+        try:
+            run_id, ok = self.retrain(
+                version,
+                md5s,
+                resume,
+                # Recorded before the run starts, so a crash can be resumed
+                started=lambda run_id: self._update(version, run_id=run_id),
+            )
+        except Exception as e:
+            print(f"✗ Retrain for data version {version} raised: {e}")
+            run_id = self._load_state()["versions"][version].get("run_id")
+            ok = False
+        self._update(
+            version,
+            run_id=run_id,
+            status="succeeded" if ok else "failed",
+            attempts=entry.get("attempts", 0) + 1,
+            seconds=time.perf_counter() - start,
+        )
+        print(f"{'✓' if ok else '✗'} Data version {version}: run {run_id}")
+        return "retrained" if ok else "failed"
+
+    def run(self, once=False):
+        """Check the current version, then keep retraining on every settled change.
+
+        A failed version is retried with exponential backoff until it
+        succeeds or the data changes.
+        """
+        signature = _signature(self.pointer_glob)
+        failures = 0
+        retry_at = None
+
+        def handle(action):
+            nonlocal failures, retry_at
+            if action != "failed":
+                failures, retry_at = 0, None
+                return
+            failures += 1
+            delay = min(self.retry_after * 2 ** (failures - 1), self.max_retry_after)
+            retry_at = time.monotonic() + delay
+            print(f"  Retrying in {delay:.0f}s unless the data changes first")
+
+        handle(self.process())
+        while not once:
+            time.sleep(self.poll)
+            current = _signature(self.pointer_glob)
+            if current != signature:
+                # Changes that arrived during a retrain are handled here in one go
+                signature = self.settle(current)
+                failures, retry_at = 0, None
+                handle(self.process())
+            elif retry_at is not None and time.monotonic() >= retry_at:
+                handle(self.process())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Retrain once per data version when DVC-tracked data changes"
+    )
+    parser.add_argument("--pointers", default=POINTER_GLOB, help="glob of .dvc files")
+    parser.add_argument(
+        "--debounce", type=float, default=10.0, help="quiet seconds before a retrain"
+    )
+    parser.add_argument(
+        "--max-wait", type=float, default=120.0, help="longest delay after a change"
+    )
+    parser.add_argument(
+        "--poll", type=float, default=1.0, help="seconds between checks"
+    )
+    parser.add_argument("--state", default=STATE_PATH)
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=60.0,
+        help="seconds before retrying a failed retrain (doubles per failure)",
+    )
+    parser.add_argument(
+        "--max-retry-after", type=float, default=3600.0, help="longest retry delay"
+    )
+    parser.add_argument("--command", help="shell command to retrain with instead")
+    parser.add_argument("--once", action="store_true", help="check once and exit")
+    parser.add_argument(
+        "pipeline_args",
+        nargs=argparse.REMAINDER,
+        help="-- then src.mlflow_pipeline flags",
+    )
+    args = parser.parse_args()
+
+    if args.command:
+        retrain = command_retrain(args.command)
+    else:
+        retrain = local_retrain([a for a in args.pipeline_args if a != "--"])
+    watcher = Watcher(
+        retrain,
+        args.pointers,
+        args.debounce,
+        args.max_wait,
+        args.poll,
+        args.state,
+        args.retry_after,
+        args.max_retry_after,
+    )
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        print("Watcher stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Submit and run pipeline via KFP SDK"""
+
 import time
 import re
 import sys
@@ -11,6 +12,14 @@ if sys.stdout.encoding.lower() != "utf-8":
 
 from kfp.client import Client
 
+from src.dvc_cache import DvcFetchError, kfp_remote_url
+from src.tracing import (
+    collect_component_spans,
+    current_traceparent,
+    record_kfp_run,
+    span,
+)
+
 
 def extract_id(text):
     """Extract pipeline ID from text"""
@@ -24,10 +33,21 @@ print("=" * 70)
 print("KFP Pipeline Upload & Execution")
 print("=" * 70)
 
+# Root span for the whole submission; unfinished spans are closed on exit
+trace = span("kfp.submit")
+
+# Pods fetch the raw data from the DVC remote; fail here if they cannot reach it
+try:
+    dvc_remote_url = kfp_remote_url(os.environ.get("DVC_REMOTE_URL", ""))
+except (DvcFetchError, OSError) as e:
+    print(f"[ERROR] {e}")
+    exit(1)
+
 # Connect
 print("\n[1] Connecting to KFP...")
 try:
-    client = Client(host="http://127.0.0.1:8080")
+    with span("kfp.connect"):
+        client = Client(host="http://127.0.0.1:8080")
     print("    [OK] Connected")
 except Exception as e:
     print(f"    [ERROR] Failed: {e}")
@@ -36,6 +56,7 @@ except Exception as e:
 # Upload
 print("\n[2] Uploading pipeline.yaml...")
 pipeline_id = None
+upload = span("kfp.upload")
 
 try:
     resp = client.upload_pipeline(
@@ -63,10 +84,12 @@ if not pipeline_id:
 if not pipeline_id:
     print("    [ERROR] Could not get pipeline ID")
     exit(1)
+upload.end()
 
 # Create run
 print("\n[3] Creating pipeline run...")
 run_id = None
+create_run = span("kfp.create_run")
 try:
     # Get pipeline version ID
     version_id = None
@@ -102,13 +125,17 @@ try:
     except:
         pass
 
-    # Run pipeline
+    # Run pipeline (components join this trace through trace_parent)
+    params = {"dvc_remote_url": dvc_remote_url}
+    trace_parent = current_traceparent()
+    if trace_parent:
+        params["trace_parent"] = trace_parent
     run = client.run_pipeline(
         experiment_id=experiment_id,
         job_name=f"boston-run-{int(time.time())}",
         pipeline_id=pipeline_id,
         version_id=version_id,
-        params={},
+        params=params,
     )
     run_id = (
         run.id if hasattr(run, "id") else run.run_id if hasattr(run, "run_id") else None
@@ -121,11 +148,14 @@ except Exception as e:
 if not run_id:
     print("    [ERROR] Could not get run ID")
     exit(1)
+create_run.set_attribute("run_id", run_id)
+create_run.end()
 
 # Monitor
 print(f"\n[4] Monitoring execution...")
 status = "RUNNING"
 elapsed = 0
+monitor = span("kfp.monitor", run_id=run_id)
 
 while elapsed < 600:
     try:
@@ -146,6 +176,24 @@ while elapsed < 600:
     time.sleep(15)
     elapsed += 15
 
+monitor.set_attribute("state", str(status))
+monitor.end(error=None if status == "SUCCEEDED" else f"run ended as {status}")
+try:
+    # Queueing and per-task timings as reported by KFP
+    finished = client.get_run(run_id)
+    record_kfp_run(finished)
+except Exception as e:
+    finished = None
+    print(f"    Note: no KFP task timings ({str(e)[:60]})")
+if finished is not None and trace_parent:
+    try:
+        # Component spans only exist in the (discarded) pods' logs
+        spans = collect_component_spans(finished)
+        print(f"    [OK] Collected {spans} component spans")
+    except Exception as e:
+        print(f"    Note: no component spans ({str(e)[:60]})")
+trace.end()
+
 # Summary
 print(f"\n[5] RESULTS:")
 print(f"    [OK] Pipeline uploaded to KFP")
@@ -2,11 +2,16 @@
 """
 Upload compiled pipeline.yaml to KFP UI and run it
 """
+
 import requests
 import json
+import os
 import time
 import sys
 
+from src.dvc_cache import DvcFetchError, kfp_remote_url
+from src.tracing import current_traceparent, span
+
 # KFP API endpoints
 KFP_BASE_URL = "http://127.0.0.1:8080"
 UPLOAD_URL = f"{KFP_BASE_URL}/apis/v1beta1/pipelines/upload"
@@ -19,7 +24,7 @@ def upload_pipeline(pipeline_file):
     print(f"[1] Uploading pipeline: {pipeline_file}")
 
     try:
-        with open(pipeline_file, "rb") as f:
+        with span("kfp.upload", file=pipeline_file), open(pipeline_file, "rb") as f:
             files = {"uploadfile": f}
             response = requests.post(UPLOAD_URL, files=files, timeout=30)
 
@@ -41,17 +46,24 @@ def upload_pipeline(pipeline_file):
         return None, None
 
 
-def create_run(pipeline_id, run_name):
+def create_run(pipeline_id, run_name, dvc_remote_url):
     """Create and run a pipeline in KFP"""
     print(f"\n[2] Creating run for pipeline: {pipeline_id}")
 
+    parameters = {"dvc_remote_url": dvc_remote_url}
+    trace_parent = current_traceparent()
+    if trace_parent:
+        # Components join this trace through the pipeline's trace_parent parameter
+        parameters["trace_parent"] = trace_parent
     run_body = {
         "display_name": run_name,
         "pipeline_spec_binding": {"pipeline_id": pipeline_id},
+        "runtime_config": {"parameters": parameters},
     }
 
     try:
-        response = requests.post(CREATE_RUN_URL, json=run_body, timeout=30)
+        with span("kfp.create_run"):
+            response = requests.post(CREATE_RUN_URL, json=run_body, timeout=30)
         print(f"    Status: {response.status_code}")
 
         if response.status_code in [200, 201]:
@@ -81,12 +93,25 @@ def get_run_status(run_id):
 
 
 def main():
+    with span("kfp.submit"):
+        submit()
+
+
+def submit():
     pipeline_file = "pipeline.yaml"
 
     print("=" * 60)
     print("KFP Pipeline Upload & Execution")
     print("=" * 60)
 
+    # Pods fetch the raw data from the DVC remote; fail before uploading if
+    # they cannot reach it
+    try:
+        dvc_remote_url = kfp_remote_url(os.environ.get("DVC_REMOTE_URL", ""))
+    except (DvcFetchError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
     # Step 1: Upload pipeline
     pipeline_id, pipeline_name = upload_pipeline(pipeline_file)
 
@@ -95,7 +120,7 @@ def main():
         sys.exit(1)
 
     # Step 2: Create and run
-    run_id = create_run(pipeline_id, f"run-{int(time.time())}")
+    run_id = create_run(pipeline_id, f"run-{int(time.time())}", dvc_remote_url)
 
     if not run_id:
         print("\n❌ Failed to create run. Exiting.")
@@ -108,6 +133,7 @@ def main():
     max_wait = 300  # 5 minutes
     check_interval = 5
     elapsed = 0
+    monitor = span("kfp.monitor", run_id=run_id)
 
     while elapsed < max_wait:
         state, name = get_run_status(run_id)
@@ -128,6 +154,8 @@ def main():
 
     if elapsed >= max_wait:
         print(f"    ⚠️  Timeout reached. Run may still be executing.")
+    monitor.set_attribute("state", state or "UNKNOWN")
+    monitor.end(error=None if state == "SUCCEEDED" else f"run ended as {state}")
 
     # Step 4: Provide UI link
     print(f"\n[4] Access KFP UI:")